@@ -0,0 +1,456 @@
+"""Archivo de actas renderizadas, direccionado por contenido.
+
+Un acta con el mismo `hash` y los mismos datos de entrada produce siempre el
+mismo documento, pero cada reimpresión la vuelve a renderizar y cada copia se
+guarda aparte. Este archivo guarda los PDF de `generar_pdf` una sola vez:
+
+- la clave de un acta es la huella (SHA-256) de sus datos de entrada y de la
+  versión de la plantilla (`huella_acta`); apunta al SHA-256 del PDF, de modo
+  que dos claves con el mismo contenido comparten los bytes;
+- los PDF se empaquetan en segmentos de sólo agregado (`segmentos/000001.seg`)
+  comprimidos con zlib cuando conviene; los que superan `umbral_externo` van
+  como objeto propio (`objetos/<sha256>.pdf`);
+- al llenarse, un segmento se sella: se sube al backend junto con su índice
+  (`indices/000001.json`) y ya no cambia. Al abrir se cargan los índices en
+  memoria (búsqueda O(1) por diccionario) y el segmento activo se recorre
+  registro por registro, descartando una cola escrita a medias;
+- `obtener_o_renderizar` sirve la reimpresión desde el archivo y sólo
+  renderiza (y archiva) si la clave no está.
+
+El backend guarda objetos inmutables con lectura por rango: `BackendLocal`
+(un directorio) o `BackendS3` (Garage u otro S3 compatible, con direcciones
+estilo ruta como `lib/s3.ts`). El segmento activo vive en un directorio de
+trabajo local. Un solo proceso escribe a la vez (se toma un lock exclusivo).
+
+    python archivo_actas.py archivar archivo/ actas.jsonl --procesos 8
+    python archivo_actas.py archivar trabajo/ actas.jsonl --s3 --prefijo actas/      # usa GARAGE_*
+    python archivo_actas.py obtener archivo/ <clave> acta.pdf
+    python archivo_actas.py estadisticas archivo/
+"""
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+
+# 📌 Cambiar al modificar la plantilla del acta: las claves viejas dejan de coincidir
+VERSION_PLANTILLA = "1"
+
+TAMANO_SEGMENTO = 64 * 1024 * 1024
+UMBRAL_EXTERNO = 4 * 1024 * 1024
+
+# 🔹 Registro de un segmento: cabecera, contenido y CRC32 del contenido
+MAGICO = b"ACT1"
+CABECERA = struct.Struct(">4sB32sI")
+CRC = struct.Struct(">I")
+PDF, PDF_ZLIB, PDF_EXTERNO, CLAVE = range(4)
+
+
+def huella_acta(numero_orden, denunciante, datos_denuncia, version=VERSION_PLANTILLA):
+    """Clave estable del acta: todo lo que entra al renderizado, más la versión de la plantilla."""
+    contenido = json.dumps(
+        {"orden": numero_orden, "denunciante": denunciante, "denuncia": datos_denuncia, "version": version},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def _nombre_segmento(numero):
+    return f"segmentos/{numero:06d}.seg"
+
+
+def _nombre_indice(numero):
+    return f"indices/{numero:06d}.json"
+
+
+def _nombre_objeto(digesto):
+    return f"objetos/{digesto}.pdf"
+
+
+class BackendLocal:
+    """Objetos inmutables como archivos bajo `raiz` (las claves usan '/' como en S3)."""
+
+    def __init__(self, raiz):
+        self.raiz = raiz
+
+    def _ruta(self, clave):
+        return os.path.join(self.raiz, *clave.split("/"))
+
+    def subir_archivo(self, clave, ruta):
+        destino = self._ruta(clave)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        shutil.copyfile(ruta, destino + ".parcial")
+        os.replace(destino + ".parcial", destino)
+
+    def subir(self, clave, datos):
+        destino = self._ruta(clave)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with open(destino + ".parcial", "wb") as f:
+            f.write(datos)
+        os.replace(destino + ".parcial", destino)
+
+    def leer(self, clave, inicio=0, largo=None):
+        with open(self._ruta(clave), "rb") as f:
+            if largo is None:
+                f.seek(inicio)
+                return f.read()
+            return os.pread(f.fileno(), largo, inicio)
+
+    def listar(self, prefijo):
+        carpeta = os.path.dirname(self._ruta(prefijo + "x"))
+        if not os.path.isdir(carpeta):
+            return []
+        base = prefijo.rsplit("/", 1)[0] + "/" if "/" in prefijo else ""
+        return sorted(base + nombre for nombre in os.listdir(carpeta)
+                      if (base + nombre).startswith(prefijo) and not nombre.endswith(".parcial"))
+
+
+class BackendS3:
+    """
+    Objetos en un bucket S3 compatible (Garage, MinIO). `cliente` es un
+    cliente de boto3 o cualquier objeto con `put_object`, `get_object`
+    (con `Range`) y `list_objects_v2`.
+    """
+
+    def __init__(self, cliente, bucket, prefijo=""):
+        self.cliente = cliente
+        self.bucket = bucket
+        self.prefijo = prefijo
+
+    @classmethod
+    def desde_entorno(cls, prefijo=""):
+        """Misma configuración que `lib/s3.ts`: variables GARAGE_* y direcciones estilo ruta."""
+        import boto3
+        from botocore.config import Config
+
+        cliente = boto3.client(
+            "s3",
+            endpoint_url=os.environ.get("GARAGE_ENDPOINT", "https://s3.s1mple.cloud"),
+            region_name=os.environ.get("GARAGE_REGION", "garage"),
+            aws_access_key_id=os.environ.get("GARAGE_ACCESS_KEY_ID"),
+            aws_secret_access_key=os.environ.get("GARAGE_SECRET_ACCESS_KEY"),
+            config=Config(s3={"addressing_style": "path"}),  # Requerido por Garage y MinIO
+        )
+        return cls(cliente, os.environ.get("GARAGE_BUCKET_NAME", "s1mple-cloud"), prefijo)
+
+    def subir_archivo(self, clave, ruta):
+        with open(ruta, "rb") as f:
+            self.cliente.put_object(Bucket=self.bucket, Key=self.prefijo + clave, Body=f)
+
+    def subir(self, clave, datos):
+        self.cliente.put_object(Bucket=self.bucket, Key=self.prefijo + clave, Body=datos)
+
+    def leer(self, clave, inicio=0, largo=None):
+        extra = {}
+        if inicio or largo is not None:
+            extra["Range"] = f"bytes={inicio}-" + (str(inicio + largo - 1) if largo is not None else "")
+        respuesta = self.cliente.get_object(Bucket=self.bucket, Key=self.prefijo + clave, **extra)
+        return respuesta["Body"].read()
+
+    def _listar(self, prefijo):
+        claves, continuacion = [], None
+        while True:
+            extra = {"ContinuationToken": continuacion} if continuacion else {}
+            respuesta = self.cliente.list_objects_v2(Bucket=self.bucket, Prefix=prefijo, **extra)
+            claves.extend(o["Key"] for o in respuesta.get("Contents", ()))
+            if not respuesta.get("IsTruncated"):
+                return claves
+            continuacion = respuesta["NextContinuationToken"]
+
+    def listar(self, prefijo):
+        return sorted(clave[len(self.prefijo):] for clave in self._listar(self.prefijo + prefijo))
+
+
+class ArchivoActas:
+    """
+    Archivo de actas sobre un backend de objetos. `trabajo` es el directorio
+    local del segmento activo (para `BackendLocal` puede ser la misma raíz).
+    Las lecturas no toman el lock salvo las del segmento activo.
+    """
+
+    def __init__(self, backend, trabajo, tamano_segmento=TAMANO_SEGMENTO, umbral_externo=UMBRAL_EXTERNO,
+                 sincronizar=False):
+        self.backend = backend
+        self.trabajo = trabajo
+        self.tamano_segmento = tamano_segmento
+        self.umbral_externo = umbral_externo
+        self.sincronizar = sincronizar
+        self._lock = threading.Lock()
+        self._claves = {}   # huella de entrada -> sha256 del PDF
+        self._blobs = {}    # sha256 del PDF -> (segmento, inicio, largo, modo, tamano_pdf)
+        self._indice_activo = {"claves": {}, "blobs": {}}
+        self.bytes_guardados = 0
+        os.makedirs(trabajo, exist_ok=True)
+        self._bloqueo = open(os.path.join(trabajo, ".bloqueo"), "a")
+        try:
+            fcntl.flock(self._bloqueo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._bloqueo.close()
+            raise RuntimeError(f"Otro proceso está escribiendo en el archivo de actas ({trabajo})")
+        self._abrir()
+
+    @classmethod
+    def local(cls, raiz, **opciones):
+        return cls(BackendLocal(raiz), raiz, **opciones)
+
+    # 🔹 Apertura y recuperación
+
+    def _abrir(self):
+        ultimo_sellado = 0
+        for clave in self.backend.listar("indices/"):
+            numero = int(clave.rsplit("/", 1)[1].split(".")[0])
+            self._cargar_indice(numero, json.loads(self.backend.leer(clave)))
+            ultimo_sellado = max(ultimo_sellado, numero)
+        activos = sorted(n for n in os.listdir(self.trabajo) if n.startswith("activo_") and n.endswith(".seg"))
+        self._numero = ultimo_sellado + 1
+        for nombre in activos:
+            numero = int(nombre[len("activo_"):-len(".seg")])
+            if numero <= ultimo_sellado:
+                os.remove(os.path.join(self.trabajo, nombre))  # ⚠ Ya subido: quedó de un cierre interrumpido
+            else:
+                self._numero = numero
+        self._ruta_activo = os.path.join(self.trabajo, f"activo_{self._numero:06d}.seg")
+        if os.path.exists(self._ruta_activo):
+            self._recuperar_activo()
+        self._activo = open(self._ruta_activo, "a+b")
+
+    def _cargar_indice(self, numero, indice):
+        for digesto, (inicio, largo, modo, tamano) in indice["blobs"].items():
+            self._blobs[digesto] = (numero, inicio, largo, modo, tamano)
+            self.bytes_guardados += largo or tamano
+        self._claves.update(indice["claves"])
+
+    def _recuperar_activo(self):
+        """Relee el segmento activo; si la última escritura quedó a medias, la trunca."""
+        valido = 0
+        with open(self._ruta_activo, "rb") as f:
+            datos = f.read()
+        while valido + CABECERA.size <= len(datos):
+            magico, modo, digesto, largo = CABECERA.unpack_from(datos, valido)
+            fin = valido + CABECERA.size + largo + CRC.size
+            if magico != MAGICO or fin > len(datos):
+                break
+            contenido = datos[valido + CABECERA.size:fin - CRC.size]
+            if CRC.unpack_from(datos, fin - CRC.size)[0] != zlib.crc32(contenido):
+                break
+            self._registrar(modo, digesto.hex(), valido + CABECERA.size, contenido)
+            valido = fin
+        if valido < len(datos):
+            print(f"⚠ Segmento {self._numero}: se descartan {len(datos) - valido} bytes incompletos", file=sys.stderr)
+            with open(self._ruta_activo, "r+b") as f:
+                f.truncate(valido)
+
+    def _registrar(self, modo, digesto, inicio, contenido):
+        if modo == CLAVE:
+            self._claves[digesto] = contenido.hex()
+            self._indice_activo["claves"][digesto] = contenido.hex()
+            return
+        if modo == PDF_EXTERNO:
+            largo, tamano = 0, struct.unpack(">Q", contenido)[0]
+        else:
+            largo = len(contenido)
+            tamano = len(zlib.decompress(contenido)) if modo == PDF_ZLIB else largo
+        self._blobs[digesto] = (self._numero, inicio, largo, modo, tamano)
+        self._indice_activo["blobs"][digesto] = (inicio, largo, modo, tamano)
+        self.bytes_guardados += largo or tamano
+
+    # 🔹 Escritura
+
+    def _agregar(self, modo, digesto, contenido):
+        inicio = self._activo.tell() + CABECERA.size
+        self._activo.write(CABECERA.pack(MAGICO, modo, bytes.fromhex(digesto), len(contenido)))
+        self._activo.write(contenido)
+        self._activo.write(CRC.pack(zlib.crc32(contenido)))
+        self._registrar(modo, digesto, inicio, contenido)
+
+    def guardar(self, clave, pdf_bytes):
+        """Archiva el PDF bajo `clave` (ver `huella_acta`) y devuelve el SHA-256 del contenido."""
+        with self._lock:
+            if clave in self._claves:
+                return self._claves[clave]
+            digesto = hashlib.sha256(pdf_bytes).hexdigest()
+            if digesto not in self._blobs:
+                if len(pdf_bytes) >= self.umbral_externo:
+                    self.backend.subir(_nombre_objeto(digesto), pdf_bytes)
+                    self._agregar(PDF_EXTERNO, digesto, struct.pack(">Q", len(pdf_bytes)))
+                else:
+                    comprimido = zlib.compress(pdf_bytes, 6)
+                    if len(comprimido) < len(pdf_bytes):
+                        self._agregar(PDF_ZLIB, digesto, comprimido)
+                    else:
+                        self._agregar(PDF, digesto, pdf_bytes)
+            self._agregar(CLAVE, clave, bytes.fromhex(digesto))
+            self._activo.flush()
+            if self.sincronizar:
+                os.fsync(self._activo.fileno())
+            if self._activo.tell() >= self.tamano_segmento:
+                self._sellar()
+            return digesto
+
+    def _sellar(self):
+        """Sube el segmento activo y su índice (en ese orden) y abre uno nuevo."""
+        self._activo.close()
+        if self._indice_activo["claves"] or self._indice_activo["blobs"]:
+            self.backend.subir_archivo(_nombre_segmento(self._numero), self._ruta_activo)
+            indice = json.dumps(self._indice_activo, separators=(",", ":")).encode("utf-8")
+            self.backend.subir(_nombre_indice(self._numero), indice)
+            os.remove(self._ruta_activo)
+            self._numero += 1
+            self._ruta_activo = os.path.join(self.trabajo, f"activo_{self._numero:06d}.seg")
+            self._indice_activo = {"claves": {}, "blobs": {}}
+        self._activo = open(self._ruta_activo, "a+b")
+
+    def sellar(self):
+        with self._lock:
+            self._sellar()
+
+    # 🔹 Lectura
+
+    def __contains__(self, clave):
+        return clave in self._claves
+
+    def __len__(self):
+        return len(self._claves)
+
+    def obtener(self, clave):
+        """Bytes del PDF archivado bajo `clave`, o None."""
+        digesto = self._claves.get(clave)
+        if digesto is None:
+            return None
+        numero, inicio, largo, modo, _ = self._blobs[digesto]
+        if modo == PDF_EXTERNO:
+            return self.backend.leer(_nombre_objeto(digesto))
+        with self._lock:
+            activo = numero == self._numero
+            if activo:
+                datos = os.pread(self._activo.fileno(), largo, inicio)
+        if not activo:
+            datos = self.backend.leer(_nombre_segmento(numero), inicio, largo)
+        return zlib.decompress(datos) if modo == PDF_ZLIB else datos
+
+    def obtener_o_renderizar(self, numero_orden, denunciante, datos_denuncia, renderizar=None):
+        """La reimpresión sale del archivo; si el acta no está, se renderiza y se archiva."""
+        clave = huella_acta(numero_orden, denunciante, datos_denuncia)
+        pdf_bytes = self.obtener(clave)
+        if pdf_bytes is None:
+            if renderizar is None:
+                from generar_pdf import generar_pdf as renderizar
+            pdf_bytes = renderizar(numero_orden, denunciante, datos_denuncia)
+            self.guardar(clave, pdf_bytes)
+        return pdf_bytes
+
+    def completar(self, registros, procesos=None):
+        """
+        Archiva un lote de registros (como los de `generar_pdf_lote`),
+        renderizando en paralelo sólo los que faltan. Devuelve
+        (ya_archivadas, renderizadas, fallidas).
+        """
+        from generar_pdf_lote import generar_lote
+
+        claves, en_vuelo = deque(), set()
+        conteo = {"archivadas": 0}
+
+        def faltantes():
+            for registro in registros:
+                if not isinstance(registro, dict):
+                    numero_orden, denunciante, datos_denuncia = registro
+                    registro = {"numero_orden": numero_orden, "denunciante": denunciante,
+                                "datos_denuncia": datos_denuncia}
+                clave = huella_acta(registro["numero_orden"], registro["denunciante"], registro["datos_denuncia"])
+                if clave in self._claves or clave in en_vuelo:
+                    conteo["archivadas"] += 1
+                    continue
+                claves.append(clave)
+                en_vuelo.add(clave)
+                yield registro
+
+        renderizadas = fallidas = 0
+        for resultado in generar_lote(faltantes(), procesos=procesos):
+            clave = claves.popleft()
+            en_vuelo.discard(clave)
+            if resultado.ok:
+                self.guardar(clave, resultado.pdf_bytes)
+                renderizadas += 1
+            else:
+                fallidas += 1
+                print(f"⚠ Acta {resultado.numero_orden}: {resultado.error}", file=sys.stderr)
+        return conteo["archivadas"], renderizadas, fallidas
+
+    def estadisticas(self):
+        bytes_pdf = sum(self._blobs[d][4] for d in self._claves.values())
+        return {
+            "actas": len(self._claves),
+            "pdf_distintos": len(self._blobs),
+            "segmento_activo": self._numero,
+            "bytes_archivados": self.bytes_guardados,
+            "bytes_sin_deduplicar": bytes_pdf,
+        }
+
+    def cerrar(self):
+        with self._lock:
+            self._activo.close()
+        fcntl.flock(self._bloqueo, fcntl.LOCK_UN)
+        self._bloqueo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def _abrir_archivo(args):
+    if args.s3:
+        return ArchivoActas(BackendS3.desde_entorno(args.prefijo), args.directorio)
+    return ArchivoActas.local(args.directorio)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archivo de actas direccionado por contenido.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_archivar = sub.add_parser("archivar", help="Archiva (renderizando sólo lo que falta) un JSON/JSONL de registros")
+    p_obtener = sub.add_parser("obtener", help="Escribe el PDF archivado bajo una clave")
+    p_estadisticas = sub.add_parser("estadisticas")
+    p_sellar = sub.add_parser("sellar", help="Sube el segmento activo aunque no esté lleno")
+    for p in (p_archivar, p_obtener, p_estadisticas, p_sellar):
+        p.add_argument("directorio", help="Raíz del archivo local (o directorio de trabajo con --s3)")
+        p.add_argument("--s3", action="store_true", help="Usar el bucket de Garage (variables GARAGE_*)")
+        p.add_argument("--prefijo", default="actas/")
+    p_archivar.add_argument("entrada")
+    p_archivar.add_argument("--procesos", type=int, default=None)
+    p_obtener.add_argument("clave")
+    p_obtener.add_argument("salida")
+    args = parser.parse_args(argv)
+
+    with _abrir_archivo(args) as archivo:
+        if args.comando == "archivar":
+            from generar_pdf_lote import leer_registros
+
+            inicio = time.perf_counter()
+            archivadas, renderizadas, fallidas = archivo.completar(leer_registros(args.entrada), args.procesos)
+            print(f"✅ {renderizadas} actas archivadas, {archivadas} ya estaban, {fallidas} fallidas "
+                  f"({time.perf_counter() - inicio:.1f}s)")
+            return 1 if fallidas else 0
+        if args.comando == "obtener":
+            pdf_bytes = archivo.obtener(args.clave)
+            if pdf_bytes is None:
+                print(f"❌ No hay acta archivada con la clave {args.clave}", file=sys.stderr)
+                return 1
+            with open(args.salida, "wb") as f:
+                f.write(pdf_bytes)
+            return 0
+        if args.comando == "sellar":
+            archivo.sellar()
+        print(json.dumps(archivo.estadisticas(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
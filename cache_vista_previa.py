@@ -0,0 +1,152 @@
+"""Caché de vistas previas de actas.
+
+Mientras el operador completa la denuncia, el formulario pide la vista previa
+una y otra vez con casi los mismos datos. Esta caché:
+
+- guarda los PDF ya generados bajo una huella estable de los datos de entrada
+  (LRU acotada por cantidad y por bytes);
+- ante un fallo, reutiliza los párrafos ya maquetados cuyos datos no cambiaron
+  (si sólo se editó el relato, el aviso y los dos primeros párrafos salen de
+  la caché y del relato sólo se re-maqueta el párrafo editado);
+- ofrece un modo "sólo primera página" para el panel de vista previa en vivo.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from generar_pdf import RenderizadorActas
+
+
+class CacheLRU:
+    """
+    Diccionario LRU seguro entre hilos, acotado por cantidad de entradas y,
+    opcionalmente, por el tamaño total de los valores (según `medir`).
+
+    `obtener` construye cada clave una sola vez aunque varios hilos fallen a la
+    vez: el primero la construye y los demás esperan su resultado.
+    """
+
+    def __init__(self, max_entradas=256, max_bytes=None, medir=len):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._medir = medir
+        self._datos = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._en_curso = {}  # clave → Future de la construcción en marcha
+        self.aciertos = 0
+        self.fallos = 0
+
+    def __len__(self):
+        return len(self._datos)
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+    def get(self, clave, defecto=None):
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave][0]
+            self.fallos += 1
+            return defecto
+
+    def __setitem__(self, clave, valor):
+        tamano = self._medir(valor) if self.max_bytes is not None else 0
+        with self._lock:
+            if clave in self._datos:
+                self._bytes -= self._datos.pop(clave)[1]
+            if self.max_bytes is not None and tamano > self.max_bytes:
+                return  # 🔹 No entra nunca: no vale la pena desalojar todo
+            self._datos[clave] = (valor, tamano)
+            self._bytes += tamano
+            while len(self._datos) > self.max_entradas or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                _, (_, tamano_viejo) = self._datos.popitem(last=False)
+                self._bytes -= tamano_viejo
+
+    def obtener(self, clave, construir):
+        """
+        Devuelve el valor de `clave`, construyéndolo (fuera del lock) si no está.
+        Si otro hilo ya la está construyendo, espera ese resultado (o su excepción).
+        """
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave][0]
+            futuro = self._en_curso.get(clave)
+            if futuro is None:
+                futuro = self._en_curso[clave] = Future()
+                self.fallos += 1
+                propio = True
+            else:
+                self.aciertos += 1
+                propio = False
+        if not propio:
+            return futuro.result()
+
+        try:
+            valor = construir()
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        else:
+            self[clave] = valor
+            futuro.set_result(valor)
+            return valor
+        finally:
+            with self._lock:
+                self._en_curso.pop(clave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self._bytes = 0
+
+
+def huella_vista_previa(denunciante, datos_denuncia, solo_primera_pagina=False):
+    """
+    Huella estable de todo lo que influye en la vista previa. El número de orden
+    no entra: en vista previa el título y el QR van ofuscados.
+    """
+    contenido = json.dumps(
+        {"denunciante": denunciante, "denuncia": datos_denuncia, "primera_pagina": bool(solo_primera_pagina)},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+class CacheVistaPrevia:
+    """Sirve vistas previas desde caché y re-renderiza sólo lo que cambió."""
+
+    def __init__(self, renderizador=None, max_documentos=128, max_bytes=64 * 1024 * 1024, max_maquetas=1024):
+        self.renderizador = renderizador or RenderizadorActas()
+        self.documentos = CacheLRU(max_entradas=max_documentos, max_bytes=max_bytes)
+        # Párrafos ya maquetados (encabezados de texto, aviso, párrafos 1 y 2)
+        self.maquetas = CacheLRU(max_entradas=max_maquetas)
+
+    def obtener(self, denunciante, datos_denuncia, solo_primera_pagina=False):
+        """Devuelve los bytes de la vista previa, renderizándola sólo si hace falta."""
+        clave = huella_vista_previa(denunciante, datos_denuncia, solo_primera_pagina)
+        return self.documentos.obtener(clave, lambda: self.renderizador.renderizar(
+            None, denunciante, datos_denuncia, vista_previa=True,
+            maquetas=self.maquetas, max_paginas=1 if solo_primera_pagina else None,
+        ))
+
+    def estadisticas(self):
+        return {
+            "documentos": len(self.documentos),
+            "bytes": self.documentos.bytes,
+            "aciertos": self.documentos.aciertos,
+            "fallos": self.documentos.fallos,
+            "maquetas": len(self.maquetas),
+            "maquetas_reutilizadas": self.maquetas.aciertos,
+        }
+
+    def limpiar(self):
+        self.documentos.limpiar()
+        self.maquetas.limpiar()
@@ -0,0 +1,308 @@
+"""Clasificador de hechos punibles para las denuncias "OTRO".
+
+Las denuncias con `tipo_denuncia = 'OTRO'` llevan el hecho en texto libre
+(`otro_tipo`) y en `/api/reportes/por-hecho-punible` quedan fuera de las
+estadísticas. Este módulo las ubica en el catálogo de `hechos_punibles.txt`:
+
+- cada hecho se describe por los trigramas de sus palabras (texto plegado, sin
+  palabras vacías), más los de algunos nombres de uso corriente ("hackeo",
+  "sextorsión"); los trigramas toleran errores de tipeo y formas derivadas
+  ("estafaron", "amenazas");
+- el catálogo compilado es una matriz hechos × trigramas (pesos idf, filas
+  normalizadas): clasificar un texto es sumar unas pocas columnas con numpy,
+  muy por debajo del milisegundo para un `otro_tipo`.
+
+    python clasificador_hechos.py clasificar "le hackearon el whatsapp"
+    python clasificador_hechos.py clasificar --relato "me estafaron por marketplace..."
+    python clasificador_hechos.py reclasificar --salida otros.csv        # usa DATABASE_URL
+    python clasificador_hechos.py reclasificar --archivo "excels/json_para_analisis/*.json" --salida otros.csv
+
+`reclasificar` procesa todas las denuncias OTRO (cada `otro_tipo` distinto se
+clasifica una sola vez; si no alcanza, se usa el relato) y con `--tabla` deja
+el resultado en PostgreSQL (`hechos_reclasificados`) para cruzarlo en los
+reportes sin tocar `tipo_denuncia`, que forma parte del acta.
+
+Los JSON de `/api/denuncias/buscar-relato` traen el tipo como `tipo_hecho` y
+no exportan `otro_tipo`: de esas denuncias se clasifica directamente el relato.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+from texto_relatos import leer_exportaciones, plegar, tokenizar
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+CATALOGO = os.path.join(RAIZ, "hechos_punibles.txt")
+
+TIPOS_OTRO = ("OTRO", "Otro (Especificar)")
+PUNTAJE_MINIMO = 0.35
+PUNTAJE_MINIMO_RELATO = 0.8  # 🔹 en un relato largo casi todo aparece un poco: se pide el nombre casi entero
+MAXIMO_RESULTADOS = 5
+
+# 📌 Nombres de uso corriente → hecho del catálogo (se agregan como descripciones del hecho)
+SINONIMOS = {
+    "Acceso indebido a sistemas informáticos": [
+        "hackeo", "hackearon cuenta", "robo de cuenta", "robo de whatsapp", "clonacion de whatsapp",
+        "acceso a cuenta de facebook", "acceso a cuenta de instagram",
+    ],
+    "Estafa mediante sistemas informáticos": [
+        "estafa por internet", "estafa virtual", "estafa online", "phishing", "transferencia no autorizada",
+        "estafa por marketplace", "estafa por whatsapp", "compra por internet",
+    ],
+    "Estafa": ["engaño", "cuento del tio", "venta falsa", "falso prestamo"],
+    "Extorsión": ["sextorsion", "chantaje", "pedido de dinero bajo amenaza"],
+    "Abuso de documentos de identidad": [
+        "suplantacion de identidad", "uso de cedula ajena", "perfil falso", "usurpacion de identidad",
+    ],
+    "Falsificación de tarjetas de débito o de crédito y otros medios electrónicos de pago": [
+        "clonacion de tarjeta", "uso indebido de tarjeta",
+    ],
+    "Acoso sexual": ["acoso por redes sociales", "acoso en linea"],
+    "Amenaza": ["amenazas por redes sociales", "amenaza por whatsapp"],
+    "Calumnia": ["difamacion por redes sociales", "escrache"],
+    "Hurto": ["robo de celular", "sustraccion", "arrebato"],
+}
+
+
+def leer_catalogo(ruta=CATALOGO):
+    """
+    Pares `(hecho, capitulo)` de hechos_punibles.txt. Los capítulos son los
+    títulos "Hechos punibles contra ..." y la primera línea de cada bloque
+    separado por líneas en blanco; el capítulo se guarda en singular, como en
+    `lib/data/hechos-punibles.ts`.
+    """
+    with open(ruta, encoding="utf-8") as f:
+        lineas = [linea.strip() for linea in f]
+    catalogo, capitulo = [], None
+    for i, linea in enumerate(lineas):
+        if not linea:
+            continue
+        siguiente = lineas[i + 1] if i + 1 < len(lineas) else ""
+        inicio_de_bloque = i == 0 or not lineas[i - 1]
+        titulo = plegar(linea).startswith("hechos punibles ")
+        if titulo or (inicio_de_bloque and siguiente and not plegar(siguiente).startswith("hechos punibles ")):
+            capitulo = linea.replace("Hechos punibles", "Hecho punible", 1)
+            continue
+        catalogo.append((linea, capitulo or linea))
+    return catalogo
+
+
+def trigramas(texto):
+    """Trigramas de cada palabra con bordes ("robo" → " ro", "rob", "obo", "bo ")."""
+    resultado = []
+    for palabra in tokenizar(texto):
+        palabra = f" {palabra} "
+        resultado.extend(palabra[i:i + 3] for i in range(len(palabra) - 2))
+    return resultado
+
+
+class ClasificadorHechos:
+    """
+    Catálogo compilado. `clasificar(texto)` devuelve los hechos más parecidos
+    como `[{"hecho", "capitulo", "puntaje"}]`, de mayor a menor puntaje (0 a 1).
+    """
+
+    def __init__(self, catalogo=None, sinonimos=SINONIMOS):
+        self.catalogo = catalogo if catalogo is not None else leer_catalogo()
+        indice_hecho = {plegar(hecho): i for i, (hecho, _) in enumerate(self.catalogo)}
+
+        # 🔹 Cada hecho se describe por su nombre y sus sinónimos; el puntaje usa la mejor descripción
+        descripciones, self._hecho_de = [], []
+        for i, (hecho, _) in enumerate(self.catalogo):
+            descripciones.append(Counter(trigramas(hecho)))
+            self._hecho_de.append(i)
+        for hecho, frases in sinonimos.items():
+            i = indice_hecho.get(plegar(hecho))
+            if i is None:
+                continue  # 🔹 el catálogo cambió; el sinónimo deja de aplicarse
+            for frase in frases:
+                descripciones.append(Counter(trigramas(frase)))
+                self._hecho_de.append(i)
+        self._hecho_de = np.array(self._hecho_de)
+
+        vocabulario = sorted({t for d in descripciones for t in d})
+        self._columna = {t: j for j, t in enumerate(vocabulario)}
+        apariciones = Counter(t for d in descripciones for t in d)
+        self._idf = np.log(1 + len(descripciones) / np.array([apariciones[t] for t in vocabulario], dtype=np.float32))
+        matriz = np.zeros((len(descripciones), len(vocabulario)), dtype=np.float32)
+        for fila, descripcion in enumerate(descripciones):
+            for trigrama, veces in descripcion.items():
+                matriz[fila, self._columna[trigrama]] = veces
+        matriz *= self._idf
+        normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+        # 🔹 Columnas contiguas: sumar las de la consulta es lo único que se hace por texto
+        self._matriz = np.asfortranarray(matriz / np.where(normas, normas, 1))
+        self._cuadrados = self._matriz ** 2
+        self._idf_ajeno = float(np.log(1 + len(descripciones)))
+        self._clasificar = lru_cache(maxsize=100_000)(self._clasificar_texto)
+
+    def _puntajes(self, texto, relato):
+        conteo = Counter(trigramas(texto))
+        columnas = [self._columna[t] for t in conteo if t in self._columna]
+        if not columnas:
+            return None
+        if relato:
+            # 🔹 Un relato cuenta muchas cosas: se mide qué parte de cada hecho aparece en él
+            # (las filas están normalizadas, así que la suma de cuadrados va de 0 a 1)
+            return self._cuadrados[:, columnas].sum(axis=1)
+        # 🔹 Coseno con la consulta; los trigramas que no están en el catálogo también
+        # cuentan en su norma ("xyz robo" se parece menos a "Robo" que "robo")
+        pesos = np.array([conteo[t] * self._idf[self._columna[t]] for t in conteo if t in self._columna])
+        ajenos = sum(v for t, v in conteo.items() if t not in self._columna) * self._idf_ajeno
+        norma = np.sqrt((pesos ** 2).sum() + ajenos ** 2)
+        return self._matriz[:, columnas] @ pesos.astype(np.float32) / norma
+
+    def _clasificar_texto(self, texto, limite, relato):
+        puntajes = self._puntajes(texto, relato)
+        if puntajes is None:
+            return ()
+        # 🔹 Varias descripciones por hecho: se queda la mejor de cada uno
+        mejores = np.zeros(len(self.catalogo), dtype=np.float32)
+        np.maximum.at(mejores, self._hecho_de, puntajes)
+        orden = np.argsort(-mejores)[:limite]
+        return tuple((int(i), round(float(mejores[i]), 3)) for i in orden if mejores[i] > 0)
+
+    def clasificar(self, texto, limite=MAXIMO_RESULTADOS, relato=False):
+        """
+        Hechos del catálogo más parecidos a `texto`. Con `relato=True` el texto es
+        un relato (o un fragmento) y se mide qué parte del nombre de cada hecho
+        aparece en él.
+        """
+        return [{"hecho": self.catalogo[i][0], "capitulo": self.catalogo[i][1], "puntaje": puntaje}
+                for i, puntaje in self._clasificar(" ".join(tokenizar(texto)), limite, relato)]
+
+    def reclasificar(self, denuncias, minimo=PUNTAJE_MINIMO):
+        """
+        Clasifica denuncias (dicts con `id`, `otro_tipo` y opcionalmente `relato`).
+        Usa `otro_tipo`; si no llega a `minimo`, prueba con el relato (que debe
+        llegar a `PUNTAJE_MINIMO_RELATO`). Devuelve
+        `(id, otro_tipo, hecho, capitulo, puntaje, origen)` por denuncia; sin
+        coincidencia suficiente, `hecho` es "Hecho punible a determinar".
+        """
+        a_determinar = next((h for h in self.catalogo if plegar(h[0]) == "hecho punible a determinar"),
+                            ("Hecho punible a determinar", "Hecho punible a determinar"))
+        for denuncia in denuncias:
+            otro_tipo = (denuncia.get("otro_tipo") or "").strip()
+            resultado, origen = None, None
+            intentos = ((otro_tipo, False, minimo), (denuncia.get("relato") or "", True, PUNTAJE_MINIMO_RELATO))
+            for texto, es_relato, necesario in intentos:
+                candidatos = self.clasificar(texto, limite=1, relato=es_relato) if texto else []
+                if candidatos and candidatos[0]["puntaje"] >= necesario:
+                    resultado, origen = candidatos[0], "relato" if es_relato else "otro_tipo"
+                    break
+            if resultado is None:
+                yield denuncia["id"], otro_tipo, a_determinar[0], a_determinar[1], 0.0, None
+            else:
+                yield denuncia["id"], otro_tipo, resultado["hecho"], resultado["capitulo"], resultado["puntaje"], origen
+
+
+CONSULTA_OTROS = """
+SELECT id, otro_tipo, relato FROM denuncias
+WHERE estado = 'completada' AND tipo_denuncia IN %s
+ORDER BY id
+"""
+
+TABLA = """
+CREATE TABLE IF NOT EXISTS hechos_reclasificados (
+    denuncia_id INTEGER PRIMARY KEY REFERENCES denuncias(id) ON DELETE CASCADE,
+    hecho_punible VARCHAR(200) NOT NULL,
+    capitulo VARCHAR(200),
+    puntaje REAL,
+    origen VARCHAR(20),
+    actualizado TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+GUARDAR = """
+INSERT INTO hechos_reclasificados (denuncia_id, hecho_punible, capitulo, puntaje, origen)
+VALUES (%s, %s, %s, %s, %s)
+ON CONFLICT (denuncia_id) DO UPDATE SET hecho_punible = EXCLUDED.hecho_punible,
+    capitulo = EXCLUDED.capitulo, puntaje = EXCLUDED.puntaje, origen = EXCLUDED.origen,
+    actualizado = CURRENT_TIMESTAMP
+"""
+
+
+def _denuncias_otro(args):
+    """Denuncias OTRO del archivo o de PostgreSQL (y la conexión abierta, si la hay)."""
+    if args.archivo:
+        # 🔹 Las exportaciones de buscar-relato llaman `tipo_hecho` a `tipo_denuncia`
+        denuncias = [d for d in leer_exportaciones(*args.archivo)
+                     if d.get("tipo_denuncia", d.get("tipo_hecho")) in TIPOS_OTRO]
+        return denuncias, None
+    import psycopg2
+    from texto_relatos import denuncias_desde_cursor
+
+    conexion = psycopg2.connect(args.dsn)
+    with conexion.cursor() as cursor:
+        cursor.execute(CONSULTA_OTROS, (TIPOS_OTRO,))
+        return list(denuncias_desde_cursor(cursor)), conexion
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ubica las denuncias OTRO en el catálogo de hechos punibles.")
+    parser.add_argument("--catalogo", default=CATALOGO, help="hechos_punibles.txt")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("clasificar", help="Hechos más parecidos a un texto")
+    p.add_argument("texto")
+    p.add_argument("--relato", action="store_true", help="El texto es un relato o un fragmento")
+    p.add_argument("--limite", type=int, default=MAXIMO_RESULTADOS)
+    p = sub.add_parser("reclasificar", help="Clasificar todas las denuncias OTRO")
+    p.add_argument("--archivo", nargs="+", help="JSON exportados (si no, PostgreSQL)")
+    p.add_argument("--dsn", default=os.environ.get("DATABASE_URL") or os.environ.get("POSTGRES_URL"))
+    p.add_argument("--salida", help="CSV con el resultado por denuncia")
+    p.add_argument("--tabla", action="store_true", help="Guardar en hechos_reclasificados (PostgreSQL)")
+    p.add_argument("--minimo", type=float, default=PUNTAJE_MINIMO)
+    args = parser.parse_args(argv)
+
+    clasificador = ClasificadorHechos(leer_catalogo(args.catalogo))
+    if args.comando == "clasificar":
+        inicio = time.perf_counter()
+        resultados = clasificador.clasificar(args.texto, args.limite, args.relato)
+        duracion = (time.perf_counter() - inicio) * 1000
+        for r in resultados:
+            print(f"{r['puntaje']:.3f}  {r['hecho']}  ({r['capitulo']})")
+        print(f"⏱ {duracion:.2f} ms", file=sys.stderr)
+        return 0
+
+    if not args.archivo and not args.dsn:
+        print("❌ Indicar --archivo o --dsn (o DATABASE_URL)", file=sys.stderr)
+        return 1
+    if args.tabla and args.archivo:
+        print("❌ --tabla requiere leer de PostgreSQL", file=sys.stderr)
+        return 1
+    denuncias, conexion = _denuncias_otro(args)
+    try:
+        inicio = time.perf_counter()
+        filas = list(clasificador.reclasificar(denuncias, args.minimo))
+        duracion = time.perf_counter() - inicio
+        if args.salida:
+            with open(args.salida, "w", encoding="utf-8", newline="") as f:
+                escritor = csv.writer(f)
+                escritor.writerow(["id", "otro_tipo", "hecho_punible", "capitulo", "puntaje", "origen"])
+                escritor.writerows(filas)
+        if args.tabla:
+            with conexion, conexion.cursor() as cursor:
+                cursor.execute(TABLA)
+                cursor.executemany(GUARDAR, [(i, hecho, capitulo, puntaje, origen)
+                                             for i, _, hecho, capitulo, puntaje, origen in filas])
+    finally:
+        if conexion is not None:
+            conexion.close()
+
+    por_hecho = Counter(hecho for _, _, hecho, *_ in filas)
+    for hecho, cantidad in por_hecho.most_common(15):
+        print(f"{cantidad:6d}  {hecho}")
+    ubicadas = sum(1 for *_, origen in filas if origen)
+    print(f"✅ {len(filas)} denuncias OTRO en {duracion:.2f}s, {ubicadas} ubicadas en el catálogo")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""Cotizaciones del widget de Cambios Chaco (misma fuente que `/api/cotizaciones`).
+
+El HTML del widget se recorre una sola vez: un tokenizador lineal va armando
+las filas de la tabla y cada fila con moneda aporta su compra y venta. La moneda
+se reconoce por la clase del ícono (`moneda dolarUs`) o, si el diseño cambia,
+por el nombre ("Dólar Americano"). Si no aparece ninguna fila se levanta
+`ValueError`: un cambio de diseño no pasa en silencio.
+
+    python cotizaciones.py                    # descarga el widget
+    python cotizaciones.py chaco_final.html   # analiza un archivo guardado
+
+`CacheCotizaciones` sirve las cotizaciones desde memoria: mientras están
+frescas no se descarga nada; vencidas, se devuelven igual y se actualizan en
+segundo plano (stale-while-revalidate); sólo se espera la descarga si no hay
+nada guardado o lo guardado es demasiado viejo.
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future
+from datetime import datetime, timezone
+
+from texto_relatos import plegar
+
+URL = "https://www.cambioschaco.com.py/widgets/cotizacion/?lang=es"
+
+# 📌 Clase del ícono → código de moneda (las que publica `/api/cotizaciones`)
+MONEDAS = {"dolarus": "USD", "euro": "EUR", "real": "BRL", "pesoar": "ARS"}
+
+# 📌 Respaldo por nombre, por si el ícono cambia de clase (texto plegado)
+NOMBRES = {"dolar americano": "USD", "euro": "EUR", "real": "BRL", "peso argentino": "ARS"}
+
+FRESCURA = 600        # 🔹 segundos en que no se vuelve a descargar (igual que el revalidate de la ruta)
+VENCIMIENTO = 6 * 3600  # 🔹 pasado esto, lo guardado ya no se sirve
+
+_CLASE_MONEDA = re.compile(r"\bmoneda\s+([\w-]+)")
+_ETIQUETA = re.compile(r"<[^>]*>")
+_NUMERO = re.compile(r"\d[\d.,]*")
+_FECHA = re.compile(r"(\d{2})/(\d{2})/(\d{4})\s+(\d{2}):(\d{2})")
+
+
+def decodificar(contenido):
+    """
+    Texto del HTML a partir de los bytes: respeta la marca de orden (los
+    archivos guardados desde la consola de Windows están en UTF-16) y repara el
+    texto que pasó por la página de códigos 850 ("D├│lar" → "Dólar").
+    """
+    if contenido.startswith((b"\xff\xfe", b"\xfe\xff")):
+        texto = contenido.decode("utf-16")
+    elif contenido.startswith(b"\xef\xbb\xbf"):
+        texto = contenido.decode("utf-8-sig")
+    else:
+        try:
+            texto = contenido.decode("utf-8")
+        except UnicodeDecodeError:
+            texto = contenido.decode("latin-1")
+    if "├" in texto:
+        try:
+            texto = texto.encode("cp850").decode("utf-8")
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            pass
+    return texto
+
+
+def _numero(texto):
+    """ "6.370" → 6370, "4,2" → 4.2; None si la celda no tiene número."""
+    m = _NUMERO.search(texto)
+    if not m:
+        return None
+    valor = float(m.group(0).replace(".", "").replace(",", "."))
+    return int(valor) if valor.is_integer() else valor
+
+
+def analizar(html):
+    """
+    Extrae las cotizaciones del HTML del widget en una sola pasada. Devuelve
+    `{"rates": {"USD": {"compra", "venta"}, ...}, "actualizado": "2026-02-27T13:23"}`.
+    Los valores conservan los decimales ("4,2" → 4.2).
+    """
+    if isinstance(html, bytes):
+        html = decodificar(html)
+    # 🔹 Las búsquedas de etiquetas usan `str.find` sobre el texto en minúsculas:
+    # el recorrido es lineal y lo hace C, sin retroceder
+    bajo = html.lower()
+    if len(bajo) != len(html):
+        bajo = html
+    cotizaciones, actualizado = {}, None
+    posicion = bajo.find("<tr")
+    if posicion >= 0:
+        fecha = _FECHA.search(html, max(0, posicion - 4000), posicion)
+        if fecha:
+            dia, mes, anio, hora, minuto = fecha.groups()
+            actualizado = f"{anio}-{mes}-{dia}T{hora}:{minuto}"
+    while posicion >= 0:
+        fin = bajo.find("</tr", posicion)
+        if fin < 0:
+            fin = len(html)
+        celdas, celda = [], bajo.find("<td", posicion, fin)
+        while celda >= 0:
+            apertura = bajo.find(">", celda, fin) + 1
+            cierre = bajo.find("</td", apertura, fin)
+            if apertura == 0 or cierre < 0:
+                break
+            celdas.append(html[apertura:cierre])
+            celda = bajo.find("<td", cierre, fin)
+        if len(celdas) >= 3:
+            clase = _CLASE_MONEDA.search(celdas[0])
+            codigo = MONEDAS.get(clase.group(1).lower()) if clase else None
+            codigo = codigo or NOMBRES.get(" ".join(plegar(_ETIQUETA.sub("", celdas[0])).split()))
+            if codigo:
+                compra, venta = _numero(_ETIQUETA.sub("", celdas[1])), _numero(_ETIQUETA.sub("", celdas[2]))
+                if compra is not None and venta is not None:
+                    cotizaciones[codigo] = {"compra": compra, "venta": venta}
+        posicion = bajo.find("<tr", fin)
+    if not cotizaciones:
+        raise ValueError("El widget no tiene filas de cotización reconocibles (¿cambió el diseño?)")
+    return {"rates": cotizaciones, "actualizado": actualizado}
+
+
+def descargar(url=URL, timeout=10):
+    """Descarga y analiza el widget."""
+    with urllib.request.urlopen(url, timeout=timeout) as respuesta:
+        return analizar(decodificar(respuesta.read()))
+
+
+class CacheCotizaciones:
+    """
+    Cotizaciones en memoria con stale-while-revalidate.
+
+    `obtener()` devuelve `{"rates", "actualizado", "timestamp", "vencida"}`.
+    `timestamp` es el momento de la descarga. Si la actualización en segundo
+    plano falla, se sigue sirviendo lo anterior hasta `vencimiento`.
+
+    Nunca hay más de una descarga en marcha: quienes llegan mientras tanto
+    esperan esa misma descarga (o su error) en lugar de lanzar otra.
+    """
+
+    def __init__(self, fuente=descargar, frescura=FRESCURA, vencimiento=VENCIMIENTO, reloj=time.monotonic):
+        self.fuente = fuente
+        self.frescura = frescura
+        self.vencimiento = vencimiento
+        self.reloj = reloj
+        self.ultimo_error = None
+        self._valor = None
+        self._obtenido = None
+        self._lock = threading.Lock()
+        self._en_curso = None  # Future de la descarga en marcha
+
+    def _actualizar(self, futuro):
+        try:
+            valor = self.fuente()
+        except Exception as e:
+            with self._lock:
+                self.ultimo_error, self._en_curso = e, None
+            futuro.set_exception(e)
+            raise
+        valor = dict(valor, timestamp=datetime.now(timezone.utc).isoformat())
+        with self._lock:
+            self._valor, self._obtenido, self.ultimo_error = valor, self.reloj(), None
+            self._en_curso = None
+        futuro.set_result(valor)
+        return valor
+
+    def _en_segundo_plano(self, futuro):
+        try:
+            self._actualizar(futuro)
+        except Exception:
+            pass  # 🔹 queda en `ultimo_error`; se reintenta en la próxima consulta
+
+    def obtener(self):
+        """Cotizaciones guardadas si sirven; si no, descarga (y propaga el error si falla)."""
+        with self._lock:
+            valor, obtenido = self._valor, self._obtenido
+            edad = None if obtenido is None else self.reloj() - obtenido
+            if edad is not None and edad < self.frescura:
+                return dict(valor, vencida=False)
+            if edad is not None and edad < self.vencimiento:
+                if self._en_curso is None:
+                    self._en_curso = Future()
+                    threading.Thread(target=self._en_segundo_plano, args=(self._en_curso,), daemon=True).start()
+                return dict(valor, vencida=True)
+            # 🔹 Sin nada que servir: se espera la descarga en marcha o se lanza una
+            futuro, propio = self._en_curso, self._en_curso is None
+            if propio:
+                futuro = self._en_curso = Future()
+        valor = self._actualizar(futuro) if propio else futuro.result()
+        return dict(valor, vencida=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cotizaciones del widget de Cambios Chaco.")
+    parser.add_argument("archivo", nargs="?", help="HTML guardado del widget (si no, se descarga)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.archivo:
+            with open(args.archivo, "rb") as f:
+                resultado = analizar(f.read())
+        else:
+            resultado = descargar()
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
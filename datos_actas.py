@@ -0,0 +1,438 @@
+"""Carga en lote de los datos de las actas para `generar_pdf`.
+
+Cada acta necesita la denuncia, su denunciante y el supuesto autor. Pedirlos
+acta por acta son tres consultas (y, sin pool, una conexión nueva) por
+documento. Acá los ids se procesan de a lotes con dos consultas por lote:
+
+- denuncias JOIN denunciantes (`WHERE d.id = ANY(...)` / `IN (...)`);
+- supuestos_autores de todas las denuncias del lote, ordenados por id.
+
+Las conexiones salen de un pool chico (`PoolConexiones`) y, mientras se
+entregan los registros de un lote, el siguiente ya se está consultando con
+otra conexión del pool. Los registros tienen la forma que esperan
+`generar_pdf.generar_pdf` y `generar_pdf_lote.generar_lote`
+(``numero_orden``, ``denunciante``, ``datos_denuncia``), más un
+``nombre_archivo`` con el id de la denuncia: el orden sólo es único por
+oficina y año, así que un lote de varias oficinas no pisa archivos.
+
+Funciona con PostgreSQL (psycopg2) y con una base SQLite armada desde
+`lib/db/schema.sql`, útil para probar sin servidor:
+
+    python datos_actas.py base-prueba actas_prueba.sqlite --denuncias 2000
+    python datos_actas.py jsonl actas.jsonl --sqlite actas_prueba.sqlite --desde 2024-01-01
+    python datos_actas.py jsonl actas.jsonl --ids 120 121 122                       # usa DATABASE_URL
+    python datos_actas.py pdf actas_pdf/ --desde 2024-03-01 --hasta 2024-03-31 --procesos 8
+"""
+import argparse
+import json
+import os
+import queue
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+ESQUEMA = os.path.join(RAIZ, "lib", "db", "schema.sql")
+IDS_POR_LOTE = 500
+
+CONSULTA_DENUNCIAS = """
+    SELECT d.id, d.orden, d.hash, d.fecha_denuncia, d.hora_denuncia, d.fecha_hecho, d.hora_hecho,
+           d.tipo_denuncia, d.otro_tipo, d.relato, d.lugar_hecho, d.latitud, d.longitud, d.oficina,
+           d.operador_grado, d.operador_nombre, d.operador_apellido,
+           den.nombres, den.cedula, den.domicilio, den.nacionalidad, den.estado_civil, den.edad,
+           den.fecha_nacimiento, den.lugar_nacimiento, den.telefono, den.profesion
+    FROM denuncias d
+    JOIN denunciantes den ON den.id = d.denunciante_id
+    WHERE d.estado = 'completada' AND d.id {ids}
+"""
+
+CAMPOS_AUTOR = ("nombre_autor", "cedula_autor", "domicilio_autor", "nacionalidad_autor", "estado_civil_autor",
+                "edad_autor", "fecha_nacimiento_autor", "lugar_nacimiento_autor", "telefono_autor",
+                "profesion_autor")
+
+CONSULTA_AUTORES = f"""
+    SELECT denuncia_id, {", ".join(CAMPOS_AUTOR)}
+    FROM supuestos_autores
+    WHERE denuncia_id {{ids}}
+    ORDER BY denuncia_id, id
+"""
+
+# 📌 Columnas de denunciantes -> claves que lee generar_pdf.dibujar_acta
+CLAVES_DENUNCIANTE = (
+    ("nombres", "Nombres y Apellidos"),
+    ("cedula", "Cédula de Identidad"),
+    ("domicilio", "Domicilio"),
+    ("nacionalidad", "Nacionalidad"),
+    ("estado_civil", "Estado Civil"),
+    ("edad", "Edad"),
+    ("fecha_nacimiento", "Fecha de Nacimiento"),
+    ("lugar_nacimiento", "Lugar de Nacimiento"),
+    ("telefono", "Número de Teléfono"),
+    ("profesion", "Profesión"),
+)
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones DB-API de tamaño fijo y seguro entre hilos.
+
+    `fabrica` crea una conexión nueva; se abren a demanda hasta `maximo` y se
+    reutilizan. `marcador` es el parámetro posicional del driver ("%s" en
+    psycopg2, "?" en sqlite3).
+    """
+
+    def __init__(self, fabrica, maximo=4, marcador="%s"):
+        self.fabrica = fabrica
+        self.maximo = maximo
+        self.marcador = marcador
+        self._libres = queue.LifoQueue()
+        self._abiertas = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def postgres(cls, dsn, maximo=4):
+        import psycopg2
+
+        return cls(lambda: psycopg2.connect(dsn), maximo, "%s")
+
+    @classmethod
+    def sqlite(cls, ruta, maximo=4):
+        return cls(lambda: sqlite3.connect(ruta, check_same_thread=False), maximo, "?")
+
+    def _tomar(self):
+        while True:
+            try:
+                return self._libres.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                crear = self._abiertas < self.maximo
+                if crear:
+                    self._abiertas += 1
+            if crear:
+                break
+            try:
+                return self._libres.get(timeout=0.1)  # 🔹 Espera a que otro hilo devuelva una
+            except queue.Empty:
+                continue
+        try:
+            return self.fabrica()
+        except Exception:
+            with self._lock:
+                self._abiertas -= 1
+            raise
+
+    @contextmanager
+    def conexion(self):
+        """Presta una conexión; al devolverla cierra la transacción (sólo lectura)."""
+        conexion = self._tomar()
+        try:
+            yield conexion
+        except Exception:
+            # ⚠ Una conexión que falló puede quedar en estado inválido: se descarta
+            with self._lock:
+                self._abiertas -= 1
+            try:
+                conexion.close()
+            except Exception:
+                pass
+            raise
+        conexion.rollback()
+        self._libres.put(conexion)
+
+    def cerrar(self):
+        while True:
+            try:
+                self._libres.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._abiertas -= 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def _filtro_ids(marcador, ids):
+    """`= ANY(%s)` en PostgreSQL (un solo plan para cualquier lote), `IN (?, ...)` en SQLite."""
+    if marcador == "%s":
+        return "= ANY(%s)", [list(ids)]
+    return f"IN ({', '.join('?' * len(ids))})", list(ids)
+
+
+def _fecha(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, (date, datetime)):
+        return valor.strftime("%Y-%m-%d")
+    return str(valor)[:10]
+
+
+def _texto(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, (date, datetime)):
+        return _fecha(valor)
+    return str(valor)
+
+
+def _numero(valor):
+    return float(valor) if isinstance(valor, Decimal) else valor
+
+
+def registro_acta(fila, autores=()):
+    """
+    Arma el registro de un acta a partir de una fila de CONSULTA_DENUNCIAS
+    (dict) y los supuestos autores de esa denuncia. El acta nombra un solo
+    autor: el primero cargado con nombre.
+    """
+    denunciante = {clave: _texto(fila[columna]) for columna, clave in CLAVES_DENUNCIANTE}
+    denunciante["Fecha de Nacimiento"] = _fecha(fila["fecha_nacimiento"])
+    datos_denuncia = {
+        "id": fila["id"],
+        "orden": fila["orden"],
+        "hash": fila["hash"],
+        "oficina": fila["oficina"],
+        "fecha_denuncia": _fecha(fila["fecha_denuncia"]),
+        "hora_denuncia": _texto(fila["hora_denuncia"]),
+        "fecha_hecho": _fecha(fila["fecha_hecho"]),
+        "hora_hecho": _texto(fila["hora_hecho"]),
+        "tipo_denuncia": fila["tipo_denuncia"] or "",
+        "otro_tipo": fila["otro_tipo"],
+        "relato": fila["relato"] or "",
+        "lugar_hecho": _texto(fila["lugar_hecho"]),
+        "latitud": _numero(fila["latitud"]),
+        "longitud": _numero(fila["longitud"]),
+        "grado_operador": fila["operador_grado"],
+        "nombre_operador": f"{fila['operador_nombre']} {fila['operador_apellido']}".strip(),
+    }
+    autor = next((a for a in autores if a.get("nombre_autor")), None)
+    if autor:
+        for campo in CAMPOS_AUTOR:
+            if autor.get(campo) is not None:
+                valor = autor[campo]
+                datos_denuncia[campo] = _fecha(valor) if campo == "fecha_nacimiento_autor" else _texto(valor)
+    # 📌 El orden se repite entre oficinas y años: el nombre del PDF lleva también el id
+    return {"numero_orden": fila["orden"], "denunciante": denunciante, "datos_denuncia": datos_denuncia,
+            "nombre_archivo": f"acta_{fila['id']}_orden_{fila['orden']}.pdf"}
+
+
+def _filas(cursor):
+    columnas = [d[0] for d in cursor.description]
+    return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+
+def cargar_lote(pool, ids):
+    """Los registros de un lote de ids, en el orden pedido (dos consultas)."""
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return []
+    with pool.conexion() as conexion:
+        cursor = conexion.cursor()
+        filtro, valores = _filtro_ids(pool.marcador, ids)
+        cursor.execute(CONSULTA_DENUNCIAS.format(ids=filtro), valores)
+        denuncias = {fila["id"]: fila for fila in _filas(cursor)}
+        autores = {}
+        if denuncias:
+            filtro, valores = _filtro_ids(pool.marcador, list(denuncias))
+            cursor.execute(CONSULTA_AUTORES.format(ids=filtro), valores)
+            for autor in _filas(cursor):
+                autores.setdefault(autor["denuncia_id"], []).append(autor)
+        cursor.close()
+    return [registro_acta(denuncias[i], autores.get(i, ())) for i in ids if i in denuncias]
+
+
+def _lotes(ids, tamano):
+    lote = []
+    for i in ids:
+        lote.append(i)
+        if len(lote) == tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def registros_actas(pool, ids, tamano_lote=IDS_POR_LOTE, precargar=True):
+    """
+    Recorre los registros de todas las denuncias de `ids` (cualquier iterable,
+    puede ser un generador). Con `precargar` el lote siguiente se consulta en
+    otro hilo mientras se consume el actual; ids inexistentes o borradores se
+    omiten.
+    """
+    lotes = _lotes(ids, tamano_lote)
+    if not precargar:
+        for lote in lotes:
+            yield from cargar_lote(pool, lote)
+        return
+    with ThreadPoolExecutor(max_workers=1) as hilo:
+        siguiente = next(lotes, None)
+        pendiente = hilo.submit(cargar_lote, pool, siguiente) if siguiente else None
+        while pendiente is not None:
+            registros = pendiente.result()
+            siguiente = next(lotes, None)
+            pendiente = hilo.submit(cargar_lote, pool, siguiente) if siguiente else None
+            yield from registros
+
+
+def ids_de_periodo(pool, fecha_desde=None, fecha_hasta=None, oficina=None):
+    """Ids de las denuncias completadas de un período (y oficina), por fecha y orden."""
+    m = pool.marcador
+    condiciones, valores = [], []
+    if fecha_desde:
+        condiciones.append(f"AND fecha_denuncia >= {m}")
+        valores.append(fecha_desde)
+    if fecha_hasta:
+        condiciones.append(f"AND fecha_denuncia <= {m}")
+        valores.append(fecha_hasta)
+    if oficina:
+        condiciones.append(f"AND oficina = {m}")
+        valores.append(oficina)
+    with pool.conexion() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute(f"SELECT id FROM denuncias WHERE estado = 'completada' {' '.join(condiciones)} "
+                       f"ORDER BY fecha_denuncia, orden", valores)
+        ids = [fila[0] for fila in cursor.fetchall()]
+        cursor.close()
+    return ids
+
+
+# 📌 Base SQLite de prueba con el mismo esquema que PostgreSQL
+
+def esquema_sqlite(sql):
+    """Traduce `lib/db/schema.sql` a SQLite (SERIAL, BYTEA y el índice único por año)."""
+    sql = re.sub(r"\bSERIAL PRIMARY KEY\b", "INTEGER PRIMARY KEY AUTOINCREMENT", sql)
+    sql = re.sub(r"\bBYTEA\b", "BLOB", sql)
+    return re.sub(r"\(EXTRACT\(YEAR FROM (\w+)\)\)", r"(substr(\1, 1, 4))", sql)
+
+
+def crear_base_sqlite(ruta, esquema=ESQUEMA):
+    with open(esquema, encoding="utf-8") as f:
+        sql = esquema_sqlite(f.read())
+    conexion = sqlite3.connect(ruta)
+    conexion.executescript(sql)
+    return conexion
+
+
+def poblar_base_prueba(conexion, cantidad, semilla=7):
+    """Carga denuncias sintéticas (con denunciante y, a veces, autores) en una base vacía."""
+    rnd = random.Random(semilla)
+    oficinas = ["Asunción", "Ciudad del Este", "Encarnación", "Coronel Oviedo"]
+    tipos = ["Estafa", "Estafa mediante sistemas informáticos", "Amenaza", "Extorsión", "OTRO"]
+    inicio = date(2023, 7, 1)
+    ordenes = {}  # 🔹 Como en la base real: el orden se numera por oficina y año
+    c = conexion.cursor()
+    for i in range(1, cantidad + 1):
+        nacimiento = date(1950, 1, 1) + timedelta(days=rnd.randrange(20000))
+        c.execute("INSERT INTO denunciantes (nombres, cedula, tipo_documento, domicilio, nacionalidad, estado_civil,"
+                  " edad, fecha_nacimiento, lugar_nacimiento, telefono, profesion) VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                  (f"Denunciante {i}", str(1_000_000 + i), "Cédula de Identidad", f"Calle {rnd.randrange(900)}",
+                   "Paraguaya", rnd.choice(["Soltero/a", "Casado/a"]), 2024 - nacimiento.year, nacimiento.isoformat(),
+                   "Asunción", f"0981{i:06d}", "Comerciante"))
+        fecha = inicio + timedelta(days=rnd.randrange(365))
+        oficina = rnd.choice(oficinas)
+        orden = ordenes[oficina, fecha.year] = ordenes.get((oficina, fecha.year), 0) + 1
+        tipo = rnd.choice(tipos)
+        c.execute("INSERT INTO denuncias (denunciante_id, fecha_denuncia, hora_denuncia, fecha_hecho, hora_hecho,"
+                  " tipo_denuncia, otro_tipo, relato, lugar_hecho, latitud, longitud, orden, oficina, operador_grado,"
+                  " operador_nombre, operador_apellido, hash) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                  (c.lastrowid, fecha.isoformat(), f"{rnd.randrange(24):02d}:{rnd.randrange(60):02d}",
+                   (fecha - timedelta(days=rnd.randrange(30))).isoformat(), "10:00", tipo,
+                   "Sextorsión" if tipo == "OTRO" else None, f"Relato de la denuncia {i}. " * rnd.randrange(5, 40),
+                   f"Barrio {rnd.randrange(400)}", -25.3 if i % 3 == 0 else None, -57.6 if i % 3 == 0 else None,
+                   orden, oficina, "Oficial", f"Nombre{i % 50}", f"Apellido{i % 50}", f"h{i:08x}"))
+        denuncia_id = c.lastrowid
+        for j in range(rnd.choice([0, 0, 1, 2])):
+            conocido = rnd.random() < 0.5
+            c.execute("INSERT INTO supuestos_autores (denuncia_id, autor_conocido, nombre_autor, cedula_autor,"
+                      " telefono_autor) VALUES (?,?,?,?,?)",
+                      (denuncia_id, "Conocido" if conocido else "Desconocido",
+                       f"Autor {i}-{j}" if conocido else None, str(4_000_000 + i) if conocido else None,
+                       f"0991{i:06d}"))
+    conexion.commit()
+
+
+def _pool_desde_args(args):
+    if args.sqlite:
+        return PoolConexiones.sqlite(args.sqlite, args.conexiones)
+    if args.dsn:
+        return PoolConexiones.postgres(args.dsn, args.conexiones)
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Carga en lote los datos de las actas.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("base-prueba", help="Arma una base SQLite desde lib/db/schema.sql con datos sintéticos")
+    p.add_argument("ruta")
+    p.add_argument("--denuncias", type=int, default=1000)
+
+    for nombre, ayuda in (("jsonl", "Escribe los registros en JSON lines (entrada de generar_pdf_lote.py)"),
+                          ("pdf", "Genera los PDF con generar_pdf_lote")):
+        p = sub.add_parser(nombre, help=ayuda)
+        p.add_argument("salida")
+        p.add_argument("--dsn", default=os.environ.get("DATABASE_URL") or os.environ.get("POSTGRES_URL"))
+        p.add_argument("--sqlite", help="Base SQLite de prueba en lugar de PostgreSQL")
+        p.add_argument("--ids", type=int, nargs="+")
+        p.add_argument("--desde")
+        p.add_argument("--hasta")
+        p.add_argument("--oficina")
+        p.add_argument("--lote", type=int, default=IDS_POR_LOTE)
+        p.add_argument("--conexiones", type=int, default=2)
+        if nombre == "pdf":
+            p.add_argument("--procesos", type=int, default=None)
+            p.add_argument("--vista-previa", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.comando == "base-prueba":
+        if os.path.exists(args.ruta):
+            print(f"❌ {args.ruta} ya existe", file=sys.stderr)
+            return 1
+        conexion = crear_base_sqlite(args.ruta)
+        poblar_base_prueba(conexion, args.denuncias)
+        conexion.close()
+        print(f"✅ {args.denuncias} denuncias de prueba en {args.ruta}")
+        return 0
+
+    pool = _pool_desde_args(args)
+    if pool is None:
+        print("❌ Indicar --sqlite o --dsn (o DATABASE_URL)", file=sys.stderr)
+        return 1
+    inicio = time.perf_counter()
+    with pool:
+        ids = args.ids or ids_de_periodo(pool, args.desde, args.hasta, args.oficina)
+        registros = registros_actas(pool, ids, tamano_lote=args.lote)
+        total = fallidas = 0
+        if args.comando == "jsonl":
+            with open(args.salida, "w", encoding="utf-8") as f:
+                for registro in registros:
+                    f.write(json.dumps(registro, ensure_ascii=False, default=str))
+                    f.write("\n")
+                    total += 1
+        else:
+            from generar_pdf_lote import generar_lote
+
+            for resultado in generar_lote(registros, procesos=args.procesos, directorio_salida=args.salida,
+                                          vista_previa=args.vista_previa):
+                total += 1
+                if not resultado.ok:
+                    fallidas += 1
+                    print(f"⚠ Acta {resultado.numero_orden}: {resultado.error}", file=sys.stderr)
+    duracion = time.perf_counter() - inicio
+    print(f"✅ {total - fallidas}/{total} actas en {duracion:.1f}s ({total / duracion if duracion else 0:.0f}/s)")
+    return 1 if fallidas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,451 @@
+"""Extracción de entidades de los relatos: teléfonos, cuentas, montos y bancos.
+
+Los relatos traen evidencia estructurada escrita a mano: el abonado que llamó
+("abonado N°0973362591", "(0981)389.349"), las cuentas ("cuenta N° 320410664",
+"N° de cuenta 81-15230317"), los montos ("Gs. 2.000.000", "56.000.000GS") y los
+bancos, a veces con errores de tipeo ("bancoi itau"). Este módulo los extrae con
+patrones precompilados y los guarda normalizados en una base SQLite, una tabla
+por tipo de entidad, todas con el id de la denuncia:
+
+    telefonos(denuncia_id, numero, tipo, texto, posicion)
+    cuentas(denuncia_id, numero, banco, texto, posicion)
+    montos(denuncia_id, monto, moneda, texto, posicion)
+    bancos(denuncia_id, banco, texto, posicion)
+
+    python entidades_relatos.py extraer entidades.sqlite "excels/json_para_analisis/*.json"
+    python entidades_relatos.py sincronizar entidades.sqlite            # usa DATABASE_URL
+    python entidades_relatos.py sincronizar entidades.sqlite --completo  # reproceso nocturno
+
+Cada denuncia se guarda junto con su hash: las corridas incrementales sólo
+procesan las denuncias nuevas o modificadas y quitan las que ya no están
+completadas. `--completo` vacía las tablas y procesa todo el historial. El
+trabajo se reparte en lotes entre varios procesos.
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from texto_relatos import denuncias_desde_cursor, distancia_edicion, leer_exportaciones, plegar
+
+CONSULTA_DENUNCIAS = """
+    SELECT id, orden AS numero_orden, hash AS hash_denuncia, relato
+    FROM denuncias
+    WHERE estado = 'completada' AND id = ANY(%s)
+"""
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS procesadas (denuncia_id INTEGER PRIMARY KEY, numero_orden INTEGER, hash TEXT);
+CREATE TABLE IF NOT EXISTS telefonos (denuncia_id INTEGER, numero TEXT, tipo TEXT, texto TEXT, posicion INTEGER);
+CREATE TABLE IF NOT EXISTS cuentas (denuncia_id INTEGER, numero TEXT, banco TEXT, texto TEXT, posicion INTEGER);
+CREATE TABLE IF NOT EXISTS montos (denuncia_id INTEGER, monto INTEGER, moneda TEXT, texto TEXT, posicion INTEGER);
+CREATE TABLE IF NOT EXISTS bancos (denuncia_id INTEGER, banco TEXT, texto TEXT, posicion INTEGER);
+CREATE INDEX IF NOT EXISTS telefonos_numero ON telefonos (numero);
+CREATE INDEX IF NOT EXISTS telefonos_denuncia ON telefonos (denuncia_id);
+CREATE INDEX IF NOT EXISTS cuentas_numero ON cuentas (numero);
+CREATE INDEX IF NOT EXISTS cuentas_denuncia ON cuentas (denuncia_id);
+CREATE INDEX IF NOT EXISTS montos_denuncia ON montos (denuncia_id);
+CREATE INDEX IF NOT EXISTS bancos_banco ON bancos (banco);
+CREATE INDEX IF NOT EXISTS bancos_denuncia ON bancos (denuncia_id);
+"""
+
+TABLAS = ("telefonos", "cuentas", "montos", "bancos")
+
+# 📌 Entidades financieras: nombre canónico → formas en que aparecen (texto plegado).
+# "banco" dentro de una forma acepta también variantes mal tipeadas (bancoi, banko...).
+ENTIDADES = {
+    "Banco Itaú": ["itau", "banco itau"],
+    "Banco Familiar": ["banco familiar", "familiar banco"],
+    "Banco Basa": ["banco basa", "basa banco"],
+    "Ueno Bank": ["ueno"],
+    "Banco Continental": ["continental"],
+    "Visión Banco": ["vision banco", "banco vision"],
+    "Banco Sudameris": ["sudameris"],
+    "GNB Paraguay": ["gnb"],
+    "Banco Interfisa": ["interfisa"],
+    "Banco Solar": ["banco solar", "solar banco"],
+    "Banco Río": ["banco rio"],
+    "Banco Atlas": ["banco atlas", "atlas banco"],
+    "Banco Regional": ["banco regional"],
+    "Banco Nacional de Fomento": ["banco nacional de fomento", "nacional de fomento", "bnf"],
+    "Bancop": ["bancop"],
+    "Tu Financiera": ["tu financiera"],
+    "Financiera FIC": ["financiera fic"],
+    "Tigo Money": ["tigo money", "billetera tigo"],
+    "Billetera Personal": ["billetera personal", "personal pay"],
+    "Zimple": ["zimple"],
+}
+
+# 🔹 Nombre propio de cada entidad, para reconocer "banco <nombre mal escrito>"
+_NOMBRES = {
+    "itau": "Banco Itaú", "familiar": "Banco Familiar", "basa": "Banco Basa", "ueno": "Ueno Bank",
+    "continental": "Banco Continental", "vision": "Visión Banco", "sudameris": "Banco Sudameris",
+    "interfisa": "Banco Interfisa", "solar": "Banco Solar", "atlas": "Banco Atlas",
+    "regional": "Banco Regional", "fomento": "Banco Nacional de Fomento",
+}
+
+_BANCO = r"b[ae]n[ck][oi]{1,2}"
+
+
+def _patron_entidades():
+    formas = {}
+    for canonico, variantes in ENTIDADES.items():
+        for variante in variantes:
+            palabras = (_BANCO if palabra == "banco" else re.escape(palabra) for palabra in variante.split())
+            formas[r"\s+".join(palabras)] = canonico
+    # 🔹 Las formas más largas primero, para que "banco nacional de fomento" gane a "bnf"
+    ordenadas = sorted(formas, key=len, reverse=True)
+    # 🔹 Filtrar por la primera letra antes de probar las alternativas (3 veces más rápido)
+    primeras = "".join(sorted({v[0] for variantes in ENTIDADES.values() for v in variantes}))
+    patron = rf"\b(?=[{primeras}])(?:" + "|".join(f"({f})" for f in ordenadas) + r")\b"
+    return re.compile(patron), [formas[f] for f in ordenadas]
+
+
+_ENTIDAD, _CANONICO_POR_GRUPO = _patron_entidades()
+_BANCO_Y_NOMBRE = re.compile(_BANCO + r"\s+(?:de\s+la\s+|del\s+)?([a-z]{4,})\b")
+
+_TELEFONO_CONTEXTO = re.compile(
+    r"\b(?:abonados?|telefonos?|telefonicos?|celular(?:es)?|lineas?|whatsapp|movil)\b"
+    r"(?:(?!cuenta|credito|cedula|\bci\b)[^\d+]){0,30}?"
+    r"(\+\s?\d{1,3}(?:[\s.-]?\d{2,4}){2,4}|\(?\d{2,4}\)?(?:[\s.-]?\d{2,4}){0,3})"
+)
+_TELEFONO_MOVIL = re.compile(r"(?=[+0])(?<![\d.,/])((?:\+\s?595[\s-]?|0)9[6-9]\d(?:[\s.-]?\d){6})(?![\d])")
+
+_CUENTA = re.compile(
+    r"\b(?:cuentas?|cta\.?|caja\s+de\s+ahorros?)\b"
+    r"(?:(?!abonado|telefono|cedula|\bci\b|comprobante|operaci|monto|\bgs\b)[^\d]){0,40}?"
+    r"(?<![\d/:,])(\d(?:[\s.-]?\d){4,19})(?![\d/:])"
+)
+
+_CIFRA = r"(\d{1,3}(?:[.,]\d{3})+(?:,\d{1,2})?|\d+(?:,\d{1,2})?)"
+_MONEDA_ANTES = {"gs": "PYG", "guaranies": "PYG", "guaranis": "PYG", "₲": "PYG", "pyg": "PYG",
+                 "usd": "USD", "us$": "USD", "u$s": "USD", "$": "USD", "dolares": "USD"}
+_MONTO = re.compile(
+    r"(?=[gpu₲$\d])(?:(?<![a-z])(gs|guaranies|guaranis|₲|pyg|usd|us\$|u\$s|\$)\.?\s*[,:]?\s*" + _CIFRA
+    + r"|" + _CIFRA + r"\s*(gs|guaranies|guaranis|₲|usd|dolares)(?![a-z]))"
+)
+_MONEDA_DESPUES = re.compile(r"^\s*(?:gs\b|guarani)")
+
+
+@lru_cache(maxsize=4096)
+def _nombre_parecido(palabra):
+    """Entidad cuyo nombre está a un error de tipeo de `palabra` (o None)."""
+    for nombre, canonico in _NOMBRES.items():
+        if abs(len(nombre) - len(palabra)) <= 1 and distancia_edicion(nombre, palabra) <= (1 if len(nombre) < 8 else 2):
+            return canonico
+    return None
+
+
+def normalizar_telefono(texto):
+    """
+    Devuelve `(numero, tipo)`. Los celulares quedan como 09XXXXXXXX (también los
+    escritos con +595); `tipo` es "movil", "corto" (4828), "internacional" o "fijo".
+    """
+    digitos = re.sub(r"\D", "", texto)
+    if texto.lstrip().startswith("+"):
+        if digitos.startswith("595"):
+            digitos = "0" + digitos[3:]
+        else:
+            return "+" + digitos, "internacional"
+    if re.fullmatch(r"09[6-9]\d{7}", digitos):
+        return digitos, "movil"
+    if len(digitos) <= 5:
+        return digitos, "corto"
+    return digitos, "fijo"
+
+
+def normalizar_monto(cifra):
+    """Convierte "2.000.000", "11,328" o "1.170,50" en un entero (se descartan los decimales)."""
+    if re.search(r",\d{1,2}$", cifra):
+        cifra = cifra.rsplit(",", 1)[0]
+    return int(re.sub(r"\D", "", cifra))
+
+
+def _bancos(plegado, relato):
+    encontrados, ocupados = [], []
+    for m in _ENTIDAD.finditer(plegado):
+        canonico = _CANONICO_POR_GRUPO[m.lastindex - 1]
+        encontrados.append((m.start(), m.end(), canonico, relato[m.start():m.end()]))
+        ocupados.append((m.start(), m.end()))
+    for m in _BANCO_Y_NOMBRE.finditer(plegado):
+        if any(inicio < m.end() and m.start() < fin for inicio, fin in ocupados):
+            continue
+        canonico = _nombre_parecido(m.group(1))
+        if canonico:
+            encontrados.append((m.start(), m.end(), canonico, relato[m.start():m.end()]))
+    encontrados.sort()
+    return encontrados
+
+
+def _banco_de_cuenta(inicio, fin, bancos):
+    """El banco nombrado más cerca de la cuenta: hasta 60 caracteres después o 80 antes."""
+    mejor, distancia_mejor = None, None
+    for b_inicio, b_fin, canonico, _ in bancos:
+        if b_inicio >= fin:
+            distancia = b_inicio - fin
+            if distancia > 60:
+                break
+        elif b_fin <= inicio:
+            distancia = inicio - b_fin
+            if distancia > 80:
+                continue
+        else:
+            continue
+        if distancia_mejor is None or distancia < distancia_mejor:
+            mejor, distancia_mejor = canonico, distancia
+    return mejor
+
+
+def extraer_entidades(relato):
+    """
+    Extrae las entidades de un relato. Devuelve un dict con las listas
+    ``telefonos`` `(numero, tipo, texto, posicion)`, ``cuentas`` `(numero, banco,
+    texto, posicion)`, ``montos`` `(monto, moneda, texto, posicion)` y ``bancos``
+    `(banco, texto, posicion)`. `posicion` es el índice del carácter en el relato.
+    """
+    relato = relato or ""
+    plegado = plegar(relato)
+    if len(plegado) != len(relato):
+        relato = plegado  # 🔹 casefold cambió el largo (ß → ss): las posiciones son del texto plegado
+
+    bancos = _bancos(plegado, relato)
+
+    montos, ocupados = [], []
+    for m in _MONTO.finditer(plegado):
+        if m.group(1):
+            moneda, cifra = _MONEDA_ANTES[m.group(1)], m.group(2)
+        else:
+            moneda, cifra = _MONEDA_ANTES[m.group(4)], m.group(3)
+        montos.append((normalizar_monto(cifra), moneda, relato[m.start():m.end()].strip(), m.start()))
+        ocupados.append((m.start(), m.end()))
+
+    def libre(inicio, fin):
+        return not any(o_inicio < fin and inicio < o_fin for o_inicio, o_fin in ocupados)
+
+    telefonos, vistos = [], set()
+    for patron in (_TELEFONO_CONTEXTO, _TELEFONO_MOVIL):
+        for m in patron.finditer(plegado):
+            inicio, fin = m.span(1)
+            if inicio in vistos or not libre(inicio, fin) or _MONEDA_DESPUES.match(plegado[fin:fin + 12]):
+                continue
+            numero, tipo = normalizar_telefono(m.group(1))
+            if not 3 <= len(numero.lstrip("+")) <= 13:
+                continue
+            vistos.add(inicio)
+            telefonos.append((numero, tipo, relato[inicio:fin], inicio))
+            ocupados.append((inicio, fin))
+    telefonos.sort(key=lambda t: t[3])
+
+    cuentas = []
+    for m in _CUENTA.finditer(plegado):
+        inicio, fin = m.span(1)
+        if not libre(inicio, fin) or _MONEDA_DESPUES.match(plegado[fin:fin + 12]):
+            continue
+        numero = re.sub(r"\D", "", m.group(1))
+        cuentas.append((numero, _banco_de_cuenta(inicio, fin, bancos), relato[inicio:fin], inicio))
+
+    return {
+        "telefonos": telefonos,
+        "cuentas": cuentas,
+        "montos": montos,
+        "bancos": [(canonico, texto, inicio) for inicio, _, canonico, texto in bancos],
+    }
+
+
+def _extraer_lote(lote):
+    """Trabajo de cada proceso: `[(id, numero_orden, hash, entidades), ...]`."""
+    return [(d["id"], d.get("numero_orden"), d.get("hash_denuncia"), extraer_entidades(d.get("relato")))
+            for d in lote]
+
+
+def _lotes(denuncias, tamano):
+    lote = []
+    for denuncia in denuncias:
+        lote.append({clave: denuncia.get(clave) for clave in ("id", "numero_orden", "hash_denuncia", "relato")})
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def extraer_en_paralelo(denuncias, procesos=None, tamano_lote=200):
+    """
+    Extrae las entidades de un iterable de denuncias repartiendo lotes entre
+    procesos. Devuelve los resultados de a lote, en el orden de entrada, con un
+    número acotado de lotes en vuelo. Con un solo proceso no se crea el pool.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1:
+        for lote in _lotes(denuncias, tamano_lote):
+            yield _extraer_lote(lote)
+        return
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        en_vuelo = deque()
+        for lote in _lotes(denuncias, tamano_lote):
+            en_vuelo.append(pool.submit(_extraer_lote, lote))
+            if len(en_vuelo) >= procesos * 2:
+                yield en_vuelo.popleft().result()
+        while en_vuelo:
+            yield en_vuelo.popleft().result()
+
+
+class TablasEntidades:
+    """Base SQLite con las tablas de entidades y el registro de denuncias procesadas."""
+
+    def __init__(self, ruta):
+        self.conexion = sqlite3.connect(ruta)
+        self.conexion.execute("PRAGMA journal_mode = WAL")
+        self.conexion.execute("PRAGMA synchronous = NORMAL")
+        self.conexion.executescript(ESQUEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def procesadas(self):
+        """`{denuncia_id: hash}` de lo que ya está extraído."""
+        return dict(self.conexion.execute("SELECT denuncia_id, hash FROM procesadas"))
+
+    def vaciar(self):
+        with self.conexion:
+            for tabla in TABLAS + ("procesadas",):
+                self.conexion.execute(f"DELETE FROM {tabla}")
+
+    def eliminar(self, ids):
+        """Quita las entidades de esas denuncias."""
+        filas = [(i,) for i in ids]
+        with self.conexion:
+            for tabla in TABLAS:
+                self.conexion.executemany(f"DELETE FROM {tabla} WHERE denuncia_id = ?", filas)
+            self.conexion.executemany("DELETE FROM procesadas WHERE denuncia_id = ?", filas)
+
+    def guardar(self, resultados, reemplazar=True):
+        """
+        Reemplaza las entidades de las denuncias del lote (una transacción por
+        lote). Con `reemplazar=False` no se buscan filas anteriores que borrar.
+        """
+        filas = {tabla: [] for tabla in TABLAS}
+        for denuncia_id, _, _, entidades in resultados:
+            for tabla in TABLAS:
+                filas[tabla].extend((denuncia_id,) + fila for fila in entidades[tabla])
+        with self.conexion:
+            if reemplazar:
+                ids = [(r[0],) for r in resultados]
+                for tabla in TABLAS:
+                    self.conexion.executemany(f"DELETE FROM {tabla} WHERE denuncia_id = ?", ids)
+            self.conexion.executemany("INSERT INTO telefonos VALUES (?, ?, ?, ?, ?)", filas["telefonos"])
+            self.conexion.executemany("INSERT INTO cuentas VALUES (?, ?, ?, ?, ?)", filas["cuentas"])
+            self.conexion.executemany("INSERT INTO montos VALUES (?, ?, ?, ?, ?)", filas["montos"])
+            self.conexion.executemany("INSERT INTO bancos VALUES (?, ?, ?, ?)", filas["bancos"])
+            self.conexion.executemany(
+                "INSERT OR REPLACE INTO procesadas VALUES (?, ?, ?)", [r[:3] for r in resultados]
+            )
+
+    def procesar(self, denuncias, procesos=None, completo=False):
+        """
+        Extrae y guarda las entidades. Salvo con `completo`, se saltean las
+        denuncias cuyo hash no cambió desde la última corrida. Devuelve la
+        cantidad de denuncias procesadas.
+        """
+        if completo:
+            self.vaciar()
+        anteriores = self.procesadas()
+        pendientes = (
+            d for d in denuncias
+            if d.get("hash_denuncia") is None or anteriores.get(d["id"]) != d.get("hash_denuncia")
+        )
+        cantidad = 0
+        # 🔹 Con las tablas vacías se cargan sin índices y se indexa una sola vez al final
+        if not anteriores:
+            self._quitar_indices()
+        try:
+            for resultados in extraer_en_paralelo(pendientes, procesos):
+                self.guardar(resultados, reemplazar=bool(anteriores))
+                cantidad += len(resultados)
+        finally:
+            self.conexion.executescript(ESQUEMA)
+        return cantidad
+
+    def _quitar_indices(self):
+        consulta = "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        for (nombre,) in self.conexion.execute(consulta).fetchall():
+            self.conexion.execute(f"DROP INDEX {nombre}")
+
+    def sincronizar(self, conexion, procesos=None, completo=False, tamano_lote=500):
+        """
+        Pone las tablas al día con la base (PostgreSQL, estilo psycopg2): procesa
+        las denuncias completadas nuevas o con otro hash y quita las que ya no
+        están completadas. Devuelve `(procesadas, quitadas)`.
+        """
+        with conexion.cursor() as cursor:
+            cursor.execute("SELECT id, hash FROM denuncias WHERE estado = 'completada'")
+            actuales = dict(cursor.fetchall())
+        if completo:
+            self.vaciar()
+        anteriores = self.procesadas()
+        sobrantes = sorted(set(anteriores) - set(actuales))
+        if sobrantes:
+            self.eliminar(sobrantes)
+        cambiadas = sorted(i for i, h in actuales.items() if anteriores.get(i, ...) != h)
+
+        def leer():
+            for inicio in range(0, len(cambiadas), tamano_lote):
+                with conexion.cursor() as cursor:
+                    cursor.execute(CONSULTA_DENUNCIAS, (cambiadas[inicio:inicio + tamano_lote],))
+                    yield from denuncias_desde_cursor(cursor)
+
+        return self.procesar(leer(), procesos), len(sobrantes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extrae teléfonos, cuentas, montos y bancos de los relatos.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("extraer", help="Procesar exportaciones JSON")
+    p.add_argument("base", help="Archivo SQLite de salida")
+    p.add_argument("archivos", nargs="+")
+    p.add_argument("--completo", action="store_true", help="Vaciar las tablas y procesar todo")
+    p.add_argument("--procesos", type=int, default=None)
+    p = sub.add_parser("sincronizar", help="Procesar las denuncias nuevas o modificadas de PostgreSQL")
+    p.add_argument("base", help="Archivo SQLite de salida")
+    p.add_argument("--dsn", default=os.environ.get("DATABASE_URL") or os.environ.get("POSTGRES_URL"))
+    p.add_argument("--completo", action="store_true", help="Vaciar las tablas y procesar todo")
+    p.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    with TablasEntidades(args.base) as tablas:
+        if args.comando == "extraer":
+            cantidad = tablas.procesar(leer_exportaciones(*args.archivos), args.procesos, args.completo)
+            quitadas = 0
+        else:
+            if not args.dsn:
+                print("❌ Falta --dsn (o DATABASE_URL)", file=sys.stderr)
+                return 1
+            import psycopg2
+
+            conexion = psycopg2.connect(args.dsn)
+            try:
+                cantidad, quitadas = tablas.sincronizar(conexion, args.procesos, args.completo)
+            finally:
+                conexion.close()
+        totales = {t: tablas.conexion.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in TABLAS}
+
+    print(f"✅ {cantidad} denuncias procesadas, {quitadas} quitadas en {time.perf_counter() - inicio:.2f}s")
+    print("   " + ", ".join(f"{t}: {n}" for t, n in totales.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
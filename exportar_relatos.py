@@ -0,0 +1,377 @@
+"""Exportación en streaming de la búsqueda por relato (XLSX y JSON lines).
+
+La exportación del buscador arma todo el libro en memoria (ExcelJS) con las
+primeras 1000 filas. Acá las filas se leen de a lotes con un cursor del lado
+del servidor (o de los JSON exportados) y se escriben apenas llegan:
+
+- XLSX en modo sólo escritura: cada hoja es una entrada del zip que se va
+  comprimiendo fila por fila, con cadenas en línea (sin tabla de cadenas
+  compartidas que crezca con el archivo). La memoria no depende de la
+  cantidad de filas;
+- pasado el límite de filas de una hoja se abre otra ("Reporte 2", ...) y
+  pasadas `hojas_por_archivo` hojas, otro archivo (`_parte2.xlsx`);
+- JSON lines para `excels/json_para_analisis/`: una denuncia por línea, con
+  los mismos campos que devuelve `/api/denuncias/buscar-relato`.
+  `texto_relatos.leer_exportaciones` lee tanto los `.json` como los `.jsonl`.
+
+    python exportar_relatos.py xlsx busqueda_itau.xlsx --termino itau --desde 2024-01-01   # usa DATABASE_URL
+    python exportar_relatos.py jsonl excels/json_para_analisis/itau.jsonl --termino itau
+    python exportar_relatos.py xlsx todo.xlsx --archivo "excels/json_para_analisis/*.json"
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+from texto_relatos import denuncias_desde_cursor, leer_exportaciones
+
+# 📌 Las columnas del Excel del buscador (app/denuncias/buscador-relato/page.tsx)
+COLUMNAS = (
+    ("Orden", "numero_orden", 10),
+    ("Fecha", "fecha_denuncia", 15),
+    ("Denunciante", "nombre_denunciante", 30),
+    ("Cédula", "cedula_denunciante", 15),
+    ("Tipo Hecho", "tipo_hecho", 25),
+    ("Relato", "relato", 50),
+    ("Monto", "monto_dano", 15),
+    ("Moneda", "moneda", 10),
+)
+
+FILAS_POR_HOJA = 1_048_575    # 🔹 límite de Excel (1.048.576) menos el encabezado
+HOJAS_POR_ARCHIVO = 4
+LARGO_MAXIMO_CELDA = 32_767   # 🔹 lo que admite una celda de Excel
+FILAS_POR_LOTE = 2000
+
+# 📌 Misma búsqueda que /api/denuncias/buscar-relato, sin LIMIT
+CONSULTA_BUSQUEDA = """
+    SELECT d.id, d.denunciante_id, d.orden AS numero_orden, d.fecha_denuncia, d.hora_denuncia,
+           d.tipo_denuncia AS tipo_hecho, d.hash AS hash_denuncia, d.estado, d.relato,
+           den.nombres AS nombre_denunciante, den.cedula AS cedula_denunciante, d.monto_dano, d.moneda
+    FROM denuncias d
+    LEFT JOIN denunciantes den ON d.denunciante_id = den.id
+    WHERE d.estado = 'completada' {condiciones}
+    ORDER BY d.orden DESC, d.fecha_denuncia DESC, d.hora_denuncia DESC
+"""
+CAMPOS_BUSCADOS = (
+    "d.relato", "den.nombres", "den.cedula", "d.tipo_denuncia", "d.entidad_bancaria_vulnerada", "d.oficina",
+    "d.orden::text", "d.operador_nombre", "d.operador_apellido",
+)
+
+_NO_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+_TIPOS_CONTENIDO = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+{hojas}</Types>"""
+_HOJA_CONTENIDO = ('<Override PartName="/xl/worksheets/sheet{n}.xml" '
+                   'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>\n')
+_RELACIONES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+_LIBRO = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets>{hojas}</sheets>
+</workbook>"""
+_RELACIONES_LIBRO = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+{hojas}<Relationship Id="rIdEstilos" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>"""
+# 🔹 Estilo 1: encabezado en negrita con fondo gris (como exportToExcel); estilo 2: texto con ajuste de línea
+_ESTILOS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>
+<fills count="3"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill>
+<fill><patternFill patternType="solid"><fgColor rgb="FFE0E0E0"/><bgColor indexed="64"/></patternFill></fill></fills>
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>
+<xf numFmtId="0" fontId="1" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1"/>
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0" applyAlignment="1"><alignment vertical="top" wrapText="1"/></xf></cellXfs>
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>"""
+
+
+def _columna(indice):
+    """0 → "A", 25 → "Z", 26 → "AA"."""
+    letras = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _fecha_ddmmaaaa(valor):
+    """Como formatearFechaSinTimezone: '2026-02-16T00:00:00.000Z' o un date → '16/02/2026'."""
+    if isinstance(valor, (date, datetime)):
+        valor = valor.isoformat()
+    texto = str(valor or "")[:10]
+    if len(texto) == 10 and texto[4] == "-":
+        return f"{texto[8:10]}/{texto[5:7]}/{texto[:4]}"
+    return texto
+
+
+def fila_excel(denuncia):
+    """Valores de una denuncia en el orden de `COLUMNAS`, con los formatos del buscador."""
+    fila = []
+    for _, clave, _ in COLUMNAS:
+        valor = denuncia.get(clave)
+        if clave == "fecha_denuncia":
+            valor = _fecha_ddmmaaaa(valor)
+        elif clave == "tipo_hecho":
+            valor = (valor or "").upper()
+        elif clave in ("monto_dano", "numero_orden") and isinstance(valor, str) and valor.strip().isdigit():
+            valor = int(valor)
+        fila.append(valor)
+    return fila
+
+
+class LibroXlsx:
+    """
+    Escritor XLSX en streaming. `escribir(fila)` agrega una fila; las hojas y
+    los archivos se cortan solos al llegar a los límites. `archivos` lista lo
+    escrito. Se usa como context manager o se cierra con `cerrar()`.
+
+    Cada archivo se escribe con extensión `.parcial` y se renombra recién en
+    `cerrar()`: si la lectura falla a mitad de camino (el context manager llama
+    a `descartar()`), no queda un libro truncado que parezca una exportación completa.
+    """
+
+    def __init__(self, ruta, columnas=COLUMNAS, filas_por_hoja=FILAS_POR_HOJA, hojas_por_archivo=HOJAS_POR_ARCHIVO,
+                 nombre_hoja="Reporte"):
+        self.ruta = ruta
+        self.columnas = columnas
+        self.filas_por_hoja = filas_por_hoja
+        self.hojas_por_archivo = hojas_por_archivo
+        self.nombre_hoja = nombre_hoja
+        self.archivos = []
+        self.filas = 0
+        self._zip = None
+        self._hoja = None
+        self._hojas = []
+        self._filas_hoja = 0
+        self._pendiente = []
+        self._texto_relato = {i for i, (_, clave, _) in enumerate(columnas) if clave == "relato"}
+        self._letras = [_columna(i) for i in range(len(columnas))]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *exc):
+        if tipo is None:
+            self.cerrar()
+        else:
+            self.descartar()
+
+    def _abrir_archivo(self):
+        parte = len(self.archivos) + 1
+        base, extension = os.path.splitext(self.ruta)
+        ruta = self.ruta if parte == 1 else f"{base}_parte{parte}{extension or '.xlsx'}"
+        self._zip = zipfile.ZipFile(ruta + ".parcial", "w", zipfile.ZIP_DEFLATED, compresslevel=1)
+        self._hojas = []
+        self.archivos.append(ruta)
+
+    def _abrir_hoja(self):
+        if self._zip is None or len(self._hojas) == self.hojas_por_archivo:
+            self._cerrar_archivo()
+            self._abrir_archivo()
+        numero = len(self._hojas) + 1
+        total = (len(self.archivos) - 1) * self.hojas_por_archivo + numero
+        self._hojas.append(self.nombre_hoja if total == 1 else f"{self.nombre_hoja} {total}")
+        # 🔹 `force_zip64`: el tamaño de la hoja no se conoce de antemano
+        self._hoja = self._zip.open(f"xl/worksheets/sheet{numero}.xml", "w", force_zip64=True)
+        anchos = "".join(f'<col min="{i}" max="{i}" width="{ancho}" customWidth="1"/>'
+                         for i, (_, _, ancho) in enumerate(self.columnas, 1))
+        encabezado = "".join(f'<c r="{_columna(i)}1" t="inlineStr" s="1"><is><t>{escape(titulo)}</t></is></c>'
+                             for i, (titulo, _, _) in enumerate(self.columnas))
+        self._hoja.write((
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" '
+            'state="frozen"/></sheetView></sheetViews>'
+            f'<cols>{anchos}</cols><sheetData><row r="1">{encabezado}</row>'
+        ).encode("utf-8"))
+        self._filas_hoja = 0
+
+    def _vaciar(self):
+        if self._pendiente:
+            self._hoja.write("".join(self._pendiente).encode("utf-8"))
+            self._pendiente = []
+
+    def _cerrar_hoja(self):
+        if self._hoja is not None:
+            self._vaciar()
+            self._hoja.write(b"</sheetData></worksheet>")
+            self._hoja.close()
+            self._hoja = None
+
+    def _cerrar_archivo(self):
+        self._cerrar_hoja()
+        if self._zip is None:
+            return
+        hojas = self._hojas
+        self._zip.writestr("[Content_Types].xml", _TIPOS_CONTENIDO.format(
+            hojas="".join(_HOJA_CONTENIDO.format(n=n) for n in range(1, len(hojas) + 1))))
+        self._zip.writestr("_rels/.rels", _RELACIONES)
+        self._zip.writestr("xl/workbook.xml", _LIBRO.format(hojas="".join(
+            f'<sheet name="{escape(nombre)}" sheetId="{n}" r:id="rId{n}"/>' for n, nombre in enumerate(hojas, 1))))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", _RELACIONES_LIBRO.format(hojas="".join(
+            f'<Relationship Id="rId{n}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+            f'worksheet" Target="worksheets/sheet{n}.xml"/>\n' for n in range(1, len(hojas) + 1))))
+        self._zip.writestr("xl/styles.xml", _ESTILOS)
+        self._zip.close()
+        self._zip = None
+
+    def escribir(self, valores):
+        """Agrega una fila (valores en el orden de las columnas)."""
+        if self._hoja is None or self._filas_hoja == self.filas_por_hoja:
+            self._cerrar_hoja()
+            self._abrir_hoja()
+        self._filas_hoja += 1
+        self.filas += 1
+        numero = self._filas_hoja + 1
+        celdas = []
+        for i, valor in enumerate(valores):
+            if valor is None or valor == "":
+                continue
+            referencia = f"{self._letras[i]}{numero}"
+            if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                celdas.append(f'<c r="{referencia}"><v>{valor}</v></c>')
+                continue
+            texto = _NO_XML.sub("", str(valor))[:LARGO_MAXIMO_CELDA]
+            estilo = ' s="2"' if i in self._texto_relato else ""
+            celdas.append(f'<c r="{referencia}" t="inlineStr"{estilo}><is><t xml:space="preserve">'
+                          f'{escape(texto)}</t></is></c>')
+        self._pendiente.append(f'<row r="{numero}">{"".join(celdas)}</row>')
+        if len(self._pendiente) >= FILAS_POR_LOTE:
+            self._vaciar()
+
+    def cerrar(self):
+        if self._zip is None and not self.archivos:
+            self._abrir_hoja()  # 🔹 sin filas igual se entrega un libro con el encabezado
+        self._cerrar_archivo()
+        for ruta in self.archivos:
+            os.replace(ruta + ".parcial", ruta)
+
+    def descartar(self):
+        """Cierra sin terminar el libro y borra todo lo escrito."""
+        try:
+            if self._hoja is not None:
+                self._hoja.close()
+            if self._zip is not None:
+                self._zip.close()
+        except Exception:
+            pass  # 🔹 se borra igual: el archivo no se va a usar
+        self._hoja = self._zip = None
+        self._pendiente = []
+        for ruta in self.archivos:
+            if os.path.exists(ruta + ".parcial"):
+                os.remove(ruta + ".parcial")
+        self.archivos = []
+
+
+def exportar_xlsx(denuncias, ruta, **opciones):
+    """Escribe las denuncias en uno o más XLSX. Devuelve `(filas, archivos)`."""
+    with LibroXlsx(ruta, **opciones) as libro:
+        for denuncia in denuncias:
+            libro.escribir(fila_excel(denuncia))
+    return libro.filas, libro.archivos
+
+
+def exportar_jsonl(denuncias, ruta):
+    """
+    Una denuncia JSON por línea (fechas y decimales como texto). Devuelve
+    cuántas. Como en `LibroXlsx`, se escribe en `.parcial` y se renombra al final.
+    """
+    cantidad = 0
+    parcial = ruta + ".parcial"
+    try:
+        with open(parcial, "w", encoding="utf-8") as f:
+            for denuncia in denuncias:
+                f.write(json.dumps(denuncia, ensure_ascii=False, default=str))
+                f.write("\n")
+                cantidad += 1
+        os.replace(parcial, ruta)
+    except BaseException:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+        raise
+    return cantidad
+
+
+def denuncias_de_busqueda(conexion, termino=None, fecha_desde=None, fecha_hasta=None, tipo_hecho=None,
+                          tamano_lote=FILAS_POR_LOTE):
+    """
+    Recorre el resultado completo de la búsqueda con un cursor del lado del
+    servidor (psycopg2): la base entrega de a `tamano_lote` filas.
+    """
+    condiciones, valores = [], []
+    if termino and termino.strip():
+        condiciones.append("AND (" + " OR ".join(f"{campo} ILIKE %s" for campo in CAMPOS_BUSCADOS) + ")")
+        valores.extend([f"%{termino.strip()}%"] * len(CAMPOS_BUSCADOS))
+    if tipo_hecho:
+        condiciones.append("AND d.tipo_denuncia = %s")
+        valores.append(tipo_hecho)
+    if fecha_desde:
+        condiciones.append("AND d.fecha_denuncia >= %s")
+        valores.append(fecha_desde)
+    if fecha_hasta:
+        condiciones.append("AND d.fecha_denuncia <= %s")
+        valores.append(fecha_hasta)
+    with conexion.cursor(name="exportar_relatos") as cursor:
+        cursor.itersize = tamano_lote
+        cursor.execute(CONSULTA_BUSQUEDA.format(condiciones=" ".join(condiciones)), valores)
+        yield from denuncias_desde_cursor(cursor, tamano_lote)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta la búsqueda por relato a XLSX o JSON lines.")
+    parser.add_argument("formato", choices=("xlsx", "jsonl"))
+    parser.add_argument("salida")
+    parser.add_argument("--archivo", nargs="+", help="JSON/JSONL exportados (si no, PostgreSQL)")
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL") or os.environ.get("POSTGRES_URL"))
+    parser.add_argument("--termino")
+    parser.add_argument("--desde")
+    parser.add_argument("--hasta")
+    parser.add_argument("--tipo")
+    parser.add_argument("--filas-por-hoja", type=int, default=FILAS_POR_HOJA)
+    parser.add_argument("--hojas-por-archivo", type=int, default=HOJAS_POR_ARCHIVO)
+    args = parser.parse_args(argv)
+
+    conexion = None
+    if args.archivo:
+        denuncias = leer_exportaciones(*args.archivo)
+    elif args.dsn:
+        import psycopg2
+
+        conexion = psycopg2.connect(args.dsn)
+        denuncias = denuncias_de_busqueda(conexion, args.termino, args.desde, args.hasta, args.tipo)
+    else:
+        print("❌ Indicar --archivo o --dsn (o DATABASE_URL)", file=sys.stderr)
+        return 1
+
+    inicio = time.perf_counter()
+    try:
+        if args.formato == "xlsx":
+            filas, archivos = exportar_xlsx(denuncias, args.salida, filas_por_hoja=args.filas_por_hoja,
+                                            hojas_por_archivo=args.hojas_por_archivo)
+        else:
+            filas, archivos = exportar_jsonl(denuncias, args.salida), [args.salida]
+    finally:
+        if conexion is not None:
+            conexion.close()
+    print(f"✅ {filas} denuncias en {time.perf_counter() - inicio:.1f}s → {', '.join(archivos)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+"""Estampado de firmas sobre actas ya generadas (actualización incremental).
+
+Las firmas que llegan por el flujo de `denuncia_firmas` (`/api/firmas/[token]`,
+imágenes PNG en base64) se agregan al final del PDF existente como una
+actualización incremental: nuevos objetos (imágenes y contenido), una nueva
+versión de la página de firmas y una tabla xref con `/Prev`. Los bytes
+originales no se tocan, así que su hash sigue siendo válido y cualquier visor
+muestra la versión firmada.
+
+Las posiciones salen del renderizado original:
+
+    lineas = {}
+    pdf_bytes = generar_pdf(numero_orden, denunciante, datos_denuncia, lineas_firma=lineas)
+    ...
+    pdf_firmado = firmar_acta(pdf_bytes, {"denunciante": firma_base64}, lineas)
+
+o desde la línea de comandos (agrega al final del mismo archivo):
+
+    python firmas_pdf.py acta.pdf --lineas lineas.json --firma operador=op.png --firma denunciante=den.png
+"""
+import argparse
+import base64
+import hashlib
+import json
+import re
+import sys
+import zlib
+from io import BytesIO
+
+# 📌 Alto máximo de la firma sobre la línea (puntos) y cuánto puede "pisar" la línea
+ALTO_FIRMA = 50
+BAJADA_FIRMA = 4
+
+_STARTXREF = re.compile(rb"startxref\s+(\d+)\s*%%EOF\s*$")
+_SUBSECCION = re.compile(rb"\s*(\d+)\s+(\d+)[ \t]*\r?\n")
+_TRAILER = re.compile(rb"\s*trailer\s*")
+_OBJETO = re.compile(rb"(\d+)\s+(\d+)\s+obj\b")
+_REFERENCIA = rb"(\d+)\s+\d+\s+R"
+
+
+class _PDF:
+    """Lectura mínima de la estructura de un PDF con tablas xref clásicas (como las de ReportLab)."""
+
+    def __init__(self, datos):
+        self.datos = datos
+        fin = _STARTXREF.search(datos[-1024:])
+        if not fin:
+            raise ValueError("No se encontró 'startxref': el archivo no parece un PDF completo")
+        self.startxref = int(fin.group(1))
+        self.desplazamientos = {}
+        self.trailer = None
+        offset = self.startxref
+        while offset is not None:
+            trailer = self._leer_xref(offset)
+            if self.trailer is None:
+                self.trailer = trailer
+            prev = re.search(rb"/Prev\s+(\d+)", trailer)
+            offset = int(prev.group(1)) if prev else None
+
+        self.tamano = int(self._clave(self.trailer, rb"/Size\s+(\d+)"))
+        self.raiz = int(self._clave(self.trailer, rb"/Root\s+" + _REFERENCIA))
+        info = re.search(rb"/Info\s+" + _REFERENCIA, self.trailer)
+        self.info = int(info.group(1)) if info else None
+        ids = re.search(rb"/ID\s*\[\s*<([0-9A-Fa-f]*)>\s*<([0-9A-Fa-f]*)>\s*\]", self.trailer)
+        self.id_original = ids.group(1) if ids else None
+
+    @staticmethod
+    def _clave(texto, patron):
+        m = re.search(patron, texto)
+        if not m:
+            raise ValueError(f"Falta {patron!r} en el trailer")
+        return m.group(1)
+
+    def _leer_xref(self, offset):
+        datos = self.datos
+        if datos[offset:offset + 4] != b"xref":
+            raise ValueError("Sólo se admiten PDF con tablas xref clásicas")
+        pos = offset + 4
+        while True:
+            m = _SUBSECCION.match(datos, pos)
+            if not m:
+                break
+            inicio, cantidad = int(m.group(1)), int(m.group(2))
+            pos = m.end()
+            for i in range(cantidad):
+                entrada = datos[pos:pos + 20]
+                if entrada[17:18] == b"n":
+                    # 🔹 Se recorre de la actualización más nueva a la más vieja: gana la primera
+                    self.desplazamientos.setdefault(inicio + i, int(entrada[:10]))
+                pos += 20
+        m = _TRAILER.match(datos, pos)
+        if not m:
+            raise ValueError("Falta el trailer después de la tabla xref")
+        return datos[m.end():datos.index(b"startxref", m.end())]
+
+    def objeto(self, numero):
+        """Contenido (sin `obj`/`endobj`) de un objeto que no es un stream."""
+        offset = self.desplazamientos.get(numero)
+        m = _OBJETO.match(self.datos, offset) if offset is not None else None
+        if not m or int(m.group(1)) != numero:
+            raise ValueError(f"No se encontró el objeto {numero}")
+        return self.datos[m.end():self.datos.index(b"endobj", m.end())].strip()
+
+    def paginas(self, numero=None):
+        """Números de objeto de las páginas, en orden."""
+        if numero is None:
+            numero = int(self._clave(self.objeto(self.raiz), rb"/Pages\s+" + _REFERENCIA))
+        cuerpo = self.objeto(numero)
+        if re.search(rb"/Type\s*/Pages\b", cuerpo):
+            hijos = re.search(rb"/Kids\s*\[([^\]]*)\]", cuerpo)
+            for hijo in re.findall(_REFERENCIA, hijos.group(1) if hijos else b""):
+                yield from self.paginas(int(hijo))
+        else:
+            yield numero
+
+
+def _datos_imagen(firma):
+    """Acepta bytes de imagen, un data URL (`data:image/png;base64,...`) o una ruta."""
+    if isinstance(firma, str):
+        if firma.startswith("data:"):
+            return base64.b64decode(firma.split(",", 1)[1])
+        with open(firma, "rb") as f:
+            return f.read()
+    return bytes(firma)
+
+
+def _preparar_imagen(firma):
+    """Recorta los márgenes vacíos y devuelve `(ancho, alto, rgb_comprimido, alfa_comprimido)`."""
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(_datos_imagen(firma))) as original:
+        original.load()
+        transparente = original.mode in ("RGBA", "LA", "PA") or "transparency" in original.info
+        if transparente:
+            rgba = original.convert("RGBA")
+            rgb, alfa = rgba.convert("RGB"), rgba.getchannel("A")
+            caja = alfa.getbbox()
+        else:
+            # 🔹 Trazos oscuros sobre fondo claro: la tinta es opaca y el fondo no tapa la línea
+            rgb = original.convert("RGB")
+            alfa = ImageOps.invert(rgb.convert("L"))
+            caja = alfa.getbbox()
+
+    if caja is None:
+        raise ValueError("La imagen de la firma está vacía")
+    rgb, alfa = rgb.crop(caja), alfa.crop(caja)
+    return rgb.width, rgb.height, zlib.compress(rgb.tobytes()), zlib.compress(alfa.tobytes())
+
+
+def _agregar_xobjects(recursos, entradas):
+    """Inserta `entradas` (bytes `/Nombre N 0 R ...`) en el diccionario de recursos dado."""
+    xobject = re.search(rb"/XObject\s*<<", recursos)
+    if xobject:
+        return recursos[:xobject.end()] + b"\n" + entradas + b" " + recursos[xobject.end():]
+    apertura = recursos.index(b"<<")
+    return recursos[:apertura + 2] + b"\n/XObject << " + entradas + b" >> " + recursos[apertura + 2:]
+
+
+def actualizacion_firmas(pdf_bytes, firmas, lineas_firma):
+    """
+    Devuelve los bytes a agregar al final de `pdf_bytes` para estampar las
+    firmas. `firmas` es `{rol: imagen}` y `lineas_firma` el dict registrado por
+    `dibujar_acta` (`{rol: {"pagina", "x", "y", "ancho"}}`).
+    """
+    pdf = _PDF(pdf_bytes)
+    paginas = list(pdf.paginas())
+    siguiente = pdf.tamano
+    objetos = []  # (número, cuerpo en bytes)
+
+    def nuevo(cuerpo):
+        nonlocal siguiente
+        numero = siguiente
+        siguiente += 1
+        objetos.append((numero, cuerpo))
+        return numero
+
+    def stream(diccionario, contenido):
+        return diccionario[:-2] + b"/Length %d >>\nstream\n" % len(contenido) + contenido + b"\nendstream"
+
+    # 🔹 Agrupar por página: cada página se reescribe una sola vez
+    por_pagina = {}
+    for rol, firma in firmas.items():
+        if rol not in lineas_firma:
+            raise ValueError(f"No hay línea de firma registrada para '{rol}'")
+        linea = lineas_firma[rol]
+        if not 1 <= linea["pagina"] <= len(paginas):
+            raise ValueError(f"La página {linea['pagina']} no existe en el acta")
+        por_pagina.setdefault(linea["pagina"], []).append((rol, firma, linea))
+
+    for numero_pagina, estampas in por_pagina.items():
+        nombres = []
+        dibujo = []
+        for rol, firma, linea in estampas:
+            ancho_px, alto_px, rgb, alfa = _preparar_imagen(firma)
+            mascara = nuevo(stream(
+                b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+                b"/BitsPerComponent 8 /Filter /FlateDecode >>" % (ancho_px, alto_px), alfa))
+            imagen = nuevo(stream(
+                b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB "
+                b"/BitsPerComponent 8 /Filter /FlateDecode /SMask %d 0 R >>" % (ancho_px, alto_px, mascara), rgb))
+
+            nombre = b"Firma%s%d" % (rol.capitalize().encode("ascii", "replace"), imagen)
+            nombres.append(b"/%s %d 0 R" % (nombre, imagen))
+
+            # 📌 Ajustar dentro de la caja sobre la línea, centrada y apoyada en ella
+            escala = min(linea["ancho"] / ancho_px, ALTO_FIRMA / alto_px)
+            ancho, alto = ancho_px * escala, alto_px * escala
+            x = linea["x"] + (linea["ancho"] - ancho) / 2
+            y = linea["y"] - BAJADA_FIRMA
+            dibujo.append(b"q %.3f 0 0 %.3f %.3f %.3f cm /%s Do Q" % (ancho, alto, x, y, nombre))
+
+        guardar = nuevo(stream(b"<< >>", b"q"))
+        restaurar = nuevo(stream(b"<< >>", b"Q"))
+        contenido = nuevo(stream(b"<< >>", b"\n".join(dibujo)))
+
+        numero_objeto = paginas[numero_pagina - 1]
+        pagina = pdf.objeto(numero_objeto)
+
+        # 🔹 El contenido original queda entre q/Q para que su estado gráfico no afecte a las firmas
+        referencias = re.search(rb"/Contents\s*(\[[^\]]*\]|" + _REFERENCIA + rb")", pagina)
+        if not referencias:
+            raise ValueError("La página de firmas no tiene contenido")
+        anteriores = b" ".join(b"%s 0 R" % n for n in re.findall(_REFERENCIA, referencias.group(0)))
+        pagina = (pagina[:referencias.start()]
+                  + b"/Contents [ %d 0 R %s %d 0 R %d 0 R ]" % (guardar, anteriores, restaurar, contenido)
+                  + pagina[referencias.end():])
+
+        entradas = b" ".join(nombres)
+        recursos_indirectos = re.search(rb"/Resources\s+" + _REFERENCIA, pagina)
+        if recursos_indirectos:
+            numero_recursos = int(recursos_indirectos.group(1))
+            objetos.append((numero_recursos, _agregar_xobjects(pdf.objeto(numero_recursos), entradas)))
+        else:
+            recursos = re.search(rb"/Resources\s*<<", pagina)
+            if not recursos:
+                raise ValueError("La página de firmas no tiene recursos")
+            pagina = pagina[:recursos.start()] + _agregar_xobjects(pagina[recursos.start():], entradas)
+        objetos.append((numero_objeto, pagina))
+
+    return _escribir_actualizacion(pdf, objetos, siguiente)
+
+
+def _escribir_actualizacion(pdf, objetos, tamano):
+    salida = bytearray()
+    base = len(pdf.datos)
+    if not pdf.datos.endswith(b"\n"):
+        salida += b"\n"
+
+    desplazamientos = {}
+    for numero, cuerpo in objetos:
+        desplazamientos[numero] = base + len(salida)
+        salida += b"%d 0 obj\n" % numero + cuerpo + b"\nendobj\n"
+
+    # 📌 Tabla xref con subsecciones de números consecutivos
+    inicio_xref = base + len(salida)
+    salida += b"xref\n"
+    numeros = sorted(desplazamientos)
+    grupo = [numeros[0]]
+    for numero in numeros[1:] + [None]:
+        if numero is not None and numero == grupo[-1] + 1:
+            grupo.append(numero)
+            continue
+        salida += b"%d %d\n" % (grupo[0], len(grupo))
+        for n in grupo:
+            salida += b"%010d 00000 n \n" % desplazamientos[n]
+        grupo = [numero]
+
+    id_nuevo = hashlib.md5(bytes(salida)).hexdigest().encode("ascii")
+    id_original = pdf.id_original or id_nuevo
+    salida += b"trailer\n<< /Size %d /Root %d 0 R " % (tamano, pdf.raiz)
+    if pdf.info is not None:
+        salida += b"/Info %d 0 R " % pdf.info
+    salida += b"/ID [<%s><%s>] /Prev %d >>\n" % (id_original, id_nuevo, pdf.startxref)
+    salida += b"startxref\n%d\n%%%%EOF\n" % inicio_xref
+    return bytes(salida)
+
+
+def firmar_acta(pdf_bytes, firmas, lineas_firma):
+    """Devuelve el acta con las firmas agregadas (los bytes originales quedan intactos al principio)."""
+    return pdf_bytes + actualizacion_firmas(pdf_bytes, firmas, lineas_firma)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agrega firmas a un acta ya generada sin volver a renderizarla.")
+    parser.add_argument("acta", help="PDF del acta (se le agrega la actualización al final)")
+    parser.add_argument("--lineas", required=True, help="JSON con las líneas de firma registradas al renderizar")
+    parser.add_argument("--firma", action="append", required=True, metavar="ROL=IMAGEN",
+                        help="Imagen de la firma para el rol (operador o denunciante); se puede repetir")
+    parser.add_argument("--salida", help="Escribir el acta firmada en otro archivo en lugar de agregar al original")
+    args = parser.parse_args(argv)
+
+    with open(args.lineas, encoding="utf-8") as f:
+        lineas_firma = json.load(f)
+    firmas = dict(valor.split("=", 1) for valor in args.firma)
+    with open(args.acta, "rb") as f:
+        pdf_bytes = f.read()
+
+    actualizacion = actualizacion_firmas(pdf_bytes, firmas, lineas_firma)
+    if args.salida:
+        with open(args.salida, "wb") as f:
+            f.write(pdf_bytes + actualizacion)
+    else:
+        with open(args.acta, "ab") as f:
+            f.write(actualizacion)
+    print(f"✅ {len(firmas)} firma(s) agregada(s) ({len(actualizacion)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
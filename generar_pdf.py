@@ -1,113 +1,347 @@
-from reportlab.lib.pagesizes import legal  # Tamaño Oficiofrom reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import legal  # Tamaño Oficio
+from reportlab import rl_config
 from reportlab.lib import colors
-from reportlab.lib.utils import simpleSplit
 import os
 from reportlab.pdfgen import canvas
-from nueva_denuncia import conectar_db
-from reportlab.platypus import Paragraph, SimpleDocTemplate
+from reportlab.platypus import Paragraph
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.enums import TA_JUSTIFY
 from reportlab.lib.styles import ParagraphStyle
-from io import BytesIO
+from copy import copy
+from io import BufferedWriter, BytesIO, RawIOBase
+from functools import lru_cache
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from datetime import datetime
-from tkinter import messagebox
-
-# Obtener los estilos de ReportLab
-styles = getSampleStyleSheet()
-
-def generar_pdf(numero_orden, denunciante, datos_denuncia, vista_previa=False):
-    """Genera el documento PDF en memoria y devuelve sus bytes."""
-
-    # 📌 Diccionario con datos de cada oficina (solo cambia dirección, teléfono, fax y email)
-    datos_oficinas = {
-        "Asunción": {
-            "direccion": "E. V. Haedo 725 casi O’Leary",
-            "telefono": "(021) 443-159",
-            "fax": "(021) 443-126 (021) 441-111",
-            "email": "ayudantia@delitoseconomicos.gov.py"
-        },
-        "Ciudad del Este": {
-            "direccion": "Av. San Blas y Monseñor Rodríguez",
-            "telefono": "(061) 500-000",
-            "fax": "(061) 500-111",
-            "email": "cde@delitoseconomicos.gov.py"
-        },
-        "Encarnación": {
-            "direccion": "Mcal. Estigarribia y Carlos A. López",
-            "telefono": "(071) 300-000",
-            "fax": "(071) 300-111",
-            "email": "encarnacion@delitoseconomicos.gov.py"
-        },
-        # 🔹 Agregar más oficinas según sea necesario...
-    }
-
-
-    # 🔎 Depuración: Verificar valores de tipo_denuncia y otro_tipo
-
-    # año = datos_denuncia["fecha_denuncia"].split("-")[0]
-    # Crear un buffer en memoria para almacenar el PDF
-    buffer = BytesIO()
-
-    # Crear el PDF en el buffer en lugar de un archivo físico
-    c = canvas.Canvas(buffer, pagesize=legal)
-    width, height = legal  # Obtener dimensiones de la hoja
+from threading import Lock
+from types import MappingProxyType
+from time import perf_counter
+import tracemalloc
+import tempfile
+
+from metricas_pdf import Medicion, SumideroJSON, sin_tramo
+
+# 📌 Los PDF se entregan siempre como binario: sin la codificación ASCII85 de los
+#    streams (pensada para canales de 7 bits) cada documento es más chico y no se
+#    pierde tiempo re-codificando las imágenes de los logos en cada acta.
+rl_config.useA85 = 0
+
+# 📌 Tamaño a partir del cual `renderizar_desbordable` pasa el PDF de memoria a disco
+UMBRAL_DESBORDE = 4 * 1024 * 1024
+
+# 📌 Los logos viven junto a este módulo (no depender del directorio de trabajo)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 📌 Diccionario con datos de cada oficina (solo cambia dirección, teléfono, fax y email)
+DATOS_OFICINAS = {
+    "Asunción": {
+        "direccion": "E. V. Haedo 725 casi O’Leary",
+        "telefono": "(021) 443-159",
+        "fax": "(021) 443-126 (021) 441-111",
+        "email": "ayudantia@delitoseconomicos.gov.py"
+    },
+    "Ciudad del Este": {
+        "direccion": "Av. San Blas y Monseñor Rodríguez",
+        "telefono": "(061) 500-000",
+        "fax": "(061) 500-111",
+        "email": "cde@delitoseconomicos.gov.py"
+    },
+    "Encarnación": {
+        "direccion": "Mcal. Estigarribia y Carlos A. López",
+        "telefono": "(071) 300-000",
+        "fax": "(071) 300-111",
+        "email": "encarnacion@delitoseconomicos.gov.py"
+    },
+    # 🔹 Agregar más oficinas según sea necesario...
+}
+
+
+# 📌 Logos del encabezado: (archivo, x, y, caja). Las coordenadas se calculan sobre el tamaño de la hoja.
+LOGOS_ENCABEZADO = (
+    ("policianacional.png", lambda w, h: (30, h - 115), (150, 150)),
+    ("dchef.png", lambda w, h: ((w / 2) - 35, h - 75), (70, 70)),
+    ("gobiernonacional.jpg", lambda w, h: (w - 170, h - 120), (150, 150)),
+)
+
+# 📌 Resolución a la que se guardan los logos ya reducidos (suficiente para impresión)
+DPI_LOGOS = 200
+
+# 🔹 Caché de proceso: (archivo, caja) -> ImageReader ya decodificado y reducido
+_cache_logos = {}
+_lock_logos = Lock()
+
+
+def _cargar_logo(nombre, caja):
+    """
+    Devuelve el logo como `ImageReader`, decodificado una sola vez por proceso
+    y reducido al tamaño con el que realmente se imprime.
+    """
+    clave = (nombre, caja)
+    logo = _cache_logos.get(clave)
+    if logo is not None:
+        return logo
+
+    with _lock_logos:
+        logo = _cache_logos.get(clave)
+        if logo is None:
+            logo = _cache_logos[clave] = _decodificar_logo(nombre, caja)
+    return logo
+
+
+def _decodificar_logo(nombre, caja):
+    from PIL import Image
+    from reportlab.lib.utils import ImageReader
+
+    ruta = os.path.join(BASE_DIR, nombre)
+    with Image.open(ruta) as original:
+        original.load()
+        es_jpeg = original.format == "JPEG"
+        ancho_px, alto_px = original.size
+        # Mismo ajuste que preserveAspectRatio=True dentro de la caja
+        escala = min(caja[0] / ancho_px, caja[1] / alto_px)
+        destino = (max(1, round(ancho_px * escala * DPI_LOGOS / 72)), max(1, round(alto_px * escala * DPI_LOGOS / 72)))
+        if destino[0] < ancho_px:
+            imagen = original.resize(destino, Image.LANCZOS)
+        else:
+            imagen = original.copy()
+
+    if es_jpeg:
+        # 🔹 Se vuelve a codificar como JPEG para que ReportLab lo embeba tal cual (sin recomprimir)
+        datos = BytesIO()
+        imagen.convert("RGB").save(datos, format="JPEG", quality=90)
+        jpeg = datos.getvalue()
+        logo = ImageReader(BytesIO(jpeg))
+        # Cada documento lee su propia copia: un único file pointer compartido no es seguro entre hilos
+        logo.jpeg_fh = lambda: BytesIO(jpeg)
+    else:
+        logo = ImageReader(imagen)
+    logo.getRGBData()  # 🔹 Forzar la conversión ahora: después el lector sólo se consulta
+    return logo
 
-    # 📌 Rutas de los logos
-    logo_izq = "policianacional.png"
-    logo_centro = "dchef.png"
-    logo_der = "gobiernonacional.jpg"
 
-    # 📌 Tamaños individuales para cada logo
-    logo_izq_size = (150, 150)   # Tamaño para "policianacional.png"
-    logo_centro_size = (70, 70) # Tamaño para "dchef.png"
-    logo_der_size = (150, 150)     # Tamaño para "gobiernonacional.jpg"
+def precargar_recursos():
+    """Decodifica los logos por adelantado (útil al iniciar un worker)."""
+    for nombre, _, caja in LOGOS_ENCABEZADO:
+        _cargar_logo(nombre, caja)
 
-    # 🟢 Insertar los logos con sus tamaños individuales
-    c.drawImage(logo_izq, 30, height - 115, width=logo_izq_size[0], height=logo_izq_size[1], preserveAspectRatio=True, mask="auto")
 
-    c.drawImage(logo_centro, (width / 2) - (logo_centro_size[0] / 2), height - 75, width=logo_centro_size[0], height=logo_centro_size[1], preserveAspectRatio=True, mask="auto")
+def _datos_oficina(oficina, datos_oficinas):
+    """Datos de contacto de la oficina (si no se encuentra, usa Asunción por defecto)."""
+    return datos_oficinas.get(oficina, datos_oficinas["Asunción"])
 
-    c.drawImage(logo_der, width - 170, height - 120, width=logo_der_size[0], height=logo_der_size[1], preserveAspectRatio=True, mask="auto")
 
-    # 📌 Texto del encabezado
-    y_texto = height - 100  # Ajuste de altura para que el texto esté debajo de los logos
+def _nombre_forma_encabezado(oficina, primera_pagina, datos_oficinas):
+    """Nombre de la forma XObject del encabezado (debe ser un nombre PDF válido)."""
+    indice = list(datos_oficinas).index(oficina) if oficina in datos_oficinas else list(datos_oficinas).index("Asunción")
+    return f"Encabezado{indice}{'P' if primera_pagina else 'C'}"
+
+
+def _definir_forma_encabezado(c, width, height, oficina, primera_pagina, datos_oficinas):
+    """Dibuja logos y texto del encabezado dentro de una forma XObject del documento."""
+    datos = _datos_oficina(oficina, datos_oficinas)
+    # En la primera página las líneas van más juntas que en las páginas siguientes
+    salto_titulo, salto_linea, salto_separador = (13, 13, 7) if primera_pagina else (15, 15, 10)
+
+    c.beginForm(_nombre_forma_encabezado(oficina, primera_pagina, datos_oficinas))
+
+    # 🟢 Insertar los logos con sus tamaños individuales
+    for nombre, posicion, caja in LOGOS_ENCABEZADO:
+        x, y = posicion(width, height)
+        c.drawImage(_cargar_logo(nombre, caja), x, y, width=caja[0], height=caja[1], preserveAspectRatio=True, mask="auto")
 
     # 🔵 Primera línea (Negrita)
+    y_texto = height - 100  # Ajuste de altura para que el texto esté debajo de los logos
     c.setFont("Helvetica-Bold", 14)
     c.drawCentredString(width / 2, y_texto, "DIRECCIÓN CONTRA HECHOS PUNIBLES ECONÓMICOS Y FINANCIEROS")
 
     # 🔵 Segunda línea (Negrita)
-    y_texto -= 13  # Espacio entre líneas
+    y_texto -= salto_titulo
     c.setFont("Helvetica-Bold", 12)
     c.drawCentredString(width / 2, y_texto, "SALA DE DENUNCIAS")
-    # 📌 Obtener la oficina del operador desde los datos de la denuncia
-    oficina_actual = datos_denuncia["oficina"]
-
-    # 📌 Obtener los datos de la oficina actual (si no encuentra, usa Asunción por defecto)
-    datos = datos_oficinas.get(oficina_actual, datos_oficinas["Asunción"])
 
-
-    # 🔵 Tercera línea (Dirección, Teléfono y Fax) - Centrados
-    y_texto -= 13
+    # 🔵 Dirección, Teléfono y Fax - Centrados
+    y_texto -= salto_linea
     c.setFont("Helvetica", 10)
     c.drawCentredString(width / 2, y_texto, f"Dirección: {datos['direccion']}")
 
     y_texto -= 13
-    c.setFont("Helvetica", 10)
     c.drawCentredString(width / 2, y_texto, f"Teléfono: {datos['telefono']}   Fax: {datos['fax']}")
 
-    # 🔵 Cuarta línea (Email) - Centrado
+    # 🔵 Email - Centrado
     y_texto -= 13
-    c.setFont("Helvetica", 10)
     c.drawCentredString(width / 2, y_texto, f"E-mail: {datos['email']}")
 
+    # 🔵 Línea separadora debajo del encabezado
+    y_texto -= salto_separador
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(1)
+    c.line(50, y_texto, width - 50, y_texto)
+
+    c.endForm()
+    return y_texto
+
+
+def dibujar_encabezado(c, width, height, oficina, primera_pagina=True, datos_oficinas=DATOS_OFICINAS):
+    """
+    Dibuja el encabezado de la oficina referenciando su forma XObject (se define
+    una sola vez por documento) y devuelve la posición `y` de la línea separadora.
+    """
+    nombre = _nombre_forma_encabezado(oficina, primera_pagina, datos_oficinas)
+    formas = c.__dict__.setdefault("_formas_encabezado", {})
+    if nombre not in formas:
+        formas[nombre] = _definir_forma_encabezado(c, width, height, oficina, primera_pagina, datos_oficinas)
+    c.doForm(nombre)
+    return formas[nombre]
+
+
+# 🔹 Caché de anchos de palabra: los relatos repiten mucho vocabulario y
+#    `stringWidth` recorre la cadena glifo por glifo en cada llamada.
+@lru_cache(maxsize=65536)
+def _ancho_palabra(palabra, fuente, tamano):
+    return stringWidth(palabra, fuente, tamano)
+
+
+def maquetar_relato(texto, fuente, tamano, ancho):
+    """
+    Parte el relato en líneas que caben en `ancho`, en una sola pasada.
+
+    Respeta los saltos de línea del texto original. Devuelve una lista de
+    `(palabras, ancho_natural, fin_de_parrafo)`; las líneas que no cierran
+    párrafo se imprimen justificadas.
+    """
+    lineas = []
+    for parrafo in texto.split("\n"):
+        lineas.extend(_maquetar_parrafo(parrafo, fuente, tamano, ancho))
+    return lineas
+
+
+# 🔹 Cada párrafo se maqueta una vez: al editar un relato largo (vista previa)
+#    sólo se vuelve a partir el párrafo que cambió.
+@lru_cache(maxsize=2048)
+def _maquetar_parrafo(parrafo, fuente, tamano, ancho):
+    espacio = _ancho_palabra(" ", fuente, tamano)
+    lineas = []
+    actual = []
+    ancho_actual = 0.0
+    for palabra in parrafo.split():
+        ancho_palabra = _ancho_palabra(palabra, fuente, tamano)
+        if actual and ancho_actual + espacio + ancho_palabra > ancho:
+            lineas.append((tuple(actual), ancho_actual, False))
+            actual = [palabra]
+            ancho_actual = ancho_palabra
+        elif actual:
+            actual.append(palabra)
+            ancho_actual += espacio + ancho_palabra
+        else:
+            actual = [palabra]
+            ancho_actual = ancho_palabra
+    lineas.append((tuple(actual), ancho_actual, True))
+    return tuple(lineas)
+
+
+def dibujar_lineas(c, lineas, x, y_superior, ancho, fuente, tamano, interlineado):
+    """Dibuja un bloque de líneas ya maquetadas con un único objeto de texto."""
+    texto = c.beginText(x, y_superior - tamano)
+    texto.setFont(fuente, tamano, interlineado)
+    texto.setFillColor(colors.black)
+    for palabras, ancho_natural, fin_de_parrafo in lineas:
+        if fin_de_parrafo or len(palabras) < 2:
+            texto.textLine(" ".join(palabras))
+        else:
+            # 🔹 Justificado: el espacio sobrante se reparte entre las palabras
+            texto.setWordSpace((ancho - ancho_natural) / (len(palabras) - 1))
+            texto.textLine(" ".join(palabras))
+            texto.setWordSpace(0)
+    c.drawText(texto)
+
+@lru_cache(maxsize=256)
+def matriz_qr(datos_qr):
+    """
+    Codifica el contenido del QR y devuelve sus módulos oscuros como tramos por
+    fila: `(lado, ((fila, columna_inicial, largo), ...))`, con el borde incluido.
+
+    Se memoriza por contenido, así las reimpresiones y vistas previas de la
+    misma denuncia no vuelven a codificar el QR.
+    """
+    import qrcode  # Generar el código QR
 
+    # Mismos parámetros que `qrcode.make` (corrección M, borde de 4 módulos)
+    qr = qrcode.QRCode(border=4)
+    qr.add_data(datos_qr)
+    qr.make(fit=True)
+    matriz = qr.get_matrix()
+
+    tramos = []
+    for fila, modulos in enumerate(matriz):
+        columna = 0
+        while columna < len(modulos):
+            if modulos[columna]:
+                inicio = columna
+                while columna < len(modulos) and modulos[columna]:
+                    columna += 1
+                tramos.append((fila, inicio, columna - inicio))
+            else:
+                columna += 1
+    return len(matriz), tuple(tramos)
 
-    # 🔵 Línea separadora debajo del encabezado
-    y_texto -= 7  # Ajusta la posición de la línea
-    c.setStrokeColor(colors.black)  # Color negro
-    c.setLineWidth(1)  # Grosor de la línea
-    c.line(50, y_texto, width - 50, y_texto)  # Dibuja la línea de extremo a extremo
+
+def dibujar_qr(c, datos_qr, x, y, lado):
+    """Dibuja el QR con rectángulos vectoriales en el cuadrado (x, y, lado)."""
+    modulos, tramos = matriz_qr(datos_qr)
+    escala = lado / modulos
+
+    trazo = c.beginPath()
+    for fila, columna, largo in tramos:
+        # Las filas de la matriz van de arriba hacia abajo; en el PDF y crece hacia arriba
+        trazo.rect(x + columna * escala, y + lado - (fila + 1) * escala, largo * escala, escala)
+
+    c.saveState()
+    c.setFillColor(colors.black)
+    c.drawPath(trazo, stroke=0, fill=1)
+    c.restoreState()
+
+
+class _LimiteDePaginas(Exception):
+    """Se alcanzó `max_paginas`: el resto del acta no se dibuja."""
+
+
+def _parrafo_maquetado(texto, estilo, ancho, alto, maquetas=None):
+    """
+    Devuelve `(parrafo, alto)` ya envuelto al ancho indicado. Con `maquetas`
+    (ver `cache_vista_previa.CacheLRU`) se reutiliza el mismo maquetado entre renderizados.
+    """
+    def construir():
+        parrafo = Paragraph(texto, estilo)
+        _, alto_parrafo = parrafo.wrap(ancho, alto)
+        return parrafo, alto_parrafo
+
+    if maquetas is None:
+        return construir()
+    parrafo, alto_parrafo = maquetas.obtener(("parrafo", estilo.name, texto, ancho), construir)
+    return copy(parrafo), alto_parrafo  # 🔹 `drawOn` guarda el canvas en el objeto: cada uso con su copia
+
+
+def dibujar_acta(c, estilos, datos_oficinas, numero_orden, denunciante, datos_denuncia, vista_previa=False,
+                 maquetas=None, max_paginas=None, medicion=None, lineas_firma=None):
+    """
+    Dibuja el acta completa sobre el canvas `c` (a partir de su página actual)
+    sin llamar a `save()`. No modifica `estilos` ni `datos_oficinas`.
+
+    `maquetas` permite reutilizar los párrafos ya maquetados entre renderizados
+    y `max_paginas` corta el acta al llegar a esa cantidad de páginas (por
+    ejemplo, 1 para el panel de vista previa). Con `medicion`
+    (ver `metricas_pdf.Medicion`) se registran los tiempos de cada tramo.
+
+    Si se pasa un dict en `lineas_firma`, se completa con la posición de las
+    líneas de firma (`"operador"` y `"denunciante"`: página, x, y, ancho) para
+    estampar las firmas después sin volver a renderizar (ver `firmas_pdf`).
+    """
+    width, height = legal  # Obtener dimensiones de la hoja
+    paginas = 1
+    tramo = medicion.tramo if medicion is not None else sin_tramo
+
+    # 📌 Encabezado con logos y datos de la oficina del operador
+    with tramo("encabezado"):
+        y_texto = dibujar_encabezado(c, width, height, datos_denuncia["oficina"], primera_pagina=True, datos_oficinas=datos_oficinas)
 
     # 🔵 Espacio antes del título
     y_texto -= 20  # Baja un poco más después del encabezado
@@ -126,12 +360,6 @@ def generar_pdf(numero_orden, denunciante, datos_denuncia, vista_previa=False):
     # 🔹 Espacio antes del aviso legal
     y_texto -= 40  # Ajustar para que el texto quede justo debajo del título
 
-    # 🔹 Configurar estilo del aviso legal
-    style_aviso = styles["Normal"]
-    style_aviso.alignment = TA_JUSTIFY  # Justificado
-    style_aviso.fontSize = 8  # Tamaño de fuente más pequeño que el cuerpo
-    style_aviso.leading = 15  # Espaciado entre líneas
-
     # 🔹 Aviso legal debajo del título (en cursiva y dentro de un recuadro)
     aviso_legal = """LA PRESENTE ACTA SE REALIZA CONFORME A LOS SIGUIENTES: ARTÍCULO 284. “DENUNCIA”,
     ARTÍCULO 285. “FORMA Y CONTENIDO”, ARTÍCULO 289. “DENUNCIA ANTE LA POLICÍA” DE LA LEY 1286/98 "CODIGO PROCESAL PENAL"."""
@@ -149,18 +377,15 @@ def generar_pdf(numero_orden, denunciante, datos_denuncia, vista_previa=False):
     c.setFillColor(colors.black)  # Texto en negro
 
     # 🔹 Dibujar el texto dentro del recuadro
-    parrafo_aviso = Paragraph(aviso_legal, styles["Italic"])  # 🟢 Aplicamos el estilo cursiva
-    w_aviso, h_aviso = parrafo_aviso.wrap(width - 110, height)  # Ajustar al ancho
-    parrafo_aviso.drawOn(c, 55, y_texto)  # Dibujar texto dentro del rectángulo
+    with tramo("parrafos"):
+        parrafo_aviso, h_aviso = _parrafo_maquetado(aviso_legal, estilos.aviso, width - 110, height, maquetas)  # 🟢 Estilo cursiva, ajustado al ancho
+        parrafo_aviso.drawOn(c, 55, y_texto)  # Dibujar texto dentro del rectángulo
 
     # 🔹 Ajustar la posición para el siguiente contenido
     y_texto -= 30  # Espacio después del aviso
 
-    # 🔹 Configurar el estilo del texto
-    style_cuerpo = styles["Normal"]
-    style_cuerpo.alignment = TA_JUSTIFY  # Justificado
-    style_cuerpo.fontSize = 12  # Tamaño de fuente
-    style_cuerpo.leading = 15  # Espaciado entre líneas
+    # 🔹 Estilo del texto (justificado, 12 pt)
+    style_cuerpo = estilos.cuerpo
     # 📌 POSICIÓN FIJA DEL PRIMER PÁRRAFO
     y_fijo_parrafo_1 = 780
 
@@ -180,14 +405,12 @@ def generar_pdf(numero_orden, denunciante, datos_denuncia, vista_previa=False):
 
     )
 
-    # 📌 Convertir en `Paragraph`
-    parrafo = Paragraph(texto_cuerpo, style_cuerpo)
-
-    # 🔹 Primero calculamos la altura del párrafo ANTES de dibujarlo
-    w, h = parrafo.wrap(width - 100, height)
+    # 📌 Convertir en `Paragraph` y calcular la altura ANTES de dibujarlo
+    with tramo("parrafos"):
+        parrafo, h = _parrafo_maquetado(texto_cuerpo, style_cuerpo, width - 100, height, maquetas)
 
-    # 🔹 Ajustamos la posición para que SIEMPRE EMPIECE EN `y_fijo_parrafo_1`
-    parrafo.drawOn(c, 50, y_fijo_parrafo_1 - h)  # 📌 Fijo arriba, expande hacia abajo
+        # 🔹 Ajustamos la posición para que SIEMPRE EMPIECE EN `y_fijo_parrafo_1`
+        parrafo.drawOn(c, 50, y_fijo_parrafo_1 - h)  # 📌 Fijo arriba, expande hacia abajo
 
     # 🔹 Definir la posición FIJA del segundo párrafo (NO SE MOVERÁ)
     y_fijo_parrafo_2 = y_fijo_parrafo_1 - h - 5  # 📌 Ajustamos según el diseño
@@ -242,14 +465,12 @@ def generar_pdf(numero_orden, denunciante, datos_denuncia, vista_previa=False):
         texto_cuerpo_2 += "siendo el supuesto autor una persona <b>DESCONOCIDA</b> por la persona denunciante."
 
 
-    # 🟢 Convertir el segundo párrafo en un `Paragraph`
-    parrafo_2 = Paragraph(texto_cuerpo_2, style_cuerpo)
+    # 🟢 Convertir el segundo párrafo en un `Paragraph` y calcular su altura
+    with tramo("parrafos"):
+        parrafo_2, h2 = _parrafo_maquetado(texto_cuerpo_2, style_cuerpo, width - 100, height, maquetas)
 
-    # 🔵 Primero calculamos la altura del segundo párrafo
-    w2, h2 = parrafo_2.wrap(width - 100, height)
-
-    # 🔵 Dibujar el segundo párrafo en la posición FIJA, expandiendo hacia abajo
-    parrafo_2.drawOn(c, 50, y_fijo_parrafo_2 - h2)  # 📌 Fijo arriba, expande hacia abajo
+        # 🔵 Dibujar el segundo párrafo en la posición FIJA, expandiendo hacia abajo
+        parrafo_2.drawOn(c, 50, y_fijo_parrafo_2 - h2)  # 📌 Fijo arriba, expande hacia abajo
 
     # 🔹 Ajustar `y_texto` para el siguiente contenido
     y_texto = y_fijo_parrafo_2 - h2 - 5  # 🔹 Se reduce para lo que venga después
@@ -257,63 +478,26 @@ def generar_pdf(numero_orden, denunciante, datos_denuncia, vista_previa=False):
 
 
 
-    from reportlab.platypus import Frame, PageBreak
-
     def agregar_encabezado(c, width, height, datos):
         """Dibuja el encabezado en cada nueva página con datos dinámicos de oficina y devuelve la nueva posición de y_texto."""
         # 📌 Obtener la oficina del operador desde los datos de la denuncia
         oficina_actual = datos_denuncia.get("oficina", "Asunción")  # Asegurar un valor por defecto
 
-        # 📌 Obtener los datos de la oficina actual (si no encuentra, usa Asunción por defecto)
-        datos = datos_oficinas.get(oficina_actual, datos_oficinas["Asunción"])
-
-        # 🔹 Asegurarse de que datos no es None
-        if datos is None:
-            print(f"⚠ ERROR: No se encontraron datos para la oficina '{oficina_actual}', usando Asunción.")
-            datos = datos_oficinas["Asunción"]
-        # 📌 Rutas de los logos
-        logo_izq = "policianacional.png"
-        logo_centro = "dchef.png"
-        logo_der = "gobiernonacional.jpg"
-
-        # 📌 Tamaños individuales para cada logo
-        logo_izq_size = (150, 150)
-        logo_centro_size = (70, 70)
-        logo_der_size = (150, 150)
-
-        # 🔵 Dibujar logos en la nueva página
-        c.drawImage(logo_izq, 30, height - 115, width=logo_izq_size[0], height=logo_izq_size[1], preserveAspectRatio=True, mask="auto")
-        c.drawImage(logo_centro, (width / 2) - (logo_centro_size[0] / 2), height - 75, width=logo_centro_size[0], height=logo_centro_size[1], preserveAspectRatio=True, mask="auto")
-        c.drawImage(logo_der, width - 170, height - 120, width=logo_der_size[0], height=logo_der_size[1], preserveAspectRatio=True, mask="auto")
-
-        # 🔵 Primera línea (Negrita)
-        y_texto = height - 100  # 🔄 Ajuste más grande para evitar solapamientos
-        c.setFont("Helvetica-Bold", 14)
-        c.drawCentredString(width / 2, y_texto, "DIRECCIÓN CONTRA HECHOS PUNIBLES ECONÓMICOS Y FINANCIEROS")
-
-        # 🔵 Segunda línea (Negrita)
-        y_texto -= 15
-        c.setFont("Helvetica-Bold", 12)
-        c.drawCentredString(width / 2, y_texto, "SALA DE DENUNCIAS")
-
-        # 🔵 Datos de contacto
-        y_texto -= 15
-        c.setFont("Helvetica", 10)
-        c.drawCentredString(width / 2, y_texto, f"Dirección: {datos['direccion']}")
-
-        y_texto -= 13
-        c.drawCentredString(width / 2, y_texto, f"Teléfono: {datos['telefono']}   Fax: {datos['fax']}")
+        # 🔵 Logos, datos de contacto y línea separadora (forma ya definida en el documento)
+        with tramo("encabezado"):
+            y_texto = dibujar_encabezado(c, width, height, oficina_actual, primera_pagina=False, datos_oficinas=datos_oficinas)
 
-        y_texto -= 13
-        c.drawCentredString(width / 2, y_texto, f"E-mail: {datos['email']}")
+        return y_texto - 10  # 🔄 Ajuste extra para evitar solapamientos
 
-        # 🔵 Línea separadora
-        y_texto -= 10
-        c.setStrokeColor(colors.black)
-        c.setLineWidth(1)
-        c.line(50, y_texto, width - 50, y_texto)
 
-        return y_texto - 10  # 🔄 Ajuste extra para evitar solapamientos
+    def nueva_pagina():
+        """Cierra la página actual y abre otra con encabezado, respetando `max_paginas`."""
+        nonlocal paginas
+        if max_paginas is not None and paginas >= max_paginas:
+            raise _LimiteDePaginas()
+        c.showPage()  # 🔄 Generar nueva página
+        paginas += 1
+        return agregar_encabezado(c, width, height, datos_denuncia)
 
 
 
@@ -323,35 +507,34 @@ def generar_pdf(numero_orden, denunciante, datos_denuncia, vista_previa=False):
         y devuelve la nueva posición `y_texto`.
         """
         if y_actual - altura_requerida < 50:  # 🔹 Si el texto no cabe...
-            c.showPage()  # 🔄 Generar nueva página
-            return agregar_encabezado(c, width, height, datos)  # ✅ Ahora actualiza y_texto correctamente
+            return nueva_pagina()  # ✅ Ahora actualiza y_texto correctamente
         return y_actual  # Si hay espacio, continuar normalmente
 
 
-    from reportlab.lib.utils import simpleSplit
-
     def agregar_relato(c, texto_relato, style_relato, width, height, y_inicial, datos):
         """
-        Agrega el relato al PDF, dividiéndolo en fragmentos que caben en cada página
-        y manteniendo el formato justificado.
+        Agrega el relato al PDF: se maqueta una sola vez y se dibuja en bloques
+        que caben en cada página, manteniendo el formato justificado.
         """
-        # 📌 Dividir el texto en líneas que caben en el ancho disponible
-        lineas = simpleSplit(texto_relato, style_relato.fontName, style_relato.fontSize, width - 100)
+        fuente, tamano, interlineado = style_relato.fontName, style_relato.fontSize, style_relato.leading
+        with tramo("maquetado_relato"):
+            lineas = maquetar_relato(texto_relato, fuente, tamano, width - 100)
+        if medicion is not None:
+            medicion.lineas_relato = len(lineas)
         y_actual = y_inicial  # Posición inicial en la página
 
-        for linea in lineas:
-            # Crear un Paragraph para la línea actual
-            parrafo_linea = Paragraph(linea, style_relato)
-            _, h_linea = parrafo_linea.wrap(width - 100, height)
-
-            # 📌 Verificar si hay espacio antes de dibujar la línea
-            if y_actual - h_linea < 30:  # 🔹 Se ajusta un margen mayor
-                c.showPage()  # 🔄 Nueva página
-                y_actual = agregar_encabezado(c, width, height, datos) + 5  # 🔄 Mayor reserva de espacio
+        inicio = 0
+        while inicio < len(lineas):
+            # 📌 Cuántas líneas entran antes del margen inferior de 30
+            caben = int((y_actual - 30) // interlineado)
+            if caben <= 0:
+                y_actual = nueva_pagina() + 5  # 🔄 Nueva página, con mayor reserva de espacio
+                continue
 
-            # Dibujar la línea en la página actual
-            parrafo_linea.drawOn(c, 50, y_actual - h_linea)
-            y_actual -= h_linea  # Ajustar la posición para la siguiente línea
+            bloque = lineas[inicio:inicio + caben]
+            dibujar_lineas(c, bloque, 50, y_actual, width - 100, fuente, tamano, interlineado)
+            y_actual -= len(bloque) * interlineado
+            inicio += len(bloque)
 
         return y_actual  # 🔹 Retornar la nueva posición de Y
 
@@ -370,22 +553,17 @@ def generar_pdf(numero_orden, denunciante, datos_denuncia, vista_previa=False):
 
 
     # 📌 **Estilos del Relato**
-    style_relato = ParagraphStyle(
-        'Relato',
-        fontName='Helvetica-Oblique',  # 🔹 Fuente cursiva
-        fontSize=12,
-        leading=15,
-        alignment=TA_JUSTIFY  # 🔹 Texto justificado
-    )
+    style_relato = estilos.relato
 
     # 📌 **Agregar el relato**
-    y_texto = agregar_relato(c, texto_relato, style_relato, width, height, y_texto, datos_denuncia)
-
+    try:
+        with tramo("relato"):
+            y_texto = agregar_relato(c, texto_relato, style_relato, width, height, y_texto, datos_denuncia)
+    except _LimiteDePaginas:
+        if medicion is not None:
+            medicion.paginas += paginas
+        return y_texto
 
-    import qrcode  # Generar el código QR
-    from reportlab.lib.utils import ImageReader
-    from reportlab.pdfbase.pdfmetrics import stringWidth
-    import os  # Necesario para verificar la existencia del archivo QR
 
     def agregar_firmas_y_qr(c, width, height, y_texto, datos_denuncia, denunciante):
         """
@@ -399,8 +577,7 @@ def generar_pdf(numero_orden, denunciante, datos_denuncia, vista_previa=False):
 
         # 📌 Verificar si hay suficiente espacio en la página actual
         if y_texto - espacio_firmas < 120:
-            c.showPage()  # 🔄 Generar nueva página
-            agregar_encabezado(c, width, height, datos)
+            nueva_pagina()
             y_texto = height - 150  # 🔄 Reiniciar la posición en la nueva página
 
         # 📌 Coordenadas de la firma del interviniente (lado izquierdo)
@@ -414,6 +591,12 @@ def generar_pdf(numero_orden, denunciante, datos_denuncia, vista_previa=False):
         # 📌 Coordenadas de la firma del denunciante (lado derecho)
         x_firma_denunciante = width - margen_x - espacio_firma
 
+        # 📌 Registrar dónde quedan las líneas de firma (mismos roles que `denuncia_firmas`)
+        if lineas_firma is not None:
+            pagina = c.getPageNumber()
+            lineas_firma["operador"] = {"pagina": pagina, "x": x_firma_interviniente, "y": y_firma + 40, "ancho": espacio_firma}
+            lineas_firma["denunciante"] = {"pagina": pagina, "x": x_firma_denunciante, "y": y_firma + 40, "ancho": espacio_firma}
+
         # 🟢 Generar el código QR
         # 🟢 Generar contenido para el código QR
         if vista_previa:
@@ -440,22 +623,14 @@ def generar_pdf(numero_orden, denunciante, datos_denuncia, vista_previa=False):
 
             hash_qr = datos_denuncia["hash"]
 
-        # 🟢 Generar el código QR
-        qr = qrcode.make(datos_qr)
-
-        # 📌 Convertir el QR en una imagen de bytes para ReportLab
-        qr_buffer = BytesIO()
-        qr.save(qr_buffer, format="PNG")
-        qr_buffer.seek(0)
-        qr_image = ImageReader(qr_buffer)
-
         # 📌 Dibujar el Hash encima del Código QR
         c.setFont("Helvetica-Bold", 8)  # Fuente en negrita y tamaño 10
         c.drawCentredString(x_qr + (espacio_qr / 2), y_qr + espacio_qr + 5, hash_qr)  # Centrado sobre el QR
 
 
-        # 🟢 Dibujar el QR en el PDF directamente desde la memoria
-        c.drawImage(qr_image, x_qr, y_qr, width=espacio_qr, height=espacio_qr)
+        # 🟢 Dibujar el QR como vector (sin pasar por PNG)
+        with tramo("qr"):
+            dibujar_qr(c, datos_qr, x_qr, y_qr, espacio_qr)
 
         # 🟢 Dibujar línea para la firma del interviniente
         c.line(x_firma_interviniente, y_firma + 40, x_firma_interviniente + espacio_firma, y_firma + 40)
@@ -490,13 +665,240 @@ def generar_pdf(numero_orden, denunciante, datos_denuncia, vista_previa=False):
         return y_firma - 50  # 🔹 Retornar nueva posición Y para el siguiente contenido
 
     # 📌 Llamar a la función después del relato
-    y_texto = agregar_firmas_y_qr(c, width, height, y_texto, datos_denuncia, denunciante)
+    try:
+        with tramo("firmas_qr"):
+            y_texto = agregar_firmas_y_qr(c, width, height, y_texto, datos_denuncia, denunciante)
+    except _LimiteDePaginas:
+        pass
+
+    if medicion is not None:
+        medicion.paginas += paginas
+
+    return y_texto
+
+
+class _EstiloFijo(ParagraphStyle):
+    """`ParagraphStyle` que no admite cambios una vez construido (sin `parent`: se copian los valores)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        object.__setattr__(self, "_fijo", True)
+
+    def __setattr__(self, nombre, valor):
+        if self.__dict__.get("_fijo"):
+            raise AttributeError(f"El estilo '{self.name}' es inmutable; crear uno nuevo en lugar de modificarlo")
+        super().__setattr__(nombre, valor)
+
+
+def _valores_estilo(estilo):
+    return {atributo: getattr(estilo, atributo) for atributo in ParagraphStyle.defaults}
+
+
+class EstilosActa:
+    """Estilos compilados del acta. Cada renderizador tiene los suyos y nunca se modifican."""
+
+    def __init__(self):
+        base = getSampleStyleSheet()  # 🔹 Hoja propia: nunca se toca la compartida
+        self.aviso = _EstiloFijo("Aviso", **_valores_estilo(base["Italic"]))
+        self.cuerpo = _EstiloFijo("Cuerpo", **dict(_valores_estilo(base["Normal"]), alignment=TA_JUSTIFY, fontSize=12, leading=15))
+        self.relato = _EstiloFijo(
+            "Relato",
+            fontName="Helvetica-Oblique",  # 🔹 Fuente cursiva
+            fontSize=12,
+            leading=15,
+            alignment=TA_JUSTIFY,  # 🔹 Texto justificado
+        )
+
+
+class RenderizadorActas:
+    """
+    Renderizador reentrante de actas: cada instancia tiene sus propios estilos y
+    su copia de los datos de oficinas, y no guarda estado entre llamadas, así que
+    se puede usar desde varios hilos a la vez.
+
+    Con `sumidero` (un invocable, ver `metricas_pdf`) cada renderizado se mide
+    y la `Medicion` se le entrega al terminar, aunque haya fallado. Con
+    `medir_memoria` además se registra el pico de tracemalloc; tracemalloc es
+    del proceso, así que con varios hilos el pico incluye lo de los demás.
+    """
+
+    def __init__(self, datos_oficinas=None, sumidero=None, medir_memoria=False):
+        self.estilos = EstilosActa()
+        self._datos_oficinas = {oficina: dict(datos) for oficina, datos in (datos_oficinas or DATOS_OFICINAS).items()}
+        if "Asunción" not in self._datos_oficinas:
+            raise ValueError("Los datos de oficinas deben incluir 'Asunción' (oficina por defecto)")
+        self.sumidero = sumidero
+        self.medir_memoria = medir_memoria
+
+    @property
+    def datos_oficinas(self):
+        return MappingProxyType(self._datos_oficinas)
+
+    def dibujar(self, c, numero_orden, denunciante, datos_denuncia, vista_previa=False, **opciones):
+        """Dibuja el acta sobre un canvas ya creado (ver `dibujar_acta` por las opciones)."""
+        return dibujar_acta(c, self.estilos, self._datos_oficinas, numero_orden, denunciante, datos_denuncia, vista_previa, **opciones)
+
+    def renderizar(self, numero_orden, denunciante, datos_denuncia, vista_previa=False, **opciones):
+        """Genera el documento PDF en memoria y devuelve sus bytes."""
+        salida = _SalidaEnMemoria()
+        self.renderizar_en(salida, numero_orden, denunciante, datos_denuncia, vista_previa, **opciones)
+        return salida.valor()  # 📌 Devolvemos los bytes del PDF
+
+    def renderizar_en(self, destino, numero_orden, denunciante, datos_denuncia, vista_previa=False, **opciones):
+        """
+        Escribe el PDF directamente en `destino` y devuelve la cantidad de bytes
+        escritos. `destino` puede ser una ruta, cualquier objeto binario con
+        `write` (archivo, pipe, cuerpo HTTP por partes) o un socket (`sendall`).
+        """
+        sumidero = self.sumidero
+        if sumidero is None:
+            return self._escribir(destino, numero_orden, denunciante, datos_denuncia, vista_previa, opciones)
+
+        medicion = Medicion(numero_orden, vista_previa)
+        medir_memoria = self.medir_memoria and not tracemalloc.is_tracing()
+        if medir_memoria:
+            tracemalloc.start()
+        inicio = perf_counter()
+        try:
+            return self._escribir(destino, numero_orden, denunciante, datos_denuncia, vista_previa, dict(opciones, medicion=medicion))
+        except Exception as e:
+            medicion.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            medicion.total = perf_counter() - inicio
+            if medir_memoria:
+                medicion.pico_memoria = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            sumidero(medicion)
+
+    def renderizar_desbordable(self, numero_orden, denunciante, datos_denuncia, vista_previa=False,
+                               umbral=UMBRAL_DESBORDE, **opciones):
+        """
+        Devuelve el PDF en un archivo temporal (posicionado al inicio) que vive en
+        memoria hasta `umbral` bytes y pasa a disco si lo supera. Lo cierra quien lo usa.
+        """
+        archivo = tempfile.SpooledTemporaryFile(max_size=umbral)
+        try:
+            self.renderizar_en(archivo, numero_orden, denunciante, datos_denuncia, vista_previa, **opciones)
+        except BaseException:
+            archivo.close()
+            raise
+        archivo.seek(0)
+        return archivo
+
+    def _escribir(self, destino, numero_orden, denunciante, datos_denuncia, vista_previa, opciones):
+        medicion = opciones.get("medicion")
+        tramo = medicion.tramo if medicion is not None else sin_tramo
+
+        if isinstance(destino, (str, os.PathLike)):
+            with open(destino, "wb") as archivo:
+                return self._escribir(archivo, numero_orden, denunciante, datos_denuncia, vista_previa, opciones)
+
+        salida = _SalidaPDF(destino)
+        c = canvas.Canvas(salida, pagesize=legal)
+        self.dibujar(c, numero_orden, denunciante, datos_denuncia, vista_previa, **opciones)
+        with tramo("guardado"):
+            try:
+                c.save()
+            finally:
+                salida.soltar()
+
+        if medicion is not None:
+            medicion.bytes = salida.escritos
+        return salida.escritos
+
+
+class _SalidaEnMemoria:
+    """Destino en memoria: guarda los bytes que entrega ReportLab sin copiarlos."""
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, datos):
+        self._partes.append(datos)
+        return len(datos)
+
+    def valor(self):
+        if len(self._partes) == 1 and isinstance(self._partes[0], bytes):
+            return self._partes[0]
+        return b"".join(self._partes)
+
+
+class _SalidaPDF:
+    """
+    Adaptador que recibe el canvas en `save()`: cuenta los bytes y los pasa al
+    destino en bloques (un socket o un cuerpo HTTP por partes no reciben de una
+    sola vez un buffer del tamaño de todo el documento).
+
+    Un archivo crudo (`RawIOBase`, p. ej. `open(..., buffering=0)`) puede
+    escribir menos de lo pedido o devolver None si no acepta bytes todavía: se
+    lo envuelve en un `BufferedWriter`, que reintenta hasta escribir todo.
+    """
+
+    BLOQUE = 64 * 1024
+
+    def __init__(self, destino):
+        self._buffer = None
+        if isinstance(destino, _SalidaEnMemoria):
+            self._escribir, self._bloque = destino.write, None
+        elif isinstance(destino, RawIOBase):
+            self._buffer = BufferedWriter(destino, self.BLOQUE)
+            self._escribir, self._bloque = self._buffer.write, self.BLOQUE
+        elif hasattr(destino, "write"):
+            self._escribir, self._bloque = destino.write, self.BLOQUE
+        elif hasattr(destino, "sendall"):
+            self._escribir, self._bloque = destino.sendall, self.BLOQUE
+        else:
+            raise TypeError(f"No se puede escribir un PDF en {type(destino).__name__}")
+        self.escritos = 0
+
+    def write(self, datos):
+        if self._bloque is None:
+            self._escribir(datos)
+        else:
+            vista = memoryview(datos)
+            while vista:
+                bloque = vista[:self._bloque]
+                escritos = self._escribir(bloque)
+                if escritos is None:
+                    # `sendall` (y los `write` que no informan cuánto escribieron) entregan todo el bloque
+                    escritos = len(bloque)
+                elif escritos == 0:
+                    raise OSError("El destino del PDF no aceptó más bytes")
+                vista = vista[escritos:]
+        self.escritos += len(datos)
+
+    def soltar(self):
+        """Entrega lo que quede en el buffer de un destino crudo y lo suelta sin cerrarlo."""
+        if self._buffer is not None:
+            buffer, self._buffer = self._buffer, None
+            buffer.detach()  # 🔹 Sin detach, el BufferedWriter cerraría el destino al descartarse
+
+
+# 📌 Renderizador compartido por `generar_pdf` (seguro entre hilos)
+_renderizador = RenderizadorActas()
+
+
+def instrumentar(sumidero, medir_memoria=False):
+    """Activa (o con `sumidero=None`, desactiva) la medición del renderizador de `generar_pdf`."""
+    _renderizador.sumidero = sumidero
+    _renderizador.medir_memoria = medir_memoria
+
+
+# 📌 Activación sin tocar código: DENUNCIAS_PDF_METRICAS=archivo.jsonl (o "-" para stderr)
+if os.environ.get("DENUNCIAS_PDF_METRICAS"):
+    _destino_metricas = os.environ["DENUNCIAS_PDF_METRICAS"]
+    instrumentar(
+        SumideroJSON(None if _destino_metricas == "-" else open(_destino_metricas, "a", encoding="utf-8")),
+        medir_memoria=os.environ.get("DENUNCIAS_PDF_METRICAS_MEMORIA") == "1",
+    )
 
 
-    c.save()
+def generar_pdf(numero_orden, denunciante, datos_denuncia, vista_previa=False, **opciones):
+    """Genera el documento PDF en memoria y devuelve sus bytes (ver `dibujar_acta` por las opciones)."""
+    return _renderizador.renderizar(numero_orden, denunciante, datos_denuncia, vista_previa, **opciones)
 
-    # Obtener los bytes del PDF generado en memoria
-    pdf_bytes = buffer.getvalue()
-    buffer.close()
 
-    return pdf_bytes  # 📌 Devolvemos los bytes del PDF e
+def generar_pdf_en(destino, numero_orden, denunciante, datos_denuncia, vista_previa=False, **opciones):
+    """Escribe el PDF en `destino` (ruta, archivo, pipe o socket) y devuelve los bytes escritos."""
+    return _renderizador.renderizar_en(destino, numero_orden, denunciante, datos_denuncia, vista_previa, **opciones)
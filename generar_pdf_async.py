@@ -0,0 +1,60 @@
+"""Fachada asíncrona del renderizador de actas.
+
+Pensada para servicios web con asyncio que necesitan atender muchas vistas
+previas a la vez sin bloquear el event loop:
+
+    renderizador = RenderizadorAsincrono(max_concurrentes=4)
+    pdf_bytes = await renderizador.renderizar(numero_orden, denunciante, datos_denuncia, vista_previa=True)
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from generar_pdf import RenderizadorActas
+
+
+class RenderizadorAsincrono:
+    """
+    Envía cada renderizado a un executor y limita cuántos corren a la vez.
+
+    Por defecto usa un pool de hilos propio sobre un `RenderizadorActas`
+    reentrante, así que no hay ningún lock global entre pedidos.
+    """
+
+    def __init__(self, renderizador=None, max_concurrentes=4, executor=None):
+        self.renderizador = renderizador or RenderizadorActas()
+        self.max_concurrentes = max_concurrentes
+        self._executor_propio = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_concurrentes, thread_name_prefix="actas")
+        self._semaforo = asyncio.Semaphore(max_concurrentes)
+
+    async def renderizar(self, numero_orden, denunciante, datos_denuncia, vista_previa=False):
+        """Devuelve los bytes del PDF sin bloquear el event loop."""
+        async with self._semaforo:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor,
+                partial(self.renderizador.renderizar, numero_orden, denunciante, datos_denuncia, vista_previa),
+            )
+
+    async def renderizar_varias(self, registros, vista_previa=False):
+        """Renderiza varios `(numero_orden, denunciante, datos_denuncia)` y devuelve los bytes en el mismo orden."""
+        return await asyncio.gather(*(
+            self.renderizar(numero_orden, denunciante, datos_denuncia, vista_previa)
+            for numero_orden, denunciante, datos_denuncia in registros
+        ))
+
+    def cerrar(self):
+        """Apaga el executor propio esperando los renderizados en curso (bloquea: fuera del event loop)."""
+        if self._executor_propio:
+            self._executor.shutdown(wait=True)
+
+    async def cerrar_async(self):
+        """Como `cerrar`, pero espera el apagado en otro hilo sin frenar el event loop."""
+        await asyncio.to_thread(self.cerrar)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.cerrar_async()
@@ -0,0 +1,195 @@
+"""Generación de actas en lote sobre un pool de procesos.
+
+Uso típico (reimpresión de un turno o regeneración del archivo):
+
+    python generar_pdf_lote.py actas.jsonl --salida actas_pdf/ --procesos 8
+
+El archivo de entrada puede ser una lista JSON o JSON lines, donde cada
+registro tiene las claves ``numero_orden``, ``denunciante`` y ``datos_denuncia``
+(los mismos argumentos que recibe ``generar_pdf.generar_pdf``) y, opcionalmente,
+``nombre_archivo``. Si no, los PDF se llaman ``acta_<oficina>_<año>_<orden>.pdf``.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class ResultadoActa:
+    """Resultado de renderizar un acta dentro de un lote."""
+    indice: int
+    numero_orden: object
+    pdf_bytes: Optional[bytes] = None
+    ruta: Optional[str] = None
+    tamano: int = 0
+    segundos: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+# 📌 Estado "caliente" de cada proceso del pool (se carga una sola vez por worker)
+_generar_pdf = None
+_generar_pdf_en = None
+
+
+def _inicializar_worker():
+    """Importa reportlab, qrcode y el generador, y decodifica los logos una sola vez por proceso."""
+    global _generar_pdf, _generar_pdf_en
+    import generar_pdf as modulo  # noqa: importa reportlab y los estilos
+
+    import qrcode  # noqa: F401  (se precarga para no pagarlo en la primera acta)
+
+    modulo.precargar_recursos()
+    _generar_pdf = modulo.generar_pdf
+    _generar_pdf_en = modulo.generar_pdf_en
+
+
+def _sin_acentos(texto):
+    texto = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^A-Za-z0-9]+", "_", texto).strip("_").lower()
+
+
+def _nombre_archivo(registro, indice):
+    """
+    Nombre del PDF de un registro. El número de orden sólo es único por oficina
+    y año (ver lib/db/schema.sql), así que el nombre lleva oficina, año y orden;
+    sin esos datos, el hash de la denuncia o el índice dentro del lote. Un
+    ``nombre_archivo`` explícito en el registro tiene prioridad.
+    """
+    if registro.get("nombre_archivo"):
+        return os.path.basename(registro["nombre_archivo"])
+    numero_orden = registro.get("numero_orden")
+    datos = registro.get("datos_denuncia") or {}
+    oficina, anio = datos.get("oficina"), str(datos.get("fecha_denuncia") or "")[:4]
+    if numero_orden is not None and oficina and anio.isdigit():
+        return f"acta_{_sin_acentos(oficina)}_{anio}_{numero_orden}.pdf"
+    if datos.get("hash"):
+        return f"acta_{re.sub(r'[^A-Za-z0-9]+', '_', str(datos['hash']))}.pdf"
+    return f"acta_{indice}.pdf"
+
+
+def _renderizar(tarea):
+    """Renderiza un registro dentro del worker. Nunca propaga excepciones."""
+    indice, registro, directorio_salida, vista_previa = tarea
+    numero_orden = registro.get("numero_orden")
+    inicio = time.perf_counter()
+    resultado = ResultadoActa(indice, numero_orden)
+    ruta = os.path.join(directorio_salida, _nombre_archivo(registro, indice)) if directorio_salida else None
+    parcial = None
+    try:
+        if _generar_pdf is None:
+            _inicializar_worker()
+        if ruta:
+            # 🔹 El worker escribe directo al archivo: los bytes no vuelven al proceso principal
+            #    ni se copian a un buffer intermedio. Se renombra al terminar para no dejar PDF a medias.
+            #    El temporal es propio de la tarea: dos registros con el mismo nombre no se pisan.
+            parcial = f"{ruta}.{os.getpid()}.{indice}.parcial"
+            resultado.tamano = _generar_pdf_en(parcial, numero_orden, registro["denunciante"],
+                                               registro["datos_denuncia"], vista_previa=vista_previa)
+            os.replace(parcial, ruta)
+            resultado.ruta = ruta
+        else:
+            resultado.pdf_bytes = _generar_pdf(numero_orden, registro["denunciante"], registro["datos_denuncia"], vista_previa=vista_previa)
+            resultado.tamano = len(resultado.pdf_bytes)
+    except Exception as e:  # 🔹 Un acta fallida no aborta el lote
+        resultado.error = f"{type(e).__name__}: {e}"
+        if parcial and os.path.exists(parcial):
+            os.remove(parcial)
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+
+def generar_lote(registros, procesos=None, directorio_salida=None, vista_previa=False, pendientes_max=None):
+    """
+    Renderiza un iterable de registros en paralelo y devuelve los resultados
+    en el mismo orden de entrada, a medida que van estando listos.
+
+    Cada registro es un dict con ``numero_orden``, ``denunciante`` y
+    ``datos_denuncia`` (o una tupla con esos tres valores). Si se indica
+    ``directorio_salida`` los PDF se escriben ahí y el resultado sólo trae la
+    ruta; si no, trae los bytes en ``pdf_bytes``.
+
+    ``pendientes_max`` limita cuántas actas hay en vuelo a la vez, de modo que
+    la memoria no crece con el tamaño del lote.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    pendientes_max = pendientes_max or procesos * 4
+    if directorio_salida:
+        os.makedirs(directorio_salida, exist_ok=True)
+
+    def tareas():
+        for indice, registro in enumerate(registros):
+            if not isinstance(registro, dict):
+                numero_orden, denunciante, datos_denuncia = registro
+                registro = {"numero_orden": numero_orden, "denunciante": denunciante, "datos_denuncia": datos_denuncia}
+            yield (indice, registro, directorio_salida, vista_previa)
+
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_worker) as pool:
+        en_vuelo = deque()
+        for tarea in tareas():
+            en_vuelo.append(pool.submit(_renderizar, tarea))
+            if len(en_vuelo) >= pendientes_max:
+                yield en_vuelo.popleft().result()
+        while en_vuelo:
+            yield en_vuelo.popleft().result()
+
+
+def leer_registros(ruta):
+    """Lee registros desde una lista JSON o un archivo JSON lines ('-' = stdin)."""
+    f = sys.stdin if ruta == "-" else open(ruta, "r", encoding="utf-8")
+    try:
+        primer_caracter = f.read(1)
+        while primer_caracter and primer_caracter.isspace():
+            primer_caracter = f.read(1)
+        if primer_caracter == "[":
+            yield from json.loads(primer_caracter + f.read())
+            return
+        for linea in _encadenar(primer_caracter + f.readline(), f):
+            if linea.strip():
+                yield json.loads(linea)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _encadenar(primera, f):
+    yield primera
+    yield from f
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera actas de denuncia en lote.")
+    parser.add_argument("entrada", help="Archivo JSON o JSON lines con los registros ('-' para stdin)")
+    parser.add_argument("--salida", required=True, help="Directorio donde escribir los PDF")
+    parser.add_argument("--procesos", type=int, default=None, help="Cantidad de procesos (por defecto, todos los núcleos)")
+    parser.add_argument("--vista-previa", action="store_true", help="Genera las actas en modo vista previa")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    total = fallidas = 0
+    for resultado in generar_lote(leer_registros(args.entrada), procesos=args.procesos,
+                                  directorio_salida=args.salida, vista_previa=args.vista_previa):
+        total += 1
+        if not resultado.ok:
+            fallidas += 1
+            print(f"⚠ Acta {resultado.numero_orden} (registro {resultado.indice}): {resultado.error}", file=sys.stderr)
+
+    duracion = time.perf_counter() - inicio
+    print(f"✅ {total - fallidas}/{total} actas generadas en {duracion:.1f}s "
+          f"({total / duracion if duracion else 0:.1f} actas/s)")
+    return 1 if fallidas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
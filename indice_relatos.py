@@ -0,0 +1,506 @@
+"""Índice invertido de relatos para la búsqueda de denuncias.
+
+Reemplaza los `ILIKE '%termino%'` de `/api/denuncias/buscar-relato` por un
+índice en disco, insensible a tildes y mayúsculas, con ranking BM25, conteo
+exacto, paginación y facetas por tipo de hecho y mes.
+
+    python indice_relatos.py construir indice_relatos/ "excels/json_para_analisis/*.json"
+    python indice_relatos.py agregar indice_relatos/ nuevas.json
+    python indice_relatos.py buscar indice_relatos/ "itau transferencia" --desde 2026-01-01 --pagina 2
+    python indice_relatos.py compactar indice_relatos/
+
+El índice se guarda por segmentos: cada `agregar` escribe uno nuevo (pequeño)
+sin reescribir los anteriores. Si una denuncia vuelve a indexarse, vale la
+versión más reciente. `compactar` une todos los segmentos en uno solo.
+Cada término de una consulta (no sólo el último) busca también las palabras
+que empiezan con él ("transfer" encuentra "transferencia"); todos los términos
+deben aparecer. El total es exacto aunque el prefijo abarque muchas palabras:
+todas cuentan para decidir qué denuncias coinciden, y sólo las
+`MAXIMO_EXPANSIONES` más frecuentes suman al puntaje (las de prefijos de menos
+de `LARGO_MINIMO_PREFIJO` letras no suman). Las palabras vacías se ignoran, salvo que la consulta tenga
+sólo palabras vacías. Sin término, la búsqueda lista todo (con los filtros).
+"""
+import argparse
+import heapq
+import json
+import math
+import mmap
+import os
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from texto_relatos import denuncias_desde_cursor, leer_exportaciones, plegar, tokenizar
+
+VERSION = 1
+
+# 📌 Campos que se indexan (los mismos que revisa la búsqueda por ILIKE)
+CAMPOS_INDEXADOS = (
+    "relato", "nombre_denunciante", "cedula_denunciante", "tipo_hecho", "entidad_bancaria_vulnerada",
+    "oficina", "numero_orden", "operador_nombre", "operador_apellido",
+)
+
+# 📌 Parámetros de BM25 y peso de las coincidencias por prefijo
+K1 = 1.2
+B = 0.75
+PESO_PREFIJO = 0.6
+LARGO_MINIMO_PREFIJO = 3
+MAXIMO_EXPANSIONES = 256
+
+# 📌 Consulta para sincronizar con la base (misma forma que la respuesta de buscar-relato)
+CONSULTA_DENUNCIAS = """
+    SELECT d.id, d.denunciante_id, d.orden AS numero_orden, d.fecha_denuncia, d.hora_denuncia,
+           d.tipo_denuncia AS tipo_hecho, d.hash AS hash_denuncia, d.estado, d.relato,
+           den.nombres AS nombre_denunciante, den.cedula AS cedula_denunciante, d.monto_dano, d.moneda,
+           d.entidad_bancaria_vulnerada, d.oficina, d.operador_nombre, d.operador_apellido
+    FROM denuncias d
+    LEFT JOIN denunciantes den ON d.denunciante_id = den.id
+    WHERE d.estado = 'completada' AND d.id = ANY(%s)
+"""
+
+
+def _fecha_entera(valor):
+    """'2026-02-16T00:00:00.000Z' (o un date) → 20260216; 0 si no hay fecha."""
+    texto = str(valor or "")[:10]
+    try:
+        return int(texto.replace("-", "")) if len(texto) == 10 else 0
+    except ValueError:
+        return 0
+
+
+def _serializable(denuncia):
+    """Copia JSON de la fila (fechas y decimales de un cursor pasan a texto)."""
+    return json.loads(json.dumps(denuncia, ensure_ascii=False, default=str))
+
+
+class _Segmento:
+    """Un segmento inmutable: vocabulario, postings (mmap) y datos de cada documento."""
+
+    def __init__(self, directorio, nombre):
+        self.nombre = nombre
+        base = os.path.join(directorio, nombre)
+        with open(base + ".voc", encoding="utf-8") as f:
+            self.vocabulario = json.load(f)  # término -> [offset, cantidad]
+        with open(base + ".doc", encoding="utf-8") as f:
+            docs = json.load(f)
+        self.ids = docs["ids"]
+        self.ordenes = docs["ordenes"]
+        self.fechas = docs["fechas"]
+        self.horas = docs["horas"]
+        self.tipos = docs["tipos"]
+        self.largos = docs["largos"]
+        self.guardados = docs["guardados"]
+        self._archivo = open(base + ".pos", "rb")
+        tamano = os.fstat(self._archivo.fileno()).st_size
+        self._postings = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ) if tamano else b""
+
+    def postings(self, termino):
+        """`(documentos, frecuencias)` del término en este segmento (índices locales)."""
+        offset, cantidad = self.vocabulario[termino]
+        documentos, frecuencias = array("I"), array("H")
+        documentos.frombytes(self._postings[offset:offset + 4 * cantidad])
+        frecuencias.frombytes(self._postings[offset + 4 * cantidad:offset + 6 * cantidad])
+        if sys.byteorder != "little":
+            documentos.byteswap()
+            frecuencias.byteswap()
+        return documentos, frecuencias
+
+    def cerrar(self):
+        if isinstance(self._postings, mmap.mmap):
+            self._postings.close()
+        self._archivo.close()
+
+
+def _escribir_segmento(directorio, nombre, denuncias):
+    """Escribe un segmento nuevo con las denuncias dadas (ya serializables)."""
+    postings = {}
+    docs = {"ids": [], "ordenes": [], "fechas": [], "horas": [], "tipos": [], "largos": [], "guardados": []}
+    for local, denuncia in enumerate(denuncias):
+        texto = " ".join(str(denuncia[campo]) for campo in CAMPOS_INDEXADOS if denuncia.get(campo) is not None)
+        frecuencias = Counter(tokenizar(texto))
+        for termino, frecuencia in frecuencias.items():
+            postings.setdefault(termino, []).append((local, min(frecuencia, 65535)))
+        docs["ids"].append(denuncia["id"])
+        docs["ordenes"].append(int(denuncia.get("numero_orden") or 0))
+        docs["fechas"].append(_fecha_entera(denuncia.get("fecha_denuncia")))
+        docs["horas"].append(str(denuncia.get("hora_denuncia") or ""))
+        docs["tipos"].append(denuncia.get("tipo_hecho") or "")
+        docs["largos"].append(sum(frecuencias.values()))
+        docs["guardados"].append(denuncia)
+
+    base = os.path.join(directorio, nombre)
+    vocabulario = {}
+    with open(base + ".pos", "wb") as f:
+        offset = 0
+        for termino in sorted(postings):
+            lista = postings[termino]
+            documentos = array("I", (local for local, _ in lista))
+            frecuencias = array("H", (frecuencia for _, frecuencia in lista))
+            if sys.byteorder != "little":
+                documentos.byteswap()
+                frecuencias.byteswap()
+            f.write(documentos.tobytes())
+            f.write(frecuencias.tobytes())
+            vocabulario[termino] = [offset, len(lista)]
+            offset += 6 * len(lista)
+    with open(base + ".voc", "w", encoding="utf-8") as f:
+        json.dump(vocabulario, f, ensure_ascii=False, separators=(",", ":"))
+    with open(base + ".doc", "w", encoding="utf-8") as f:
+        json.dump(docs, f, ensure_ascii=False, separators=(",", ":"))
+
+
+class IndiceRelatos:
+    """
+    Índice de relatos en el directorio `ruta`. Las consultas ven el estado del
+    índice al abrirlo (o al último `agregar`/`eliminar`/`compactar` hecho con
+    esta misma instancia). Un solo proceso debe escribir a la vez.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._segmentos = []
+        self._abrir()
+
+    def _ruta_manifiesto(self):
+        return os.path.join(self.ruta, "manifiesto.json")
+
+    def _leer_manifiesto(self):
+        try:
+            with open(self._ruta_manifiesto(), encoding="utf-8") as f:
+                manifiesto = json.load(f)
+        except FileNotFoundError:
+            return {"version": VERSION, "segmentos": [], "borrados": {}, "siguiente": 1}
+        if manifiesto.get("version") != VERSION:
+            raise ValueError(f"Versión de índice no soportada: {manifiesto.get('version')}; volver a construirlo")
+        return manifiesto
+
+    def _guardar_manifiesto(self, manifiesto):
+        temporal = self._ruta_manifiesto() + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(manifiesto, f, ensure_ascii=False)
+        os.replace(temporal, self._ruta_manifiesto())  # 🔹 Cambio atómico: los lectores nunca ven un estado a medias
+
+    def _abrir(self):
+        for segmento in self._segmentos:
+            segmento.cerrar()
+        os.makedirs(self.ruta, exist_ok=True)
+        self._manifiesto = self._leer_manifiesto()
+        self._segmentos = [_Segmento(self.ruta, nombre) for nombre in self._manifiesto["segmentos"]]
+        borrados = {int(id_): generacion for id_, generacion in self._manifiesto["borrados"].items()}
+
+        # 🔹 Última versión viva de cada denuncia
+        ultima = {}
+        for numero, segmento in enumerate(self._segmentos):
+            for local, id_ in enumerate(segmento.ids):
+                ultima[id_] = (numero, local)
+        self._vivos = [bytearray(len(segmento.ids)) for segmento in self._segmentos]
+        for id_, (numero, local) in ultima.items():
+            if borrados.get(id_, -1) <= numero:
+                self._vivos[numero][local] = 1
+        self._ids_vivos = {id_ for id_, (numero, local) in ultima.items() if self._vivos[numero][local]}
+        # 🔹 Hash de la versión indexada: `sincronizar` reindexa las que cambiaron en la base
+        self._hashes = {
+            id_: self._segmentos[numero].guardados[local].get("hash_denuncia")
+            for id_, (numero, local) in ultima.items() if self._vivos[numero][local]
+        }
+
+        self._total_documentos = len(self._ids_vivos)
+        largos = [largo for segmento in self._segmentos for largo in segmento.largos]
+        self._largo_promedio = (sum(largos) / len(largos)) if largos else 1.0
+        # 🔹 Normalización de BM25 por documento, calculada una vez al abrir
+        self._normales = [
+            [K1 * (1 - B + B * largo / self._largo_promedio) for largo in segmento.largos]
+            for segmento in self._segmentos
+        ]
+        self._df = Counter()
+        for segmento in self._segmentos:
+            for termino, (_, cantidad) in segmento.vocabulario.items():
+                self._df[termino] += cantidad
+        self._terminos = sorted(self._df)
+
+    def cerrar(self):
+        for segmento in self._segmentos:
+            segmento.cerrar()
+        self._segmentos = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def __len__(self):
+        return self._total_documentos
+
+    def __contains__(self, id_denuncia):
+        return id_denuncia in self._ids_vivos
+
+    def agregar(self, denuncias):
+        """
+        Indexa denuncias nuevas o actualizadas en un segmento nuevo. Las que no
+        están completadas se quitan del índice. Devuelve cuántas se indexaron.
+        """
+        nuevas, descartadas = [], []
+        for denuncia in denuncias:
+            if denuncia.get("estado", "completada") != "completada":
+                descartadas.append(denuncia["id"])
+            else:
+                nuevas.append(_serializable(denuncia))
+        if descartadas:
+            self.eliminar(descartadas)
+        if not nuevas:
+            return 0
+
+        manifiesto = self._leer_manifiesto()
+        nombre = f"seg_{manifiesto['siguiente']:06d}"
+        _escribir_segmento(self.ruta, nombre, nuevas)
+        manifiesto["segmentos"].append(nombre)
+        manifiesto["siguiente"] += 1
+        self._guardar_manifiesto(manifiesto)
+        self._abrir()
+        return len(nuevas)
+
+    def eliminar(self, ids):
+        """Quita denuncias del índice (si se vuelven a agregar, reaparecen)."""
+        manifiesto = self._leer_manifiesto()
+        for id_ in ids:
+            manifiesto["borrados"][str(id_)] = len(manifiesto["segmentos"])
+        self._guardar_manifiesto(manifiesto)
+        self._abrir()
+
+    def compactar(self):
+        """Une todos los segmentos en uno, descartando versiones viejas y borradas."""
+        vivas = [
+            segmento.guardados[local]
+            for numero, segmento in enumerate(self._segmentos)
+            for local in range(len(segmento.ids)) if self._vivos[numero][local]
+        ]
+        manifiesto = self._leer_manifiesto()
+        anteriores = manifiesto["segmentos"]
+        nombre = f"seg_{manifiesto['siguiente']:06d}"
+        _escribir_segmento(self.ruta, nombre, vivas)
+        self._guardar_manifiesto({"version": VERSION, "segmentos": [nombre], "borrados": {}, "siguiente": manifiesto["siguiente"] + 1})
+        self._abrir()
+        for viejo in anteriores:
+            for extension in (".voc", ".doc", ".pos"):
+                try:
+                    os.remove(os.path.join(self.ruta, viejo + extension))
+                except FileNotFoundError:
+                    pass
+
+    def sincronizar(self, conexion, tamano_lote=500):
+        """
+        Pone el índice al día con la base (PostgreSQL, estilo psycopg2): indexa
+        las denuncias completadas nuevas o con otro hash y quita las que ya no
+        lo están. Devuelve `(agregadas, quitadas)`.
+        """
+        with conexion.cursor() as cursor:
+            cursor.execute("SELECT id, hash FROM denuncias WHERE estado = 'completada'")
+            actuales = dict(cursor.fetchall())
+        sobrantes = sorted(self._ids_vivos - set(actuales))
+        cambiadas = sorted(i for i, h in actuales.items() if i not in self._ids_vivos or self._hashes.get(i) != h)
+        if sobrantes:
+            self.eliminar(sobrantes)
+        agregadas = 0
+        for inicio in range(0, len(cambiadas), tamano_lote):
+            with conexion.cursor() as cursor:
+                cursor.execute(CONSULTA_DENUNCIAS, (cambiadas[inicio:inicio + tamano_lote],))
+                agregadas += self.agregar(list(denuncias_desde_cursor(cursor)))
+        return agregadas, len(sobrantes)
+
+    def _expandir(self, token):
+        """
+        Términos del vocabulario que empiezan con el token: `[(término, peso)]`.
+        Están todos (el rango contiguo de `_terminos`); los que no puntúan
+        llevan peso 0 y sólo cuentan para la coincidencia.
+        """
+        inicio = bisect_left(self._terminos, token)
+        fin = bisect_left(self._terminos, token + "\uffff", inicio)
+        prefijos = [termino for termino in self._terminos[inicio:fin] if termino != token]
+        expansiones = [(token, 1.0)] if token in self._df else []
+        if len(token) < LARGO_MINIMO_PREFIJO:
+            puntuan = set()
+        elif len(prefijos) <= MAXIMO_EXPANSIONES:
+            puntuan = set(prefijos)
+        else:
+            puntuan = set(heapq.nlargest(MAXIMO_EXPANSIONES, prefijos, key=self._df.__getitem__))
+        expansiones.extend((termino, PESO_PREFIJO if termino in puntuan else 0.0) for termino in prefijos)
+        return expansiones
+
+    def _presencia(self, termino, resultado, puntajes):
+        """Marca los documentos vivos con `termino` como coincidencias sin sumarles puntaje."""
+        for numero, segmento in enumerate(self._segmentos):
+            if termino not in segmento.vocabulario:
+                continue
+            vivos, acumulado = self._vivos[numero], puntajes[numero]
+            previos = resultado[numero] if resultado is not None else None
+            for local in segmento.postings(termino)[0]:
+                if vivos[local] and (previos is None or local in previos) and local not in acumulado:
+                    acumulado[local] = 0.0
+
+    def _coincidencias(self, tokens):
+        """Por segmento, `{local: puntaje}` de los documentos vivos que contienen todos los tokens."""
+        resultado = None
+        for token in tokens:
+            puntajes = [{} for _ in self._segmentos]
+            for termino, peso in self._expandir(token):
+                if not peso:
+                    self._presencia(termino, resultado, puntajes)
+                    continue
+                # 🔹 _df cuenta también versiones viejas y borradas: se acota al total para que el idf
+                #    no quede negativo (y descarte el término) después de reindexar
+                df = min(self._df[termino], self._total_documentos)
+                idf = math.log(1 + (self._total_documentos - df + 0.5) / (df + 0.5))
+                factor = peso * idf * (K1 + 1)
+                for numero, segmento in enumerate(self._segmentos):
+                    if termino not in segmento.vocabulario:
+                        continue
+                    vivos, normales, acumulado = self._vivos[numero], self._normales[numero], puntajes[numero]
+                    previos = resultado[numero] if resultado is not None else None
+                    documentos, frecuencias = segmento.postings(termino)
+                    for local, frecuencia in zip(documentos, frecuencias):
+                        if not vivos[local] or (previos is not None and local not in previos):
+                            continue
+                        puntaje = factor * frecuencia / (frecuencia + normales[local])
+                        if puntaje > acumulado.get(local, 0.0):
+                            acumulado[local] = puntaje
+            if resultado is not None:
+                puntajes = [
+                    {local: previos[local] + puntaje for local, puntaje in acumulado.items()}
+                    for previos, acumulado in zip(resultado, puntajes)
+                ]
+            resultado = puntajes
+            if not any(resultado):
+                break
+        return resultado
+
+    def buscar(self, termino="", fecha_desde=None, fecha_hasta=None, tipo_hecho=None, pagina=1, limite=20, orden="relevancia"):
+        """
+        Devuelve `{"resultados", "total", "pagina", "limite", "facetas"}` como la
+        API de búsqueda por relato. `orden` es "relevancia" o "reciente". Las
+        facetas cuentan por tipo de hecho (sin aplicar el filtro de tipo) y por
+        mes (sin aplicar el filtro de fechas).
+        """
+        tokens = tokenizar(termino)
+        if not tokens:
+            # 🔹 Una consulta hecha sólo de palabras vacías ("sin", "no") se busca tal cual (por
+            #    prefijo, porque no están indexadas) en lugar de devolver todo el índice
+            tokens = tokenizar(termino, quitar_vacias=False)
+        if tokens:
+            candidatos = self._coincidencias(tokens)
+        else:
+            candidatos = [dict.fromkeys((local for local, vivo in enumerate(vivos) if vivo), 0.0) for vivos in self._vivos]
+
+        desde = _fecha_entera(fecha_desde) or 0
+        hasta = _fecha_entera(fecha_hasta) or 99999999
+        tipo_buscado = plegar(tipo_hecho) if tipo_hecho else None
+        por_tipo, por_mes = Counter(), Counter()
+        seleccion = []
+        for numero, puntajes in enumerate(candidatos):
+            segmento = self._segmentos[numero]
+            fechas, tipos = segmento.fechas, segmento.tipos
+            # 🔹 Se cuenta por valor crudo y se agrupa al final (menos trabajo por documento)
+            tipos_crudos, fechas_crudas = Counter(), Counter()
+            for local, puntaje in puntajes.items():
+                fecha, tipo = fechas[local], tipos[local]
+                fecha_ok = desde <= fecha <= hasta
+                tipo_ok = tipo_buscado is None or plegar(tipo) == tipo_buscado
+                if fecha_ok:
+                    tipos_crudos[tipo] += 1
+                if tipo_ok:
+                    fechas_crudas[fecha // 100] += 1
+                    if fecha_ok:
+                        seleccion.append((puntaje, numero, local))
+            por_tipo.update(tipos_crudos)
+            for mes, cantidad in fechas_crudas.items():
+                if mes:
+                    por_mes[f"{mes // 100:04d}-{mes % 100:02d}"] += cantidad
+
+        pagina, limite = max(1, int(pagina)), max(1, int(limite))
+        cantidad = pagina * limite
+
+        def reciente(item):
+            segmento, local = self._segmentos[item[1]], item[2]
+            return segmento.ordenes[local], segmento.fechas[local], segmento.horas[local]
+
+        if orden == "reciente" or not tokens:
+            mejores = heapq.nlargest(cantidad, seleccion, key=reciente)
+        else:
+            mejores = heapq.nlargest(cantidad, seleccion, key=lambda item: (item[0], reciente(item)))
+
+        resultados = [
+            dict(self._segmentos[numero].guardados[local], puntaje=round(puntaje, 4))
+            for puntaje, numero, local in mejores[(pagina - 1) * limite:]
+        ]
+        return {
+            "resultados": resultados,
+            "total": len(seleccion),
+            "pagina": pagina,
+            "limite": limite,
+            "facetas": {"tipo_hecho": dict(por_tipo.most_common()), "mes": dict(sorted(por_mes.items()))},
+        }
+
+
+def construir(ruta, denuncias):
+    """Crea (o reemplaza) el índice en `ruta` con las denuncias dadas."""
+    if os.path.isdir(ruta):
+        for archivo in os.listdir(ruta):
+            if archivo == "manifiesto.json" or (archivo.startswith("seg_") and archivo.endswith((".voc", ".doc", ".pos"))):
+                os.remove(os.path.join(ruta, archivo))
+    indice = IndiceRelatos(ruta)
+    indice.agregar(denuncias)
+    return indice
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Índice invertido de relatos de denuncias.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("construir", help="Crear el índice desde exportaciones JSON")
+    p.add_argument("indice")
+    p.add_argument("archivos", nargs="+")
+    p = sub.add_parser("agregar", help="Agregar o actualizar denuncias desde exportaciones JSON")
+    p.add_argument("indice")
+    p.add_argument("archivos", nargs="+")
+    p = sub.add_parser("compactar", help="Unir todos los segmentos en uno")
+    p.add_argument("indice")
+    p = sub.add_parser("buscar", help="Consultar el índice")
+    p.add_argument("indice")
+    p.add_argument("termino", nargs="?", default="")
+    p.add_argument("--desde")
+    p.add_argument("--hasta")
+    p.add_argument("--tipo")
+    p.add_argument("--pagina", type=int, default=1)
+    p.add_argument("--limite", type=int, default=20)
+    p.add_argument("--orden", choices=("relevancia", "reciente"), default="relevancia")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    if args.comando == "construir":
+        with construir(args.indice, leer_exportaciones(*args.archivos)) as indice:
+            print(f"✅ {len(indice)} denuncias indexadas en {time.perf_counter() - inicio:.2f}s")
+    elif args.comando == "agregar":
+        with IndiceRelatos(args.indice) as indice:
+            cantidad = indice.agregar(leer_exportaciones(*args.archivos))
+            print(f"✅ {cantidad} denuncias agregadas ({len(indice)} en total)")
+    elif args.comando == "compactar":
+        with IndiceRelatos(args.indice) as indice:
+            indice.compactar()
+            print(f"✅ Índice compactado ({len(indice)} denuncias)")
+    else:
+        with IndiceRelatos(args.indice) as indice:
+            inicio = time.perf_counter()
+            respuesta = indice.buscar(args.termino, args.desde, args.hasta, args.tipo, args.pagina, args.limite, args.orden)
+            duracion = (time.perf_counter() - inicio) * 1000
+        for r in respuesta["resultados"]:
+            relato = " ".join(str(r.get("relato") or "").split())
+            print(f"#{r.get('numero_orden')} (id {r['id']}, {str(r.get('fecha_denuncia'))[:10]}, {r['puntaje']}) {relato[:100]}")
+        print(f"— {respuesta['total']} resultados, página {respuesta['pagina']} ({duracion:.1f} ms)")
+        print(json.dumps(respuesta["facetas"], ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""Instrumentación opcional del renderizado de actas.
+
+Un `RenderizadorActas` con `sumidero` entrega, al terminar cada acta, una
+`Medicion` con el tiempo de cada tramo (encabezado, párrafos, relato, firmas y
+QR, guardado), la cantidad de páginas y de líneas del relato, el tamaño del PDF
+y, si se pide, el pico de memoria según tracemalloc. Sin sumidero no se mide
+nada y el costo es una comparación por acta.
+
+    from generar_pdf import RenderizadorActas
+    from metricas_pdf import SumideroJSON, MetricasPrometheus
+
+    renderizador = RenderizadorActas(sumidero=SumideroJSON())       # una línea JSON por acta en stderr
+    metricas = MetricasPrometheus()
+    renderizador = RenderizadorActas(sumidero=metricas)              # metricas.texto() para /metrics
+"""
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# 📌 Tramos que mide `dibujar_acta`. Pueden anidarse: "relato" incluye los
+#    encabezados de las páginas nuevas y "firmas_qr" incluye "qr".
+TRAMOS = ("encabezado", "parrafos", "maquetado_relato", "relato", "qr", "firmas_qr", "guardado")
+
+_NULO = nullcontext()
+
+
+def sin_tramo(nombre):
+    """Reemplazo de `Medicion.tramo` cuando no se mide: no hace nada."""
+    return _NULO
+
+
+class Medicion:
+    """Resultado de medir un renderizado."""
+
+    def __init__(self, numero_orden=None, vista_previa=False):
+        self.numero_orden = numero_orden
+        self.vista_previa = vista_previa
+        self.tramos = {}
+        self.paginas = 0
+        self.lineas_relato = 0
+        self.bytes = 0
+        self.pico_memoria = None
+        self.total = 0.0
+        self.error = None
+
+    @contextmanager
+    def tramo(self, nombre):
+        """Acumula en `tramos[nombre]` los segundos que tarda el bloque."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tramos[nombre] = self.tramos.get(nombre, 0.0) + time.perf_counter() - inicio
+
+    def como_dict(self):
+        return {
+            "numero_orden": self.numero_orden,
+            "vista_previa": self.vista_previa,
+            "total_ms": round(self.total * 1000, 3),
+            "tramos_ms": {nombre: round(segundos * 1000, 3) for nombre, segundos in self.tramos.items()},
+            "paginas": self.paginas,
+            "lineas_relato": self.lineas_relato,
+            "bytes": self.bytes,
+            "pico_memoria": self.pico_memoria,
+            "error": self.error,
+        }
+
+
+class SumideroJSON:
+    """Escribe una línea JSON por acta (por defecto en stderr)."""
+
+    def __init__(self, archivo=None):
+        self.archivo = archivo
+        self._lock = threading.Lock()
+
+    def __call__(self, medicion):
+        linea = json.dumps(dict(medicion.como_dict(), fecha=time.strftime("%Y-%m-%dT%H:%M:%S")), ensure_ascii=False)
+        archivo = self.archivo or sys.stderr
+        with self._lock:
+            archivo.write(linea + "\n")
+            archivo.flush()
+
+
+class MetricasPrometheus:
+    """Acumula las mediciones y las expone en el formato de texto de Prometheus."""
+
+    LIMITES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+    def __init__(self, prefijo="actas_pdf"):
+        self.prefijo = prefijo
+        self._lock = threading.Lock()
+        self._actas = {}  # modo -> cantidad
+        self._errores = 0
+        self._tramos = {}  # tramo -> [suma, cantidad]
+        self._cubetas = [0] * (len(self.LIMITES) + 1)
+        self._suma_total = 0.0
+        self._paginas = 0
+        self._lineas = 0
+        self._bytes = 0
+        self._pico_memoria = 0
+
+    def __call__(self, medicion):
+        modo = "vista_previa" if medicion.vista_previa else "final"
+        with self._lock:
+            self._actas[modo] = self._actas.get(modo, 0) + 1
+            if medicion.error:
+                self._errores += 1
+            for nombre, segundos in medicion.tramos.items():
+                acumulado = self._tramos.setdefault(nombre, [0.0, 0])
+                acumulado[0] += segundos
+                acumulado[1] += 1
+            indice = next((i for i, limite in enumerate(self.LIMITES) if medicion.total <= limite), len(self.LIMITES))
+            self._cubetas[indice] += 1
+            self._suma_total += medicion.total
+            self._paginas += medicion.paginas
+            self._lineas += medicion.lineas_relato
+            self._bytes += medicion.bytes
+            if medicion.pico_memoria:
+                self._pico_memoria = max(self._pico_memoria, medicion.pico_memoria)
+
+    def texto(self):
+        p = self.prefijo
+        with self._lock:
+            lineas = [f"# TYPE {p}_total counter"]
+            lineas += [f'{p}_total{{modo="{modo}"}} {cantidad}' for modo, cantidad in sorted(self._actas.items())]
+            lineas += [f"# TYPE {p}_errores_total counter", f"{p}_errores_total {self._errores}"]
+
+            lineas.append(f"# TYPE {p}_segundos histogram")
+            acumulado = 0
+            for limite, cantidad in zip(self.LIMITES, self._cubetas):
+                acumulado += cantidad
+                lineas.append(f'{p}_segundos_bucket{{le="{limite}"}} {acumulado}')
+            acumulado += self._cubetas[-1]
+            lineas.append(f'{p}_segundos_bucket{{le="+Inf"}} {acumulado}')
+            lineas.append(f"{p}_segundos_sum {self._suma_total:.6f}")
+            lineas.append(f"{p}_segundos_count {acumulado}")
+
+            lineas.append(f"# TYPE {p}_tramo_segundos summary")
+            for nombre, (suma, cantidad) in sorted(self._tramos.items()):
+                lineas.append(f'{p}_tramo_segundos_sum{{tramo="{nombre}"}} {suma:.6f}')
+                lineas.append(f'{p}_tramo_segundos_count{{tramo="{nombre}"}} {cantidad}')
+
+            lineas += [
+                f"# TYPE {p}_paginas_total counter", f"{p}_paginas_total {self._paginas}",
+                f"# TYPE {p}_lineas_relato_total counter", f"{p}_lineas_relato_total {self._lineas}",
+                f"# TYPE {p}_bytes_total counter", f"{p}_bytes_total {self._bytes}",
+                f"# TYPE {p}_pico_memoria_bytes gauge", f"{p}_pico_memoria_bytes {self._pico_memoria}",
+            ]
+        return "\n".join(lineas) + "\n"
@@ -0,0 +1,442 @@
+"""Nomenclador geográfico: departamentos, distritos y barrios del Paraguay.
+
+Compila `paraguay.csv` (DEPARTAMENTO;DISTRITO, la referencia oficial) y los
+barrios de `lib/data/barrios.ts` en una estructura precalculada:
+
+- claves plegadas (sin tildes ni mayúsculas) ordenadas, para autocompletar por
+  prefijo con búsqueda binaria; cada nombre entra también por cada palabra
+  ("este" sugiere "Ciudad del Este");
+- variantes por borrado (estilo SymSpell) para tolerar errores de tipeo sin
+  comparar contra todo el nomenclador.
+
+`normalizar` lleva un texto libre (`lugar_hecho`, el domicilio del
+denunciante) a `(departamento, distrito)`, con el barrio si se reconoce:
+
+    python nomenclador.py compilar nomenclador.json
+    python nomenclador.py sugerir "fernando de la"
+    python nomenclador.py normalizar "DEPARTAMENTO CENTRAL, CIUDAD DE SAN LORENZ, BARRIO CAACUPEMI"
+    python nomenclador.py lote --salida lugares.csv          # toda la tabla (usa DATABASE_URL)
+    python nomenclador.py lote --archivo lugares.txt --salida lugares.csv
+
+El modo lote normaliza cada texto distinto una sola vez.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from bisect import bisect_left
+from functools import lru_cache
+
+from texto_relatos import distancia_edicion, tokenizar
+
+VERSION = 1
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+CSV_DISTRITOS = os.path.join(RAIZ, "paraguay.csv")
+TS_BARRIOS = os.path.join(RAIZ, "lib", "data", "barrios.ts")
+
+DEPARTAMENTO, DISTRITO, BARRIO = "departamento", "distrito", "barrio"
+
+# 📌 Abreviaturas frecuentes en los domicilios (texto plegado)
+ABREVIATURAS = {
+    "cde": "ciudad del este", "mcal": "mariscal", "gral": "general", "dr": "doctor", "cnel": "coronel",
+    "pte": "presidente", "sta": "santa", "sto": "santo", "cap": "capitan", "pto": "puerto",
+    "cnia": "colonia", "col": "colonia", "bo": "barrio", "bro": "barrio", "dpto": "departamento",
+    "dep": "departamento", "asu": "asuncion", "fdo": "fernando", "tte": "teniente",
+}
+
+# 📌 Números escritos en cifras en barrios.ts y en letras en paraguay.csv
+NUMEROS = {
+    "1": "primero", "2": "dos", "3": "tres", "4": "cuatro", "5": "cinco", "6": "seis", "7": "siete",
+    "8": "ocho", "9": "nueve", "10": "diez", "25": "veinticinco",
+}
+
+# 📌 Palabras que anuncian qué tipo de lugar viene después
+_ANUNCIOS = {
+    "departamento": DEPARTAMENTO, "ciudad": DISTRITO, "distrito": DISTRITO, "municipio": DISTRITO,
+    "localidad": DISTRITO, "barrio": BARRIO, "compania": BARRIO,
+}
+
+PALABRAS_POR_NOMBRE = 6
+MAXIMO_SUGERENCIAS = 10
+PUNTAJE_MINIMO = 1.5
+
+# 🔹 Tolerancia a errores de tipeo según el largo del nombre
+def _errores_tolerados(largo):
+    return 0 if largo < 5 else 1 if largo < 9 else 2
+
+
+def _clave(texto):
+    """Texto plegado, con las abreviaturas expandidas y los espacios normalizados."""
+    return " ".join(ABREVIATURAS.get(t, t) for t in tokenizar(texto, quitar_vacias=False))
+
+
+def _borrados(palabra, errores):
+    """Todas las variantes de `palabra` con hasta `errores` letras borradas."""
+    variantes, frontera = {palabra}, {palabra}
+    for _ in range(errores):
+        frontera = {v[:i] + v[i + 1:] for v in frontera for i in range(len(v))}
+        variantes |= frontera
+    return variantes
+
+
+def leer_distritos(ruta=CSV_DISTRITOS):
+    """Pares `(departamento, distrito)` de paraguay.csv (UTF-8 con BOM, separado por ';')."""
+    with open(ruta, encoding="utf-8-sig", newline="") as f:
+        lector = csv.DictReader(f, delimiter=";")
+        return [(fila["DEPARTAMENTO"].strip(), fila["DISTRITO"].strip()) for fila in lector if fila.get("DISTRITO")]
+
+
+def leer_barrios(ruta=TS_BARRIOS):
+    """
+    Ternas `(departamento, ciudad, barrio)` de barrios.ts (la estructura
+    Departamento → Ciudad → [Barrios] que usa el formulario).
+    """
+    with open(ruta, encoding="utf-8") as f:
+        fuente = f.read()
+    fuente = fuente[fuente.index("= [") + 2:]
+    pila, departamento, ciudad, barrios = [], None, None, []
+    for m in re.finditer(r'(ciudades|barrios)\s*:\s*\[|nombre\s*:\s*"((?:[^"\\]|\\.)*)"|\]', fuente):
+        if m.group(1):
+            pila.append(m.group(1))
+        elif m.group(2) is not None:
+            nombre = m.group(2).strip()
+            if not pila:
+                departamento = nombre
+            elif pila[-1] == "ciudades":
+                ciudad = nombre
+            else:
+                barrios.append((departamento, ciudad, nombre))
+        elif pila:
+            pila.pop()
+    return barrios
+
+
+class Nomenclador:
+    """
+    Nomenclador compilado. `lugares[i]` es `(tipo, departamento, distrito,
+    barrio)` con los nombres oficiales; las estructuras de búsqueda guardan
+    índices a esa lista.
+    """
+
+    def __init__(self, lugares, claves, ids, nombres, borrados):
+        self.lugares = lugares
+        self._claves = claves
+        self._ids = ids
+        self._nombres = nombres
+        self._borrados = borrados
+        self._normalizar = lru_cache(maxsize=200_000)(self._normalizar_clave)
+
+    @classmethod
+    def compilar(cls, ruta_distritos=CSV_DISTRITOS, ruta_barrios=TS_BARRIOS):
+        """Arma el nomenclador desde paraguay.csv y barrios.ts."""
+        lugares, nombres = [], {}
+
+        def agregar(lugar, nombre):
+            indice = len(lugares)
+            lugares.append(lugar)
+            nombres.setdefault(_clave(nombre), []).append(indice)
+
+        distritos = leer_distritos(ruta_distritos)
+        departamentos = {}
+        for departamento, distrito in distritos:
+            if departamento not in departamentos:
+                departamentos[departamento] = len(lugares)
+                agregar((DEPARTAMENTO, departamento, None, None), departamento)
+            agregar((DISTRITO, departamento, distrito, None), distrito)
+            # 🔹 Forma corta de los nombres largos: "Mariscal José Félix Estigarribia" → "mariscal estigarribia"
+            palabras = _clave(distrito).split()
+            if len(palabras) >= 3 and palabras[1] not in ("de", "del", "la", "y"):
+                nombres.setdefault(f"{palabras[0]} {palabras[-1]}", []).append(len(lugares) - 1)
+
+        # 🔹 barrios.ts escribe los nombres a su manera ("CARMELO PERALTA", "CORDILLERA"):
+        # se los ubica en el departamento y distrito oficiales más parecidos. Los
+        # distritos que faltan en el CSV (varios de Itapúa) se agregan desde ahí.
+        por_departamento = {}
+        for departamento, distrito in distritos:
+            por_departamento.setdefault(departamento, []).append(distrito)
+        oficial_departamento, oficial_distrito = {}, {}
+        if ruta_barrios and os.path.exists(ruta_barrios):
+            for departamento_ts, ciudad_ts, barrio in leer_barrios(ruta_barrios):
+                if departamento_ts not in oficial_departamento:
+                    oficial_departamento[departamento_ts] = _mas_parecido(departamento_ts, departamentos)
+                departamento = oficial_departamento[departamento_ts]
+                if departamento is None:
+                    continue
+                if (departamento, ciudad_ts) not in oficial_distrito:
+                    distrito = _mas_parecido(ciudad_ts, por_departamento[departamento])
+                    if distrito is None:
+                        distrito = ciudad_ts.title()
+                        por_departamento[departamento].append(distrito)
+                        agregar((DISTRITO, departamento, distrito, None), distrito)
+                    oficial_distrito[(departamento, ciudad_ts)] = distrito
+                distrito = oficial_distrito[(departamento, ciudad_ts)]
+                agregar((BARRIO, departamento, distrito, barrio.title()), barrio)
+
+        # 🔹 Claves para autocompletar: el nombre completo y cada sufijo desde una palabra
+        pares = set()
+        for nombre, indices in nombres.items():
+            palabras = nombre.split()
+            for inicio in range(len(palabras)):
+                sufijo = " ".join(palabras[inicio:])
+                pares.update((sufijo, inicio, i) for i in indices)
+        ordenados = sorted(pares)
+        claves = [clave for clave, _, _ in ordenados]
+        ids = [i for _, _, i in ordenados]
+
+        borrados = {}
+        for nombre in nombres:
+            for variante in _borrados(nombre, _errores_tolerados(len(nombre))):
+                borrados.setdefault(variante, []).append(nombre)
+        return cls(lugares, claves, ids, nombres, borrados)
+
+    def guardar(self, ruta):
+        """Escribe el nomenclador compilado en JSON."""
+        datos = {"version": VERSION, "lugares": self.lugares, "claves": self._claves, "ids": self._ids,
+                 "nombres": self._nombres, "borrados": self._borrados}
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def abrir(cls, ruta):
+        """Carga un nomenclador compilado con `guardar`."""
+        with open(ruta, encoding="utf-8") as f:
+            datos = json.load(f)
+        if datos.get("version") != VERSION:
+            raise ValueError(f"Versión de nomenclador no soportada: {datos.get('version')}")
+        lugares = [tuple(lugar) for lugar in datos["lugares"]]
+        return cls(lugares, datos["claves"], datos["ids"], datos["nombres"], datos["borrados"])
+
+    def _como_dict(self, indice):
+        tipo, departamento, distrito, barrio = self.lugares[indice]
+        return {"tipo": tipo, "departamento": departamento, "distrito": distrito, "barrio": barrio}
+
+    def sugerir(self, prefijo, limite=MAXIMO_SUGERENCIAS, tipo=None):
+        """
+        Autocompletado insensible a tildes: lugares cuyo nombre (o alguna de
+        sus palabras) empieza con `prefijo`. Primero los que contienen lo tecleado
+        como palabras enteras ("este" → "Ciudad del Este" antes que "Estero
+        Bellaco"), después los que coinciden desde la primera palabra, y dentro
+        de cada grupo departamentos, distritos y barrios.
+        """
+        prefijo = _clave(prefijo)
+        if not prefijo:
+            return []
+        orden_tipo = {DEPARTAMENTO: 0, DISTRITO: 1, BARRIO: 2}
+        encontrados = {}
+        posicion = bisect_left(self._claves, prefijo)
+        while posicion < len(self._claves) and self._claves[posicion].startswith(prefijo):
+            indice = self._ids[posicion]
+            lugar = self.lugares[indice]
+            if tipo is None or lugar[0] == tipo:
+                clave = self._claves[posicion]
+                palabra_entera = len(clave) == len(prefijo) or clave[len(prefijo)] == " "
+                desde_el_inicio = clave in self._nombres and indice in self._nombres[clave]
+                rango = (not palabra_entera, not desde_el_inicio, orden_tipo[lugar[0]], len(clave))
+                if indice not in encontrados or rango < encontrados[indice]:
+                    encontrados[indice] = rango
+            posicion += 1
+        mejores = sorted(encontrados, key=lambda i: (encontrados[i], self.lugares[i][1:]))[:limite]
+        return [self._como_dict(i) for i in mejores]
+
+    def _parecidos(self, clave):
+        """Nombres a pocos errores de tipeo de `clave`: `[(nombre, errores)]`."""
+        tolerados = _errores_tolerados(len(clave))
+        if not tolerados:
+            return []
+        candidatos = set()
+        for variante in _borrados(clave, tolerados):
+            candidatos.update(self._borrados.get(variante, ()))
+        resultado = []
+        for nombre in candidatos:
+            errores = distancia_edicion(clave, nombre)
+            if errores <= min(tolerados, _errores_tolerados(len(nombre))):
+                resultado.append((nombre, errores))
+        return resultado
+
+    def normalizar(self, texto):
+        """
+        Lleva un texto libre a `{"departamento", "distrito", "barrio",
+        "puntaje"}` (None si no reconoce ningún lugar). Con sólo el
+        departamento, `distrito` queda en None. Devuelve una copia: el resultado
+        cacheado se comparte entre todas las llamadas con el mismo texto.
+        """
+        resultado = self._normalizar(_clave(texto))
+        return dict(resultado) if resultado is not None else None
+
+    def _normalizar_clave(self, clave):
+        palabras = clave.split()
+        if not palabras:
+            return None
+
+        # 🔹 Coincidencias exactas de 1 a 6 palabras; se quedan las que no están dentro de otra más larga
+        exactas = []
+        for inicio in range(len(palabras)):
+            for fin in range(min(len(palabras), inicio + PALABRAS_POR_NOMBRE), inicio, -1):
+                nombre = " ".join(palabras[inicio:fin])
+                # 🔹 "barrio obrero" es el barrio Obrero, no el barrio llamado "Barrio Obrero" de otro distrito
+                if palabras[inicio] in _ANUNCIOS and fin > inicio + 1 and not self._es_distrito(nombre):
+                    continue
+                if nombre in self._nombres:
+                    exactas.append((inicio, fin, nombre, 0))
+                    break
+        exactas = [e for e in exactas if not any(o[0] <= e[0] and e[1] <= o[1] and o != e for o in exactas)]
+        coincidencias = list(exactas)
+
+        # 🔹 Con errores de tipeo, sólo si no apareció ningún distrito tal cual
+        if not any(self._es_distrito(nombre) for *_, nombre, _ in exactas):
+            cubiertas = {p for inicio, fin, _, _ in exactas for p in range(inicio, fin)}
+            for inicio in range(len(palabras)):
+                for fin in range(inicio + 1, min(len(palabras), inicio + 3) + 1):
+                    if cubiertas.intersection(range(inicio, fin)):
+                        break
+                    for nombre, errores in self._parecidos(" ".join(palabras[inicio:fin])):
+                        coincidencias.append((inicio, fin, nombre, errores))
+
+        if not coincidencias:
+            return None
+        puntaje_departamento, candidatos = {}, {}
+        for inicio, fin, nombre, errores in coincidencias:
+            anunciado = _ANUNCIOS.get(palabras[inicio - 1]) if inicio else None
+            indices = self._nombres[nombre]
+            # 🔹 "departamento central" es el departamento, no los barrios llamados "Central"
+            if anunciado and any(self.lugares[i][0] == anunciado for i in indices):
+                indices = [i for i in indices if self.lugares[i][0] == anunciado]
+            for indice in indices:
+                tipo, departamento, distrito, barrio = self.lugares[indice]
+                base = (1.0 + 0.25 * (fin - inicio)) / (1 + errores)
+                if anunciado == tipo:
+                    base += 1.0
+                if tipo == DEPARTAMENTO:
+                    puntaje_departamento[departamento] = max(puntaje_departamento.get(departamento, 0), 2 * base)
+                    continue
+                if tipo == DISTRITO:
+                    puntaje = 3 * base
+                else:
+                    # 🔹 Un barrio que existe en muchos distritos ("Central", "San Miguel") pesa poco
+                    puntaje = base / len(indices)
+                actual = candidatos.setdefault((departamento, distrito), [0.0, None])
+                actual[0] += puntaje
+                if tipo == BARRIO and actual[1] is None:
+                    actual[1] = barrio
+
+        if candidatos:
+            mejor = max(candidatos, key=lambda par: (candidatos[par][0] + puntaje_departamento.get(par[0], 0), par))
+            puntaje, barrio = candidatos[mejor]
+            puntaje += puntaje_departamento.get(mejor[0], 0)
+            if puntaje >= PUNTAJE_MINIMO:
+                return {"departamento": mejor[0], "distrito": mejor[1], "barrio": barrio, "puntaje": round(puntaje, 2)}
+        if puntaje_departamento:
+            departamento = max(puntaje_departamento, key=puntaje_departamento.get)
+            return {"departamento": departamento, "distrito": None, "barrio": None,
+                    "puntaje": round(puntaje_departamento[departamento], 2)}
+        return None
+
+    def _es_distrito(self, nombre):
+        return any(self.lugares[i][0] == DISTRITO for i in self._nombres.get(nombre, ()))
+
+    def normalizar_lote(self, textos):
+        """Normaliza un iterable de textos; cada texto distinto se analiza una sola vez."""
+        return [self.normalizar(texto) for texto in textos]
+
+
+def _abrevia(corto, largo):
+    """True si las palabras de `corto` aparecen en orden en `largo`, enteras o abreviadas ("juan e o leary")."""
+    restantes = iter(largo)
+    for palabra in corto:
+        palabra = NUMEROS.get(palabra, palabra)
+        if not any(p == palabra or (len(palabra) <= 4 and p.startswith(palabra)) for p in restantes):
+            return False
+    return True
+
+
+def _mas_parecido(nombre, oficiales):
+    """El nombre oficial que corresponde a `nombre` (igual, abreviado o a pocos errores); None si no hay."""
+    clave = _clave(nombre)
+    por_clave = {_clave(oficial): oficial for oficial in oficiales}
+    if clave in por_clave:
+        return por_clave[clave]
+    palabras = clave.split()
+    compatibles = [o for c, o in por_clave.items() if _abrevia(palabras, c.split()) or _abrevia(c.split(), palabras)]
+    if len(compatibles) == 1:
+        return compatibles[0]
+    errores, oficial = min((distancia_edicion(clave, c), o) for c, o in por_clave.items())
+    return oficial if errores <= (3 if len(clave) >= 8 else 1) else None
+
+
+CONSULTA_LUGARES = """
+    SELECT 'denuncias' AS tabla, id, lugar_hecho AS texto FROM denuncias WHERE lugar_hecho IS NOT NULL
+    UNION ALL
+    SELECT 'denunciantes', id, domicilio FROM denunciantes WHERE domicilio IS NOT NULL
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nomenclador geográfico del Paraguay.")
+    parser.add_argument("--nomenclador", help="Nomenclador compilado (si no, se compila al vuelo)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p = sub.add_parser("compilar", help="Compilar paraguay.csv y barrios.ts")
+    p.add_argument("salida")
+    p = sub.add_parser("sugerir", help="Autocompletar un prefijo")
+    p.add_argument("prefijo")
+    p.add_argument("--tipo", choices=(DEPARTAMENTO, DISTRITO, BARRIO))
+    p.add_argument("--limite", type=int, default=MAXIMO_SUGERENCIAS)
+    p = sub.add_parser("normalizar", help="Normalizar un texto libre")
+    p.add_argument("texto")
+    p = sub.add_parser("lote", help="Normalizar lugares del hecho y domicilios")
+    p.add_argument("--archivo", help="Un lugar por línea (si no, se lee la base)")
+    p.add_argument("--dsn", default=os.environ.get("DATABASE_URL") or os.environ.get("POSTGRES_URL"))
+    p.add_argument("--salida", required=True, help="CSV de salida")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    nomenclador = Nomenclador.abrir(args.nomenclador) if args.nomenclador else Nomenclador.compilar()
+    if args.comando == "compilar":
+        nomenclador.guardar(args.salida)
+        print(f"✅ {len(nomenclador.lugares)} lugares compilados en {time.perf_counter() - inicio:.2f}s")
+    elif args.comando == "sugerir":
+        for lugar in nomenclador.sugerir(args.prefijo, args.limite, args.tipo):
+            nombre = " / ".join(v for v in (lugar["departamento"], lugar["distrito"], lugar["barrio"]) if v)
+            print(nombre, f"({lugar['tipo']})")
+    elif args.comando == "normalizar":
+        print(json.dumps(nomenclador.normalizar(args.texto), ensure_ascii=False))
+    else:
+        if args.archivo:
+            with open(args.archivo, encoding="utf-8") as f:
+                filas = [("archivo", numero, linea.strip()) for numero, linea in enumerate(f, 1) if linea.strip()]
+        elif args.dsn:
+            import psycopg2
+
+            conexion = psycopg2.connect(args.dsn)
+            try:
+                with conexion.cursor() as cursor:
+                    cursor.execute(CONSULTA_LUGARES)
+                    filas = cursor.fetchall()
+            finally:
+                conexion.close()
+        else:
+            print("❌ Indicar --archivo o --dsn (o DATABASE_URL)", file=sys.stderr)
+            return 1
+        inicio = time.perf_counter()
+        resultados = nomenclador.normalizar_lote(texto for _, _, texto in filas)
+        reconocidos = 0
+        with open(args.salida, "w", encoding="utf-8", newline="") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(["tabla", "id", "texto", "departamento", "distrito", "barrio", "puntaje"])
+            for (tabla, id_fila, texto), r in zip(filas, resultados):
+                r = r or {}
+                reconocidos += bool(r.get("distrito"))
+                escritor.writerow([tabla, id_fila, texto, r.get("departamento"), r.get("distrito"),
+                                   r.get("barrio"), r.get("puntaje")])
+        duracion = time.perf_counter() - inicio
+        print(f"✅ {len(filas)} lugares en {duracion:.2f}s, {reconocidos} con distrito → {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""Paquete de impresión: varias actas en un solo PDF.
+
+Al cierre del turno se imprimen todas las actas del día. En lugar de N PDF
+independientes (cada uno con sus propios logos), el paquete dibuja todas las
+actas sobre un mismo documento: los logos, las formas del encabezado y las
+fuentes se incluyen una sola vez y todas las páginas los referencian. Cada acta
+tiene su marcador con el número de orden.
+
+    python paquete_impresion.py actas_del_dia.jsonl --salida turno.pdf
+    python paquete_impresion.py actas_del_dia.jsonl --salida turno.pdf --actas-por-tomo 300
+
+ReportLab arma el documento completo en memoria antes de escribirlo; para que
+la memoria no crezca con el lote, `--actas-por-tomo` reparte el paquete en
+varios archivos (turno_001.pdf, turno_002.pdf, ...) y cada tomo se escribe y se
+libera antes de empezar el siguiente. La entrada se lee de a un registro.
+"""
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+
+from reportlab.lib.pagesizes import legal
+from reportlab.pdfgen import canvas
+
+from cache_vista_previa import CacheLRU
+from generar_pdf import RenderizadorActas
+
+# 🔹 Cada cuántas actas se renueva el canvas de ensayo (se descarta sin guardarse)
+ACTAS_POR_ENSAYO = 50
+
+
+class EscritorPaquete:
+    """
+    Dibuja actas una tras otra sobre un único canvas y lo guarda al cerrar.
+
+    `destino` es una ruta o un archivo binario abierto.
+
+    Cada acta se dibuja primero en un canvas de ensayo que nunca se guarda: si
+    falla, la excepción se propaga sin haber tocado el paquete, que puede seguir
+    con la siguiente. Los párrafos maquetados en el ensayo se reutilizan al
+    dibujar el acta en el paquete, así la segunda pasada sale más barata.
+    """
+
+    def __init__(self, destino, renderizador=None, vista_previa=False, titulo="Actas de denuncia"):
+        self.renderizador = renderizador or RenderizadorActas()
+        self.vista_previa = vista_previa
+        self.actas = 0
+        self.paginas = 0
+        self._canvas = canvas.Canvas(destino, pagesize=legal)
+        self._canvas.setTitle(titulo)
+        self._canvas.showOutline()  # 🔹 Abrir el visor con los marcadores a la vista
+        self._ensayo = None
+        self._ensayos = 0
+        self._maquetas = CacheLRU(max_entradas=64)
+
+    def _ensayar(self, numero_orden, denunciante, datos_denuncia):
+        """Dibuja el acta en el canvas de ensayo; levanta la excepción del acta si es inválida."""
+        if self._ensayo is None or self._ensayos == ACTAS_POR_ENSAYO:
+            # 🔹 Un canvas por acta repetiría la definición de logos y encabezados; uno solo acumularía páginas
+            self._ensayo, self._ensayos = canvas.Canvas(BytesIO(), pagesize=legal), 0
+        self._ensayos += 1
+        try:
+            self.renderizador.dibujar(self._ensayo, numero_orden, denunciante, datos_denuncia, self.vista_previa,
+                                      maquetas=self._maquetas)
+        except Exception:
+            self._ensayo = None  # 🔹 Quedó a medio dibujar: el próximo ensayo empieza en uno nuevo
+            raise
+        self._ensayo.showPage()
+
+    def agregar(self, numero_orden, denunciante, datos_denuncia):
+        """
+        Agrega un acta (empieza siempre en una página nueva) con su marcador. Si
+        el acta es inválida levanta la excepción y el paquete queda como estaba.
+        """
+        self._ensayar(numero_orden, denunciante, datos_denuncia)
+        c = self._canvas
+        clave = f"acta{self.actas}"
+        pagina_inicial = c.getPageNumber()
+        c.bookmarkPage(clave)
+        self.renderizador.dibujar(c, numero_orden, denunciante, datos_denuncia, self.vista_previa,
+                                  maquetas=self._maquetas)
+        c.showPage()
+        c.addOutlineEntry(f"Acta Nº {numero_orden if numero_orden is not None else self.actas + 1}", clave, level=0)
+        self.actas += 1
+        self.paginas += c.getPageNumber() - pagina_inicial
+
+    def cerrar(self):
+        """Escribe el documento en el destino."""
+        self._canvas.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *exc):
+        if tipo is None:
+            self.cerrar()
+
+
+def _ruta_tomo(ruta, numero):
+    base, extension = os.path.splitext(ruta)
+    return f"{base}_{numero:03d}{extension or '.pdf'}"
+
+
+def generar_paquete(registros, ruta_salida, actas_por_tomo=None, vista_previa=False, renderizador=None):
+    """
+    Escribe los registros (dicts con ``numero_orden``, ``denunciante`` y
+    ``datos_denuncia``, o tuplas con esos tres valores) en un paquete PDF.
+
+    Con ``actas_por_tomo`` el paquete se reparte en varios archivos numerados.
+    Cada archivo se escribe primero con extensión ``.parcial`` y se renombra al
+    terminar, así nunca queda un PDF a medias.
+
+    Un acta inválida no aborta el paquete (igual que en `generar_lote`): se la
+    saltea y se informa (`EscritorPaquete` la ensaya antes de tocar el tomo).
+    Devuelve `(tomos, fallidas)`: los `(ruta, actas, paginas)` escritos y los
+    `(indice, numero_orden, error)` de las actas salteadas.
+    """
+    renderizador = renderizador or RenderizadorActas()
+    tomos, fallidas = [], []
+    escritor = ruta = None
+
+    def abrir():
+        nonlocal escritor, ruta
+        ruta = _ruta_tomo(ruta_salida, len(tomos) + 1) if actas_por_tomo else ruta_salida
+        escritor = EscritorPaquete(ruta + ".parcial", renderizador, vista_previa)
+
+    def cerrar():
+        nonlocal escritor
+        escritor.cerrar()
+        os.replace(ruta + ".parcial", ruta)
+        tomos.append((ruta, escritor.actas, escritor.paginas))
+        escritor = None
+
+    try:
+        for indice, registro in enumerate(registros):
+            if not isinstance(registro, dict):
+                try:
+                    numero_orden, denunciante, datos_denuncia = registro
+                except (TypeError, ValueError) as e:
+                    fallidas.append((indice, None, f"{type(e).__name__}: {e}"))
+                    continue
+                registro = {"numero_orden": numero_orden, "denunciante": denunciante, "datos_denuncia": datos_denuncia}
+            if escritor is None:
+                abrir()
+            try:
+                escritor.agregar(registro.get("numero_orden"), registro["denunciante"], registro["datos_denuncia"])
+            except Exception as e:
+                fallidas.append((indice, registro.get("numero_orden"), f"{type(e).__name__}: {e}"))
+                continue
+            if actas_por_tomo and escritor.actas >= actas_por_tomo:
+                cerrar()
+        if escritor is not None and escritor.actas:
+            cerrar()
+    finally:
+        if escritor is not None and os.path.exists(ruta + ".parcial"):
+            os.remove(ruta + ".parcial")
+    return tomos, fallidas
+
+
+def main(argv=None):
+    from generar_pdf_lote import leer_registros
+
+    parser = argparse.ArgumentParser(description="Genera un paquete de impresión con varias actas en un solo PDF.")
+    parser.add_argument("entrada", help="Archivo JSON o JSON lines con los registros ('-' para stdin)")
+    parser.add_argument("--salida", required=True, help="Archivo PDF de salida")
+    parser.add_argument("--actas-por-tomo", type=int, default=None, help="Repartir el paquete en archivos de N actas")
+    parser.add_argument("--vista-previa", action="store_true", help="Genera las actas en modo vista previa")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    try:
+        tomos, fallidas = generar_paquete(leer_registros(args.entrada), args.salida, args.actas_por_tomo,
+                                          args.vista_previa)
+    except ValueError as e:  # 🔹 Entrada que no es JSON válido
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    duracion = time.perf_counter() - inicio
+    for indice, numero_orden, error in fallidas:
+        print(f"⚠ Acta {numero_orden} (registro {indice}): {error}", file=sys.stderr)
+    for ruta, actas, paginas in tomos:
+        print(f"✅ {ruta}: {actas} actas, {paginas} páginas, {os.path.getsize(ruta) / 1024:.0f} KB")
+    total = sum(actas for _, actas, _ in tomos)
+    print(f"   {total}/{total + len(fallidas)} actas en {duracion:.1f}s")
+    return 1 if fallidas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
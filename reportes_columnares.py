@@ -0,0 +1,660 @@
+"""Agregaciones de los reportes sobre columnas en memoria (numpy).
+
+Cada carga del tablero dispara en `/api/reportes/*` varios GROUP BY contra la
+tabla `denuncias`. Este módulo mantiene las denuncias completadas en columnas:
+
+- textos repetidos codificados con diccionario (oficina, tipo, operador,
+  departamento = `dependencia_remitida`, moneda, banco, lugar del hecho): cada
+  columna es un arreglo de enteros y el texto se guarda una sola vez;
+- fechas como días desde 1970 (int32), con el mes precalculado; hora como int8;
+- `monto_dano` como int64 (las sumas son exactas), con una máscara aparte
+  para distinguir NULL de 0 (`denunciasConMonto` cuenta los no nulos).
+
+Los reportes (`estadisticas_generales`, `por_tipo`, `por_operadores`,
+`temporales`, `geograficos`, `mensual`, `departamentos`) devuelven las mismas
+claves que las rutas. Un filtro de fechas/oficina es una máscara booleana y
+cada agrupación un `np.bincount`, sin recorrer filas en Python.
+
+    python reportes_columnares.py servir --puerto 8095           # usa DATABASE_URL
+    curl "localhost:8095/reportes/por-tipo?fechaInicio=2026-01-01&oficina=Asunción"
+
+`sincronizar` pone las columnas al día comparando `(id, hash)` con la base,
+como `entidades_relatos`: las denuncias nuevas o cambiadas se agregan y las
+anteriores se marcan como borradas. Lo que necesita filas individuales o
+tablas aparte (denunciantes recurrentes, detalle de daños, visitas) sigue en
+SQL.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from texto_relatos import denuncias_desde_cursor
+
+TIPOS_OTRO = ("OTRO", "Otro (Especificar)")
+
+# 📌 Columnas numéricas y su tipo; las de texto van codificadas con diccionario (int32)
+ENTEROS = {"id": np.int64, "orden": np.int32, "fecha": np.int32, "mes": np.int32, "hora": np.int8,
+           "usuario": np.int32, "monto": np.int64}
+REALES = ("latitud", "longitud")
+CODIFICADAS = ("tipo", "especifico", "oficina", "operador", "departamento", "moneda", "banco", "lugar")
+
+DIAS_SEMANA = ("Domingo", "Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado")
+
+CONSULTA_HASHES = "SELECT id, hash FROM denuncias WHERE estado = 'completada'"
+CONSULTA_USUARIOS = "SELECT id, nombre, apellido, grado FROM usuarios"
+CONSULTA_DENUNCIAS = """
+SELECT id, hash, orden, fecha_denuncia, hora_denuncia, tipo_denuncia, otro_tipo, oficina, usuario_id,
+       operador_grado, operador_nombre, operador_apellido, monto_dano, moneda, lugar_hecho, latitud,
+       longitud, entidad_bancaria_vulnerada, dependencia_remitida
+FROM denuncias
+WHERE estado = 'completada' AND id = ANY(%s)
+"""
+
+
+class Diccionario:
+    """Textos ↔ códigos enteros; el código de un texto no cambia una vez asignado."""
+
+    def __init__(self):
+        self.valores = []
+        self._codigos = {}
+
+    def codificar(self, valores):
+        codigos = self._codigos
+        resultado = np.empty(len(valores), dtype=np.int32)
+        for i, valor in enumerate(valores):
+            codigo = codigos.get(valor)
+            if codigo is None:
+                codigo = codigos[valor] = len(self.valores)
+                self.valores.append(valor)
+            resultado[i] = codigo
+        return resultado
+
+    def codigo(self, valor):
+        """Código de `valor`, o -1 si nunca apareció (un filtro por él no devuelve nada)."""
+        return self._codigos.get(valor, -1)
+
+    def __len__(self):
+        return len(self.valores)
+
+
+def _tipo(denuncia):
+    """El tipo como lo muestran los reportes: las denuncias OTRO, por su `otro_tipo`."""
+    tipo = denuncia.get("tipo_denuncia")
+    if tipo is None:
+        return "Sin tipo"
+    if tipo in TIPOS_OTRO:
+        return (denuncia.get("otro_tipo") or "").strip() or "Otro (Especificar)"
+    return tipo
+
+
+def _texto(valor):
+    valor = (valor or "").strip()
+    return valor or None
+
+
+def _nombre_completo(nombre, apellido):
+    """`nombre || ' ' || apellido` de PostgreSQL: NULL si falta cualquiera de los dos."""
+    if nombre is None or apellido is None:
+        return None
+    return f"{nombre} {apellido}"
+
+
+def _hora(valor):
+    try:
+        return int(str(valor).split(":")[0])
+    except (TypeError, ValueError):
+        return -1
+
+
+def _fecha_texto(dias):
+    return str(np.datetime64(int(dias), "D"))
+
+
+def _mes_texto(meses):
+    return str(np.datetime64(int(meses), "M")) + "-01"
+
+
+def _dias(fecha):
+    """Días desde 1970 de un `date` o un texto 'YYYY-MM-DD'."""
+    if isinstance(fecha, str):
+        fecha = date.fromisoformat(fecha[:10])
+    return (fecha - date(1970, 1, 1)).days
+
+
+def _mayores(conteos, limite=None):
+    """Códigos con conteo, de mayor a menor."""
+    codigos = np.flatnonzero(conteos)
+    return codigos[np.argsort(-conteos[codigos], kind="stable")][:limite]
+
+
+def _ranking(conteos, valores, limite=None, clave="cantidad", nombre="tipo"):
+    """Filas `{nombre: valor, clave: n}` de los códigos con conteo, de mayor a menor."""
+    return [{nombre: valores[c], clave: int(conteos[c])} for c in _mayores(conteos, limite)]
+
+
+class _Vista(dict):
+    """Columnas filtradas por una máscara; cada columna se filtra recién cuando se la pide."""
+
+    def __init__(self, columnas, mascara=None):
+        super().__init__()
+        self._columnas = columnas
+        self._mascara = mascara
+
+    def __missing__(self, nombre):
+        columna = self._columnas[nombre]
+        if self._mascara is not None:
+            columna = columna[self._mascara]
+        self[nombre] = columna
+        return columna
+
+
+class DenunciasColumnares:
+    """Denuncias completadas en columnas numpy, con los reportes como métodos."""
+
+    def __init__(self):
+        self.diccionarios = {nombre: Diccionario() for nombre in CODIFICADAS}
+        self._nombre_usuario = {}   # usuario_id -> (grado, nombre_completo) según la denuncia
+        self._usuarios = {}         # usuario_id -> (grado, nombre_completo) según `usuarios`
+        self._hashes = {}
+        self._fila = {}
+        self._lock = threading.Lock()
+        vacias = {nombre: np.empty(0, dtype=tipo) for nombre, tipo in ENTEROS.items()}
+        vacias.update({nombre: np.empty(0, dtype=np.float64) for nombre in REALES})
+        vacias.update({nombre: np.empty(0, dtype=np.int32) for nombre in CODIFICADAS})
+        vacias["vigente"] = np.empty(0, dtype=bool)
+        vacias["con_monto"] = np.empty(0, dtype=bool)
+        # 🔹 Las consultas toman este dict una vez; las cargas arman uno nuevo y lo reemplazan,
+        # así leer no necesita lock
+        self._columnas = vacias
+
+    def __len__(self):
+        return len(self._hashes)
+
+    # ------------------------------------------------------------------ carga
+
+    def cargar(self, denuncias):
+        """
+        Agrega o reemplaza denuncias (dicts con las columnas de `CONSULTA_DENUNCIAS`).
+        Devuelve cuántas se cargaron.
+        """
+        denuncias = list(denuncias)
+        if not denuncias:
+            return 0
+        d = self.diccionarios
+        nuevas = {
+            "id": np.array([x["id"] for x in denuncias], dtype=np.int64),
+            "orden": np.array([x.get("orden") or 0 for x in denuncias], dtype=np.int32),
+            "hora": np.array([_hora(x.get("hora_denuncia")) for x in denuncias], dtype=np.int8),
+            "usuario": np.array([x.get("usuario_id") or 0 for x in denuncias], dtype=np.int32),
+            "monto": np.array([x.get("monto_dano") or 0 for x in denuncias], dtype=np.int64),
+            "con_monto": np.array([x.get("monto_dano") is not None for x in denuncias], dtype=bool),
+            "latitud": np.array([np.nan if x.get("latitud") is None else float(x["latitud"]) for x in denuncias]),
+            "longitud": np.array([np.nan if x.get("longitud") is None else float(x["longitud"]) for x in denuncias]),
+            "tipo": d["tipo"].codificar([_tipo(x) for x in denuncias]),
+            "especifico": d["especifico"].codificar([x.get("tipo_denuncia") for x in denuncias]),
+            "oficina": d["oficina"].codificar([x.get("oficina") for x in denuncias]),
+            "departamento": d["departamento"].codificar([_texto(x.get("dependencia_remitida")) for x in denuncias]),
+            "moneda": d["moneda"].codificar([_texto(x.get("moneda")) for x in denuncias]),
+            "banco": d["banco"].codificar([_texto(x.get("entidad_bancaria_vulnerada")) for x in denuncias]),
+            "lugar": d["lugar"].codificar([x.get("lugar_hecho") for x in denuncias]),
+        }
+        operadores = [" ".join(filter(None, (x.get("operador_grado"), x.get("operador_nombre"),
+                                             x.get("operador_apellido")))) for x in denuncias]
+        nuevas["operador"] = d["operador"].codificar(operadores)
+        fechas = np.array([x["fecha_denuncia"] for x in denuncias], dtype="datetime64[D]")
+        nuevas["fecha"] = fechas.astype(np.int32)
+        nuevas["mes"] = fechas.astype("datetime64[M]").astype(np.int32)
+        nuevas["vigente"] = np.ones(len(denuncias), dtype=bool)
+
+        with self._lock:
+            columnas = self._columnas
+            vigente = columnas["vigente"].copy()
+            reemplazadas = [self._fila[i] for i in nuevas["id"].tolist() if i in self._fila]
+            vigente[reemplazadas] = False
+            inicio = len(vigente)
+            columnas = {nombre: np.concatenate((vigente if nombre == "vigente" else columnas[nombre], nuevas[nombre]))
+                        for nombre in columnas}
+            for posicion, denuncia in enumerate(denuncias):
+                self._fila[denuncia["id"]] = inicio + posicion
+                self._hashes[denuncia["id"]] = denuncia.get("hash")
+            for denuncia in denuncias:
+                if denuncia.get("usuario_id"):
+                    self._nombre_usuario[denuncia["usuario_id"]] = (
+                        denuncia.get("operador_grado"),
+                        _nombre_completo(denuncia.get("operador_nombre"), denuncia.get("operador_apellido")))
+            self._columnas = self._compactar(columnas)
+        return len(denuncias)
+
+    def cargar_usuarios(self, usuarios):
+        """
+        Nombres de los operadores como los muestra `/api/reportes/por-operadores`
+        (`usuarios.nombre || ' ' || usuarios.apellido` y `usuarios.grado`):
+        filas `(id, nombre, apellido, grado)`.
+        """
+        self._usuarios = {id_: (grado, _nombre_completo(nombre, apellido)) for id_, nombre, apellido, grado in usuarios}
+
+    def eliminar(self, ids):
+        """Saca denuncias (que dejaron de estar completadas o se borraron)."""
+        with self._lock:
+            columnas = dict(self._columnas)
+            vigente = columnas["vigente"].copy()
+            for i in ids:
+                fila = self._fila.pop(i, None)
+                self._hashes.pop(i, None)
+                if fila is not None:
+                    vigente[fila] = False
+            columnas["vigente"] = vigente
+            self._columnas = self._compactar(columnas)
+
+    def _compactar(self, columnas):
+        """Con más de un cuarto de filas borradas, reescribe las columnas sin ellas."""
+        vigente = columnas["vigente"]
+        if len(vigente) < 1024 or vigente.sum() > 0.75 * len(vigente):
+            return columnas
+        columnas = {nombre: columna[vigente] for nombre, columna in columnas.items()}
+        self._fila = {int(i): fila for fila, i in enumerate(columnas["id"].tolist())}
+        return columnas
+
+    def sincronizar(self, conexion, tamano_lote=5000):
+        """
+        Pone las columnas (y los nombres de `usuarios`) al día con la base
+        (PostgreSQL, estilo psycopg2). Devuelve `(cargadas, quitadas)`.
+        """
+        with conexion.cursor() as cursor:
+            cursor.execute(CONSULTA_USUARIOS)
+            self.cargar_usuarios(cursor.fetchall())
+            cursor.execute(CONSULTA_HASHES)
+            actuales = dict(cursor.fetchall())
+        sobrantes = [i for i in self._hashes if i not in actuales]
+        if sobrantes:
+            self.eliminar(sobrantes)
+        cambiadas = sorted(i for i, h in actuales.items() if self._hashes.get(i, ...) != h)
+        cargadas = 0
+        for inicio in range(0, len(cambiadas), tamano_lote):
+            with conexion.cursor() as cursor:
+                cursor.execute(CONSULTA_DENUNCIAS, (cambiadas[inicio:inicio + tamano_lote],))
+                cargadas += self.cargar(denuncias_desde_cursor(cursor, tamano_lote))
+        return cargadas, len(sobrantes)
+
+    # --------------------------------------------------------------- filtros
+
+    def _filtrar(self, fecha_inicio=None, fecha_fin=None, oficina=None, tipo=None):
+        """Columnas vigentes que cumplen el filtro (como el WHERE de las rutas)."""
+        columnas = self._columnas
+        mascara = columnas["vigente"].copy()
+        if fecha_inicio:
+            mascara &= columnas["fecha"] >= _dias(fecha_inicio)
+        if fecha_fin:
+            mascara &= columnas["fecha"] <= _dias(fecha_fin)
+        if oficina:
+            mascara &= columnas["oficina"] == self.diccionarios["oficina"].codigo(oficina)
+        if tipo:
+            mascara &= columnas["especifico"] == self.diccionarios["especifico"].codigo(tipo)
+        return _Vista(columnas, None if mascara.all() else mascara)
+
+    def _contar(self, columnas, nombre):
+        return np.bincount(columnas[nombre], minlength=len(self.diccionarios[nombre]))
+
+    def _contar_pares(self, columnas, a, b):
+        """Conteos por combinación de dos columnas codificadas: `[(codigo_a, codigo_b, n)]`."""
+        tamano_b = max(len(self.diccionarios[b]), 1)
+        claves = columnas[a].astype(np.int64) * tamano_b + columnas[b]
+        claves, conteos = np.unique(claves, return_counts=True)
+        return [(int(c // tamano_b), int(c % tamano_b), int(n)) for c, n in zip(claves, conteos)]
+
+    # -------------------------------------------------------------- reportes
+
+    def estadisticas_generales(self, fecha_inicio=None, fecha_fin=None, oficina=None, tipo_denuncia=None):
+        """`/api/reportes/estadisticas-generales`."""
+        c = self._filtrar(fecha_inicio, fecha_fin, oficina, tipo_denuncia)
+        valores = self.diccionarios
+        por_dia = self._por_dia(c)
+        dias_semana = np.bincount((c["fecha"] + 4) % 7, minlength=7)  # 🔹 1970-01-01 fue jueves
+        horas = np.bincount(c["hora"][c["hora"] >= 0], minlength=24)
+        return {
+            "total": len(c["id"]),
+            "porPeriodo": [{"fecha": f, "cantidad": n} for f, n in por_dia[::-1][:30]],
+            "porOficina": _ranking(self._contar(c, "oficina"), valores["oficina"].valores, nombre="oficina"),
+            "porTipo": _ranking(self._contar(c, "tipo"), valores["tipo"].valores, 20),
+            "porEstado": [{"estado": "completada", "cantidad": len(c["id"])}] if len(c["id"]) else [],
+            "montoTotal": int(c["monto"].sum()),
+            "denunciasConMonto": int(np.count_nonzero(c["con_monto"])),  # monto_dano IS NOT NULL
+            "porDiaSemana": [{"dia_semana": d, "nombre_dia": DIAS_SEMANA[d], "cantidad": int(n)}
+                             for d, n in enumerate(dias_semana) if n],
+            "porHora": [{"hora": h, "cantidad": int(n)} for h, n in enumerate(horas) if n],
+        }
+
+    def por_tipo(self, fecha_inicio=None, fecha_fin=None, oficina=None, hoy=None):
+        """`/api/reportes/por-tipo`."""
+        c = self._filtrar(fecha_inicio, fecha_fin, oficina)
+        tipos = self.diccionarios["tipo"].valores
+        conteos = self._contar(c, "tipo")
+        total = len(c["id"]) or 1
+        distribucion = [dict(fila, porcentaje=round(fila["cantidad"] * 100.0 / total, 2))
+                        for fila in _ranking(conteos, tipos)]
+
+        desde = _dias(hoy or date.today()) - 30
+        recientes = _Vista(c, c["fecha"] >= desde)
+        evolucion = self._contar_pares_fecha(recientes, "tipo")
+
+        oficinas = self.diccionarios["oficina"].valores
+        por_oficina = sorted(self._contar_pares(c, "oficina", "tipo"), key=lambda p: (str(oficinas[p[0]]), -p[2]))
+
+        # 🔹 Primera y última fecha de cada tipo sin agrupar fila por fila
+        primera = np.full(len(tipos), np.iinfo(np.int32).max, dtype=np.int32)
+        ultima = np.full(len(tipos), np.iinfo(np.int32).min, dtype=np.int32)
+        np.minimum.at(primera, c["tipo"], c["fecha"])
+        np.maximum.at(ultima, c["tipo"], c["fecha"])
+        top = [{"tipo": tipos[t], "cantidad": int(conteos[t]), "primera_denuncia": _fecha_texto(primera[t]),
+                "ultima_denuncia": _fecha_texto(ultima[t])} for t in _mayores(conteos, 10)]
+        return {
+            "distribucion": distribucion,
+            "evolucion": [{"fecha": f, "tipo": tipos[t], "cantidad": n} for f, t, n in evolucion],
+            "tiposPorOficina": [{"oficina": oficinas[o], "tipo": tipos[t], "cantidad": n} for o, t, n in por_oficina],
+            "topTipos": top,
+        }
+
+    def por_operadores(self, fecha_inicio=None, fecha_fin=None, oficina=None):
+        """`/api/reportes/por-operadores` (sin las consultas, que salen de `visitas_denuncias`)."""
+        c = self._filtrar(fecha_inicio, fecha_fin, oficina)
+        oficinas = self.diccionarios["oficina"].valores
+        tamano = max(len(oficinas), 1)
+        claves, conteos = np.unique(c["usuario"].astype(np.int64) * tamano + c["oficina"], return_counts=True)
+        orden = np.argsort(-conteos, kind="stable")[:20]
+        top = []
+        for clave, cantidad in zip(claves[orden].tolist(), conteos[orden].tolist()):
+            usuario = clave // tamano
+            # 🔹 Como el LEFT JOIN de la ruta; sin la tabla usuarios cargada, el nombre de la denuncia
+            nombres = self._usuarios if self._usuarios else self._nombre_usuario
+            grado, nombre = nombres.get(usuario, (None, None))
+            top.append({"usuario_id": usuario or None, "nombre_completo": nombre, "grado": grado,
+                        "oficina": oficinas[clave % tamano], "total_denuncias": cantidad})
+
+        operadores = len(np.unique(c["usuario"][c["usuario"] > 0]))
+        total = len(c["id"])
+        # 🔹 Operadores distintos por oficina: pares (oficina, usuario) únicos contados por oficina
+        pares = self._pares_unicos(c, "oficina", "usuario")
+        por_oficina = self._contar(c, "oficina")
+        distintos = np.bincount((pares >> 32).astype(np.int64), minlength=len(oficinas))
+        comparativa = []
+        for o in _mayores(por_oficina):
+            promedio = round(float(por_oficina[o] / distintos[o]), 2) if distintos[o] else None
+            comparativa.append({"oficina": oficinas[o], "operadores": int(distintos[o]),
+                                "total_denuncias": int(por_oficina[o]), "promedio_por_operador": promedio})
+        return {
+            "topOperadores": top,
+            "promedio": {"total_operadores": operadores, "total_denuncias": total,
+                         "promedio": round(total / operadores, 2) if operadores else None},
+            "comparativaOficinas": comparativa,
+        }
+
+    def temporales(self, fecha_inicio=None, fecha_fin=None, oficina=None, hoy=None):
+        """`/api/reportes/temporales`."""
+        c = self._filtrar(fecha_inicio, fecha_fin, oficina)
+        meses = []
+        if len(c["mes"]):
+            base = int(c["mes"].min())
+            conteos = np.bincount(c["mes"] - base)
+            meses = [(base + m, int(n)) for m, n in enumerate(conteos) if n]
+        tendencias, anterior = [], None
+        for mes, cantidad in meses:
+            fila = {"mes": _mes_texto(mes), "cantidad": cantidad, "cantidad_anterior": anterior,
+                    "diferencia": None if anterior is None else cantidad - anterior, "tendencia": None}
+            if anterior is not None:
+                fila["tendencia"] = "crecimiento" if cantidad > anterior else "descenso" if cantidad < anterior \
+                    else "estable"
+            tendencias.append(fila)
+            anterior = cantidad
+        anios = {}
+        for mes, cantidad in meses:
+            anios[1970 + mes // 12] = anios.get(1970 + mes // 12, 0) + cantidad
+        por_dia = self._por_dia(c)
+        hoy = _fecha_texto(_dias(hoy or date.today()))
+        return {
+            "mesAMes": [{"mes": _mes_texto(m), "cantidad": n} for m, n in meses[::-1][:12]],
+            "añoAAño": [{"año": a, "cantidad": n} for a, n in sorted(anios.items(), reverse=True)],
+            "tendencias": tendencias[::-1][:12],
+            "diaActualVsPromedio": {
+                "hoy": dict(por_dia).get(hoy),
+                "promedio": round(sum(n for _, n in por_dia) / len(por_dia), 2) if por_dia else None,
+                "total_dias": len(por_dia),
+            },
+        }
+
+    def geograficos(self, fecha_inicio=None, fecha_fin=None, oficina=None):
+        """`/api/reportes/geograficos`."""
+        c = self._filtrar(fecha_inicio, fecha_fin, oficina)
+        lugares = self.diccionarios["lugar"].valores
+        conteos = self._contar(c, "lugar")
+        nulo = self.diccionarios["lugar"].codigo(None)
+        if nulo >= 0:
+            conteos[nulo] = 0
+        con_gps = ~(np.isnan(c["latitud"]) | np.isnan(c["longitud"]))
+        filas = np.flatnonzero(con_gps)
+        filas = filas[np.argsort(-c["fecha"][filas], kind="stable")][:1000]
+        especificos = self.diccionarios["especifico"].valores
+        coordenadas = [{"id": int(c["id"][f]), "orden": int(c["orden"][f]), "lugar_hecho": lugares[c["lugar"][f]],
+                        "latitud": float(c["latitud"][f]), "longitud": float(c["longitud"][f]),
+                        "tipo_denuncia": especificos[c["especifico"][f]],
+                        "fecha_denuncia": _fecha_texto(c["fecha"][f])} for f in filas]
+
+        # 🔹 Zonas: coordenadas redondeadas a 2 decimales (como ROUND de PostgreSQL, alejándose del cero)
+        def redondear(valores):
+            return (np.sign(valores) * np.floor(np.abs(valores) * 100 + 0.5)).astype(np.int64)
+
+        latitudes, longitudes = redondear(c["latitud"][con_gps]), redondear(c["longitud"][con_gps])
+        claves, cantidades = np.unique((latitudes + 9000) * 100000 + (longitudes + 18000), return_counts=True)
+        orden = np.argsort(-cantidades, kind="stable")[:20]
+        zonas = [{"lat_redondeada": (int(k) // 100000 - 9000) / 100, "lon_redondeada": (int(k) % 100000 - 18000) / 100,
+                  "cantidad": int(n)} for k, n in zip(claves[orden], cantidades[orden])]
+        return {
+            "porLugar": _ranking(conteos, lugares, 50, nombre="lugar_hecho"),
+            "conCoordenadas": coordenadas,
+            "zonasConcentracion": zonas,
+        }
+
+    def mensual(self, anio, mes):
+        """Las agregaciones de `/api/reportes/mensual` (el detalle por denuncia sigue en SQL)."""
+        primer_dia = date(int(anio), int(mes), 1)
+        ultimo_dia = (primer_dia.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        c = self._filtrar(primer_dia.isoformat(), ultimo_dia.isoformat())
+        especificos = ["SIN ESPECIFICAR" if v is None else v for v in self.diccionarios["especifico"].valores]
+        conteos = self._contar(c, "especifico")
+
+        generales = {}
+        capitulos = _capitulos()
+        for fila in _ranking(conteos, especificos):
+            capitulo = capitulos.get(fila["tipo"].lower().strip()) or fila["tipo"]
+            generales[capitulo] = generales.get(capitulo, 0) + fila["cantidad"]
+
+        por_dia = np.bincount(c["fecha"] - _dias(primer_dia), minlength=ultimo_dia.day)
+        con_dano = c["monto"] > 0
+        monedas = self.diccionarios["moneda"]
+        danos = np.zeros(len(monedas), dtype=np.int64)
+        np.add.at(danos, c["moneda"][con_dano], c["monto"][con_dano])
+        if monedas.codigo(None) >= 0:
+            danos[monedas.codigo(None)] = 0
+
+        bancos = self.diccionarios["banco"]
+        por_banco = self._contar(c, "banco")
+        montos_banco = np.zeros(len(bancos), dtype=np.int64)
+        np.add.at(montos_banco, c["banco"][con_dano], c["monto"][con_dano])
+        if bancos.codigo(None) >= 0:
+            por_banco[bancos.codigo(None)] = 0
+        orden_bancos = [b for b in np.lexsort((-montos_banco, -por_banco)) if por_banco[b]]
+        return {
+            "resumen_especifico": [{"tipo": f["tipo"], "total": f["cantidad"]} for f in _ranking(conteos, especificos)],
+            "resumen_general": [{"tipo": t, "total": n} for t, n in sorted(generales.items(), key=lambda x: -x[1])],
+            "evolucion_diaria": [{"fecha": (primer_dia + timedelta(days=d)).isoformat(), "dia": d + 1,
+                                  "total": int(por_dia[d])} for d in range(ultimo_dia.day)],
+            "resumen_danos": _ranking(danos, monedas.valores, clave="total", nombre="moneda"),
+            "top_operadores": _ranking(self._contar(c, "operador"), self.diccionarios["operador"].valores, 5,
+                                       clave="total", nombre="operador"),
+            "bancos_afectados": [{"banco": bancos.valores[b], "cantidad": int(por_banco[b]),
+                                  "monto_total": int(montos_banco[b])} for b in orden_bancos],
+        }
+
+    def departamentos(self, fecha_inicio=None, fecha_fin=None, oficina=None):
+        """`/api/reportes/departamentos`: dependencias con más denuncias remitidas."""
+        c = self._filtrar(fecha_inicio, fecha_fin, oficina)
+        dependencias = self.diccionarios["departamento"]
+        conteos = self._contar(c, "departamento")
+        for excluida in (None, "Ninguna"):
+            if dependencias.codigo(excluida) >= 0:
+                conteos[dependencias.codigo(excluida)] = 0
+        return _ranking(conteos, dependencias.valores, nombre="departamento")
+
+    # ------------------------------------------------------------- auxiliares
+
+    def _por_dia(self, c):
+        """`[(fecha, cantidad)]` de los días con denuncias, en orden."""
+        if not len(c["fecha"]):
+            return []
+        base = int(c["fecha"].min())
+        conteos = np.bincount(c["fecha"] - base)
+        return [(_fecha_texto(base + d), int(n)) for d, n in enumerate(conteos) if n]
+
+    def _contar_pares_fecha(self, c, nombre):
+        """`[(fecha, codigo, n)]` por día y valor, días más recientes primero y de mayor a menor."""
+        tamano = max(len(self.diccionarios[nombre]), 1)
+        claves, conteos = np.unique(c["fecha"].astype(np.int64) * tamano + c[nombre], return_counts=True)
+        filas = [(int(k) // tamano, int(k) % tamano, int(n)) for k, n in zip(claves, conteos)]
+        filas.sort(key=lambda f: (-f[0], -f[2]))
+        return [(_fecha_texto(f), codigo, n) for f, codigo, n in filas]
+
+    def _pares_unicos(self, c, a, b):
+        """Pares distintos `(a, b)` como `a << 32 | b`, ignorando los `b` en cero."""
+        validos = c[b] > 0
+        return np.unique(c[a][validos].astype(np.int64) << 32 | c[b][validos].astype(np.int64))
+
+
+_CAPITULOS = None
+
+
+def _capitulos():
+    """Hecho (en minúsculas) → capítulo, como `obtenerCapitulo` de lib/data/hechos-punibles.ts."""
+    global _CAPITULOS
+    if _CAPITULOS is None:
+        from clasificador_hechos import leer_catalogo
+
+        _CAPITULOS = {hecho.lower().strip(): capitulo for hecho, capitulo in leer_catalogo()}
+    return _CAPITULOS
+
+
+# 📌 Ruta → (método, parámetros de la URL → argumentos)
+RUTAS = {
+    "estadisticas-generales": ("estadisticas_generales", {"fechaInicio": "fecha_inicio", "fechaFin": "fecha_fin",
+                                                          "oficina": "oficina", "tipoDenuncia": "tipo_denuncia"}),
+    "por-tipo": ("por_tipo", {"fechaInicio": "fecha_inicio", "fechaFin": "fecha_fin", "oficina": "oficina"}),
+    "por-operadores": ("por_operadores", {"fechaInicio": "fecha_inicio", "fechaFin": "fecha_fin",
+                                          "oficina": "oficina"}),
+    "temporales": ("temporales", {"fechaInicio": "fecha_inicio", "fechaFin": "fecha_fin", "oficina": "oficina"}),
+    "geograficos": ("geograficos", {"fechaInicio": "fecha_inicio", "fechaFin": "fecha_fin", "oficina": "oficina"}),
+    "mensual": ("mensual", {"año": "anio", "mes": "mes"}),
+    "departamentos": ("departamentos", {"fechaInicio": "fecha_inicio", "fechaFin": "fecha_fin",
+                                        "oficina": "oficina"}),
+}
+
+
+def responder(denuncias, ruta, parametros):
+    """Resultado de `/reportes/<ruta>` con los parámetros de la URL; KeyError si la ruta no existe."""
+    metodo, nombres = RUTAS[ruta]
+    argumentos = {nombres[k]: v[0] for k, v in parametros.items() if k in nombres and v and v[0]}
+    return getattr(denuncias, metodo)(**argumentos)
+
+
+def servir(denuncias, puerto, actualizar=None, intervalo=60):
+    """
+    Atiende `GET /reportes/<ruta>?...` con JSON. Si se pasa `actualizar`, se
+    llama cada `intervalo` segundos en un hilo aparte (las consultas siguen
+    contestando con las columnas anteriores mientras tanto).
+    """
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            partes = url.path.strip("/").split("/")
+            try:
+                if len(partes) != 2 or partes[0] != "reportes":
+                    raise KeyError(url.path)
+                cuerpo, estado = responder(denuncias, partes[1], parse_qs(url.query)), 200
+            except KeyError:
+                cuerpo, estado = {"error": "Reporte inexistente"}, 404
+            except (TypeError, ValueError) as e:
+                cuerpo, estado = {"error": f"Parámetros inválidos: {e}"}, 400
+            datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+            self.send_response(estado)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def log_message(self, formato, *args):
+            pass
+
+    if actualizar is not None:
+        def bucle():
+            while True:
+                time.sleep(intervalo)
+                try:
+                    actualizar()
+                except Exception as e:
+                    print(f"⚠ No se pudo actualizar: {e}", file=sys.stderr)
+
+        threading.Thread(target=bucle, daemon=True).start()
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), Manejador)
+    print(f"✅ Reportes en http://127.0.0.1:{puerto}/reportes/<ruta> ({len(denuncias)} denuncias)")
+    servidor.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reportes de denuncias sobre columnas en memoria.")
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL") or os.environ.get("POSTGRES_URL"))
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p = sub.add_parser("servir", help="Servidor HTTP de reportes")
+    p.add_argument("--puerto", type=int, default=8095)
+    p.add_argument("--intervalo", type=int, default=60, help="Segundos entre sincronizaciones")
+    p = sub.add_parser("reporte", help="Un reporte en JSON")
+    p.add_argument("ruta", choices=sorted(RUTAS))
+    p.add_argument("parametros", nargs="*", help="clave=valor, como en la URL (fechaInicio=2026-01-01)")
+    args = parser.parse_args(argv)
+
+    if not args.dsn:
+        print("❌ Indicar --dsn (o DATABASE_URL)", file=sys.stderr)
+        return 1
+    import psycopg2
+
+    conexion = psycopg2.connect(args.dsn)
+    denuncias = DenunciasColumnares()
+    inicio = time.perf_counter()
+    cargadas, _ = denuncias.sincronizar(conexion)
+    print(f"📌 {cargadas} denuncias cargadas en {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+
+    if args.comando == "reporte":
+        parametros = {}
+        for par in args.parametros:
+            clave, _, valor = par.partition("=")
+            parametros[clave] = [valor]
+        print(json.dumps(responder(denuncias, args.ruta, parametros), ensure_ascii=False, indent=2))
+        conexion.close()
+        return 0
+
+    bloqueo = threading.Lock()
+
+    def actualizar():
+        with bloqueo:
+            denuncias.sincronizar(conexion)
+
+    servir(denuncias, args.puerto, actualizar, args.intervalo)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Benchmark del análisis de cotizaciones: regex por moneda contra una sola pasada.
+
+Compara la lógica actual de `/api/cotizaciones` (un `re.search` con `.*?` y
+DOTALL por cada moneda, tal como la reproducen scripts/test-regex.py y
+test-regex-v2.py) con `cotizaciones.analizar`, sobre los widgets guardados en
+el repositorio (chaco.html y chaco_utf8.html están en UTF-16; chaco_final.html
+en UTF-8) y sobre dos variantes: una moneda ausente y el widget dentro de una
+página grande (cada regex vuelve a recorrer todo el HTML).
+
+    python scripts/benchmark_cotizaciones.py
+    python scripts/benchmark_cotizaciones.py --repeticiones 2000
+
+Antes de medir verifica que todos los métodos encuentren lo mismo.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from cotizaciones import analizar, decodificar  # noqa: E402
+
+FIXTURES = ("chaco.html", "chaco_utf8.html", "chaco_final.html")
+
+# 📌 Las mismas monedas y patrones que scripts/test-regex.py (v1) y test-regex-v2.py (v2)
+MONEDAS_V1 = [("Dólar Americano", "USD"), ("Euro", "EUR"), ("Real", "BRL"), ("Peso Argentino", "ARS")]
+MONEDAS_V2 = [("dolarUs", "USD"), ("euro", "EUR"), ("real", "BRL"), ("pesoAr", "ARS")]
+
+
+def _valor(texto):
+    valor = float(texto.replace(".", "").replace(",", "."))
+    return int(valor) if valor.is_integer() else valor
+
+
+def regex_v1(html):
+    resultado = {}
+    for nombre, codigo in MONEDAS_V1:
+        patron = rf"{nombre}.*?<td[^>]*>\s*([\d.,]+).*?<td[^>]*>\s*([\d.,]+)"
+        m = re.search(patron, html, re.DOTALL | re.IGNORECASE)
+        if m:
+            resultado[codigo] = {"compra": _valor(m.group(1)), "venta": _valor(m.group(2))}
+    return resultado
+
+
+def regex_v2(html):
+    resultado = {}
+    for clase, codigo in MONEDAS_V2:
+        patron = rf'class="moneda {clase}".*?<td[^>]*>\s*([\d.,]+).*?<td[^>]*>\s*([\d.,]+)'
+        m = re.search(patron, html, re.DOTALL | re.IGNORECASE)
+        if m:
+            resultado[codigo] = {"compra": _valor(m.group(1)), "venta": _valor(m.group(2))}
+    return resultado
+
+
+def una_pasada(html):
+    return analizar(html)["rates"]
+
+
+METODOS = {"regex_v1": regex_v1, "regex_v2": regex_v2, "una_pasada": una_pasada}
+
+
+def casos():
+    """`{nombre: html}` con los fixtures y las variantes."""
+    resultado = {}
+    for nombre in FIXTURES:
+        with open(os.path.join(RAIZ, nombre), "rb") as f:
+            resultado[nombre] = decodificar(f.read())
+    base = resultado["chaco_final.html"]
+    fila_euro = re.search(r"<tr>\s*<td><i class=\"moneda euro\">.*?</tr>", base, re.S).group(0)
+    resultado["sin_euro"] = base.replace(fila_euro, "")
+    relleno = "<div class=\"nota\"><p>Texto de la página que rodea al widget.</p></div>\n" * 3000
+    resultado["pagina_grande"] = base.replace("<body>", "<body>\n" + relleno).replace("</body>", relleno + "</body>")
+    return resultado
+
+
+def medir(funcion, html, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion(html)
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del análisis de cotizaciones.")
+    parser.add_argument("--repeticiones", type=int, default=500, help="Análisis por caso y método")
+    args = parser.parse_args(argv)
+
+    todos = casos()
+    print(f"{'caso':<18}" + "".join(f"{m:>14}" for m in METODOS) + "   (µs por análisis)")
+    for nombre, html in todos.items():
+        esperado = una_pasada(html)
+        diferencias = [m for m, f in METODOS.items() if f(html) != esperado]
+        repeticiones = max(1, args.repeticiones // 20) if len(html) > 100_000 else args.repeticiones
+        tiempos = [medir(f, html, repeticiones) for f in METODOS.values()]
+        print(f"{nombre:<18}" + "".join(f"{t:>14.1f}" for t in tiempos), end="")
+        print(f"   ⚠ distinto: {', '.join(diferencias)}" if diferencias else "")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
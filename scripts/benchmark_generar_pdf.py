@@ -0,0 +1,258 @@
+"""Benchmark y control de regresiones de generar_pdf.
+
+Renderiza actas con denunciantes sintéticos y los relatos reales de
+excels/json_para_analisis/*.json, en varios escenarios (relato corto, largo y
+de muchas páginas; autor conocido y desconocido; vista previa y acta final).
+Por escenario informa actas/s, latencia p50/p95, pico de RSS y bytes por acta.
+
+    python scripts/benchmark_generar_pdf.py                      # compara contra la base
+    python scripts/benchmark_generar_pdf.py --guardar-base       # registra una nueva base
+    python scripts/benchmark_generar_pdf.py --salida resultado.json --iteraciones 50 --solo-medir
+
+La base depende de la máquina (latencias y RSS), así que no se versiona: cada
+entorno registra la suya. Sin base, la comparación termina con error (código 2)
+en lugar de darse por aprobada; `--solo-medir` mide sin comparar.
+
+Funciona sin red ni base de datos: `nueva_denuncia.conectar_db` se reemplaza por
+una versión que falla si alguien intenta conectarse. Cada escenario corre en un
+proceso nuevo para que el pico de RSS sea el suyo.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS = os.path.join(RAIZ, "excels", "json_para_analisis", "*.json")
+BASE_POR_DEFECTO = os.path.join(RAIZ, "scripts", "benchmark_generar_pdf.base.json")
+
+NOMBRES = ["María", "José", "Ana", "Carlos", "Lucía", "Juan", "Rosa", "Pedro", "Liz", "Derlis", "Nilda", "Osvaldo"]
+APELLIDOS = ["González", "Benítez", "Martínez", "Giménez", "Ramírez", "Duarte", "Vera", "Cabrera", "Acosta", "Ortiz"]
+OFICINAS = ["Asunción", "Ciudad del Este", "Encarnación"]
+
+
+def _aislar_base_de_datos():
+    """Reemplaza `nueva_denuncia` para que el benchmark nunca toque la base."""
+    def conectar_db(*args, **kwargs):
+        raise RuntimeError("El benchmark corre sin base de datos")
+
+    modulo = types.ModuleType("nueva_denuncia")
+    modulo.conectar_db = conectar_db
+    sys.modules["nueva_denuncia"] = modulo
+
+
+def cargar_relatos():
+    """Relatos reales del corpus, sin repetir denuncias, ordenados por largo."""
+    relatos = {}
+    for ruta in sorted(glob.glob(CORPUS)):
+        with open(ruta, encoding="utf-8") as f:
+            for denuncia in json.load(f):
+                if denuncia.get("relato"):
+                    relatos[denuncia["id"]] = denuncia["relato"]
+    if not relatos:
+        raise SystemExit(f"No se encontraron relatos en {CORPUS}")
+    return sorted(relatos.values(), key=len)
+
+
+def denunciante_sintetico(rnd):
+    return {
+        "Nombres y Apellidos": f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}",
+        "Cédula de Identidad": str(rnd.randint(800_000, 7_500_000)),
+        "Domicilio": f"Calle {rnd.randint(1, 3000)} c/ {rnd.choice(APELLIDOS)}",
+        "Nacionalidad": "Paraguaya",
+        "Estado Civil": rnd.choice(["Soltero/a", "Casado/a", "Divorciado/a"]),
+        "Edad": str(rnd.randint(18, 80)),
+        "Fecha de Nacimiento": f"{rnd.randint(1945, 2006)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+        "Lugar de Nacimiento": rnd.choice(OFICINAS),
+        "Número de Teléfono": f"09{rnd.randint(71, 99)}{rnd.randint(100000, 999999)}",
+        "Profesión": rnd.choice(["Comerciante", "Docente", "Estudiante", "Jubilado/a", "Empleado/a"]),
+    }
+
+
+def denuncia_sintetica(rnd, relato, autor_conocido):
+    datos = {
+        "oficina": rnd.choice(OFICINAS),
+        "fecha_denuncia": "2026-02-16",
+        "hora_denuncia": f"{rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}",
+        "grado_operador": "Oficial Inspector",
+        "nombre_operador": f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)}",
+        "tipo_denuncia": rnd.choice(["Estafa", "Acceso indebido a sistemas informáticos", "OTRO"]),
+        "otro_tipo": "Suplantación de identidad",
+        "fecha_hecho": "2026-02-15",
+        "hora_hecho": "10:00",
+        "lugar_hecho": "Asunción",
+        "relato": relato,
+        "latitud": -25.28,
+        "longitud": -57.63,
+        "orden": rnd.randint(1, 9999),
+        "hash": "%08X" % rnd.getrandbits(32),
+    }
+    if autor_conocido:
+        datos.update({
+            "nombre_autor": f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)}",
+            "cedula_autor": str(rnd.randint(800_000, 7_500_000)),
+            "telefono_autor": f"09{rnd.randint(71, 99)}{rnd.randint(100000, 999999)}",
+            "domicilio_autor": "Desconocido",
+            "edad_autor": str(rnd.randint(18, 70)),
+        })
+    return datos
+
+
+def escenarios(relatos):
+    """Definición de los escenarios: (nombre, relatos a usar, autor_conocido, vista_previa)."""
+    cuartil = max(1, len(relatos) // 4)
+    cortos = relatos[:cuartil]
+    largos = relatos[-cuartil:]
+    # Varias denuncias reales unidas: actas de 6 a 10 páginas
+    muchas_paginas = ["\n".join(largos[i:] + largos[:i]) for i in range(min(len(largos), 5))]
+    return [
+        ("corto_autor_desconocido", cortos, False, False),
+        ("corto_autor_conocido", cortos, True, False),
+        ("largo_autor_desconocido", largos, False, False),
+        ("largo_autor_conocido", largos, True, False),
+        ("muchas_paginas", muchas_paginas, True, False),
+        ("vista_previa_corto", cortos, False, True),
+        ("vista_previa_largo", largos, True, True),
+    ]
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def correr_escenario(nombre, relatos, autor_conocido, vista_previa, iteraciones, calentamiento, semilla):
+    """Corre un escenario en el proceso actual y devuelve sus métricas."""
+    _aislar_base_de_datos()
+    sys.path.insert(0, RAIZ)
+    import generar_pdf
+
+    rnd = random.Random(f"{semilla}-{nombre}")
+    casos = []
+    for i in range(iteraciones + calentamiento):
+        casos.append((i, denunciante_sintetico(rnd), denuncia_sintetica(rnd, relatos[i % len(relatos)], autor_conocido)))
+
+    for numero_orden, denunciante, datos in casos[:calentamiento]:
+        generar_pdf.generar_pdf(numero_orden, denunciante, datos, vista_previa=vista_previa)
+
+    latencias = []
+    tamanos = []
+    inicio = time.perf_counter()
+    for numero_orden, denunciante, datos in casos[calentamiento:]:
+        t0 = time.perf_counter()
+        pdf_bytes = generar_pdf.generar_pdf(numero_orden, denunciante, datos, vista_previa=vista_previa)
+        latencias.append(time.perf_counter() - t0)
+        tamanos.append(len(pdf_bytes))
+    total = time.perf_counter() - inicio
+
+    return {
+        "escenario": nombre,
+        "actas": iteraciones,
+        "actas_por_segundo": round(iteraciones / total, 2),
+        "latencia_p50_ms": round(_percentil(latencias, 50) * 1000, 2),
+        "latencia_p95_ms": round(_percentil(latencias, 95) * 1000, 2),
+        "latencia_media_ms": round(statistics.mean(latencias) * 1000, 2),
+        "pico_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "bytes_por_acta": round(statistics.mean(tamanos)),
+        "caracteres_relato_promedio": round(statistics.mean(len(r) for r in relatos)),
+    }
+
+
+def comparar(resultados, base, tolerancia, tolerancia_bytes):
+    """Devuelve la lista de regresiones respecto de la base."""
+    regresiones = []
+    base_por_escenario = {r["escenario"]: r for r in base.get("escenarios", [])}
+    for actual in resultados:
+        anterior = base_por_escenario.get(actual["escenario"])
+        if not anterior:
+            continue
+        for metrica, margen in (("latencia_p50_ms", tolerancia), ("latencia_p95_ms", tolerancia),
+                                ("bytes_por_acta", tolerancia_bytes)):
+            limite = anterior[metrica] * (1 + margen)
+            if actual[metrica] > limite:
+                regresiones.append(f"{actual['escenario']}: {metrica} {actual[metrica]} > {anterior[metrica]} (+{margen:.0%})")
+        limite = anterior["actas_por_segundo"] * (1 - tolerancia)
+        if actual["actas_por_segundo"] < limite:
+            regresiones.append(f"{actual['escenario']}: actas_por_segundo {actual['actas_por_segundo']} < {anterior['actas_por_segundo']} (-{tolerancia:.0%})")
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de generar_pdf con el corpus de relatos.")
+    parser.add_argument("--iteraciones", type=int, default=30, help="Actas medidas por escenario")
+    parser.add_argument("--calentamiento", type=int, default=3, help="Actas descartadas al inicio de cada escenario")
+    parser.add_argument("--semilla", type=int, default=2026)
+    parser.add_argument("--escenario", action="append", help="Correr sólo estos escenarios (se puede repetir)")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--base", default=BASE_POR_DEFECTO, help="Archivo JSON con la base de comparación")
+    parser.add_argument("--guardar-base", action="store_true", help="Guardar los resultados como nueva base")
+    parser.add_argument("--solo-medir", action="store_true", help="Medir sin comparar contra la base")
+    parser.add_argument("--tolerancia", type=float, default=0.20, help="Margen tolerado en latencia y actas/s (0.20 = 20%%)")
+    parser.add_argument("--tolerancia-bytes", type=float, default=0.05, help="Margen tolerado en bytes por acta")
+    args = parser.parse_args(argv)
+
+    comparar_con_base = not (args.guardar_base or args.solo_medir)
+    if comparar_con_base and not os.path.exists(args.base):
+        # ❌ Sin base no hay control de regresiones: se avisa antes de medir y se falla
+        print(f"❌ No hay base en {args.base}; correr con --guardar-base para registrarla "
+              f"(o con --solo-medir para medir sin comparar)", file=sys.stderr)
+        return 2
+
+    relatos = cargar_relatos()
+    seleccion = [e for e in escenarios(relatos) if not args.escenario or e[0] in args.escenario]
+
+    resultados = []
+    contexto = get_context("spawn")  # 🔹 Proceso limpio por escenario (RSS propio)
+    for nombre, relatos_escenario, autor_conocido, vista_previa in seleccion:
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+            resultado = pool.submit(correr_escenario, nombre, relatos_escenario, autor_conocido, vista_previa,
+                                    args.iteraciones, args.calentamiento, args.semilla).result()
+        resultados.append(resultado)
+        print(f"{nombre:<26} {resultado['actas_por_segundo']:>8.1f} actas/s  p50 {resultado['latencia_p50_ms']:>7.1f} ms  "
+              f"p95 {resultado['latencia_p95_ms']:>7.1f} ms  RSS {resultado['pico_rss_kb'] / 1024:>6.1f} MB  "
+              f"{resultado['bytes_por_acta'] / 1024:>7.1f} KB/acta")
+
+    informe = {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "maquina": platform.node(),
+        "iteraciones": args.iteraciones,
+        "escenarios": resultados,
+    }
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+
+    if args.guardar_base:
+        with open(args.base, "w", encoding="utf-8") as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+        print(f"✅ Base guardada en {args.base}")
+        return 0
+
+    if not comparar_con_base:
+        return 0
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    regresiones = comparar(resultados, base, args.tolerancia, args.tolerancia_bytes)
+    if regresiones:
+        print("❌ Regresiones respecto de la base:")
+        for regresion in regresiones:
+            print(f"   - {regresion}")
+        return 1
+    print("✅ Sin regresiones respecto de la base")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""Benchmark de los reportes: GROUP BY en SQL contra columnas en memoria.
+
+Genera denuncias sintéticas (por defecto un millón), las guarda en SQLite con
+los índices de fecha y oficina, y mide para cada reporte las consultas de la
+ruta (traducidas a SQLite) contra `reportes_columnares.DenunciasColumnares`.
+Antes de medir verifica que ambos caminos den los mismos conteos.
+
+    python scripts/benchmark_reportes.py
+    python scripts/benchmark_reportes.py --filas 200000 --repeticiones 5
+
+SQLite corre en el mismo proceso, así que la comparación no incluye la red ni
+el planificador de PostgreSQL: es una cota favorable al camino SQL.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from reportes_columnares import DenunciasColumnares  # noqa: E402
+
+OFICINAS = ["Asunción", "Ciudad del Este", "Encarnación", "Coronel Oviedo", "Concepción", "Pedro Juan Caballero"]
+TIPOS = ["Estafa", "Estafa mediante sistemas informáticos", "Acceso indebido a sistemas informáticos", "Amenaza",
+         "Extorsión", "Hurto", "Robo", "Abuso de documentos de identidad", "OTRO",
+         "EXTRAVÍO DE OBJETOS Y/O DOCUMENTOS"]
+OTROS = ["Suplantación de identidad", "Sextorsión", "Hackeo de WhatsApp", ""]
+MONEDAS = ["Guaraníes (PYG)", "Dólares (USD)", None]
+BANCOS = ["Banco Itaú", "Ueno Bank", "Banco Familiar", "Visión Banco", None, None]
+DEPENDENCIAS = ["Fiscalía Asunción", "Fiscalía Central", "Ninguna", None]
+
+TABLA = """
+CREATE TABLE denuncias (
+    id INTEGER PRIMARY KEY, hash TEXT, orden INTEGER, fecha_denuncia TEXT, hora_denuncia TEXT,
+    tipo_denuncia TEXT, otro_tipo TEXT, oficina TEXT, usuario_id INTEGER, operador_grado TEXT,
+    operador_nombre TEXT, operador_apellido TEXT, monto_dano INTEGER, moneda TEXT, lugar_hecho TEXT,
+    latitud REAL, longitud REAL, entidad_bancaria_vulnerada TEXT, dependencia_remitida TEXT,
+    estado TEXT DEFAULT 'completada'
+);
+CREATE INDEX denuncias_fecha ON denuncias (fecha_denuncia);
+CREATE INDEX denuncias_oficina ON denuncias (oficina);
+"""
+
+TIPO_SQL = """CASE WHEN tipo_denuncia IS NULL THEN 'Sin tipo'
+    WHEN tipo_denuncia IN ('OTRO', 'Otro (Especificar)')
+        THEN COALESCE(NULLIF(TRIM(otro_tipo), ''), 'Otro (Especificar)')
+    ELSE tipo_denuncia END"""
+
+
+def generar(filas, semilla=7):
+    rnd = random.Random(semilla)
+    inicio = date(2022, 1, 1)
+    operadores = [(i, rnd.choice(["Oficial", "Suboficial", "Comisario"]), f"Nombre{i}", f"Apellido{i}")
+                  for i in range(1, 181)]
+    for i in range(1, filas + 1):
+        usuario, grado, nombre, apellido = rnd.choice(operadores)
+        con_gps = rnd.random() < 0.3
+        monto = rnd.choice([None, 0, rnd.randrange(50_000, 50_000_000, 1000)])  # 🔹 NULL y 0 son distintos
+        yield {
+            "id": i, "hash": f"h{i}", "orden": i % 5000 + 1,
+            "fecha_denuncia": (inicio + timedelta(days=rnd.randrange(1460))).isoformat(),
+            "hora_denuncia": f"{rnd.randrange(24):02d}:{rnd.randrange(60):02d}",
+            "tipo_denuncia": (tipo := rnd.choice(TIPOS)),
+            "otro_tipo": rnd.choice(OTROS) if tipo == "OTRO" else None,
+            "oficina": rnd.choice(OFICINAS), "usuario_id": usuario, "operador_grado": grado,
+            "operador_nombre": nombre, "operador_apellido": apellido,
+            "monto_dano": monto, "moneda": rnd.choice(MONEDAS) if monto else None,
+            "lugar_hecho": f"Barrio {rnd.randrange(400)}", "latitud": rnd.uniform(-27, -22) if con_gps else None,
+            "longitud": rnd.uniform(-58, -54) if con_gps else None,
+            "entidad_bancaria_vulnerada": rnd.choice(BANCOS), "dependencia_remitida": rnd.choice(DEPENDENCIAS),
+        }
+
+
+def consultas_sql(conexion, fecha_inicio, fecha_fin, oficina):
+    """Los GROUP BY de las rutas por-tipo, estadisticas-generales, temporales y mensual."""
+    where = "WHERE estado = 'completada' AND fecha_denuncia >= ? AND fecha_denuncia <= ? AND oficina = ?"
+    valores = (fecha_inicio, fecha_fin, oficina)
+    resultado = {}
+    c = conexion.cursor()
+    resultado["total"] = c.execute(f"SELECT COUNT(*) FROM denuncias {where}", valores).fetchone()[0]
+    resultado["por_tipo"] = dict(c.execute(
+        f"SELECT {TIPO_SQL} AS tipo, COUNT(*) FROM denuncias {where} GROUP BY tipo", valores).fetchall())
+    c.execute(f"SELECT oficina, {TIPO_SQL} AS tipo, COUNT(*) FROM denuncias {where} GROUP BY oficina, tipo",
+              valores).fetchall()
+    c.execute(f"SELECT {TIPO_SQL} AS tipo, COUNT(*), MIN(fecha_denuncia), MAX(fecha_denuncia) FROM denuncias "
+              f"{where} GROUP BY tipo ORDER BY 2 DESC LIMIT 10", valores).fetchall()
+    resultado["por_dia"] = c.execute(
+        f"SELECT fecha_denuncia, COUNT(*) FROM denuncias {where} GROUP BY fecha_denuncia", valores).fetchall()
+    c.execute(f"SELECT strftime('%w', fecha_denuncia), COUNT(*) FROM denuncias {where} GROUP BY 1", valores)
+    c.execute(f"SELECT CAST(substr(hora_denuncia, 1, 2) AS INTEGER), COUNT(*) FROM denuncias {where} GROUP BY 1",
+              valores)
+    resultado["monto"], resultado["con_monto"] = c.execute(
+        f"SELECT COALESCE(SUM(monto_dano), 0), COUNT(monto_dano) FROM denuncias {where}", valores).fetchone()
+    resultado["por_mes"] = c.execute(
+        f"SELECT substr(fecha_denuncia, 1, 7) AS mes, COUNT(*) FROM denuncias {where} GROUP BY mes", valores).fetchall()
+    c.execute(f"SELECT strftime('%Y', fecha_denuncia) AS anio, COUNT(*) FROM denuncias {where} GROUP BY anio",
+              valores).fetchall()
+    c.execute(f"SELECT usuario_id, oficina, COUNT(*) FROM denuncias {where} GROUP BY usuario_id, oficina "
+              f"ORDER BY 3 DESC LIMIT 20", valores).fetchall()
+    return resultado
+
+
+def consultas_columnares(denuncias, fecha_inicio, fecha_fin, oficina):
+    generales = denuncias.estadisticas_generales(fecha_inicio, fecha_fin, oficina)
+    por_tipo = denuncias.por_tipo(fecha_inicio, fecha_fin, oficina)
+    temporales = denuncias.temporales(fecha_inicio, fecha_fin, oficina)
+    denuncias.por_operadores(fecha_inicio, fecha_fin, oficina)
+    return {
+        "total": generales["total"],
+        "por_tipo": {f["tipo"]: f["cantidad"] for f in por_tipo["distribucion"]},
+        "monto": generales["montoTotal"],
+        "con_monto": generales["denunciasConMonto"],
+        "por_mes": {f["mes"][:7]: f["cantidad"] for f in temporales["tendencias"]},
+    }
+
+
+def medir(funcion, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reportes: SQL contra columnas en memoria.")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        conexion = sqlite3.connect(os.path.join(carpeta, "denuncias.db"))
+        conexion.executescript(TABLA)
+        inicio = time.perf_counter()
+        denuncias = DenunciasColumnares()
+        lote = []
+        for fila in generar(args.filas):
+            lote.append(fila)
+            if len(lote) == 50_000:
+                conexion.executemany(f"INSERT INTO denuncias ({', '.join(lote[0])}) "
+                                     f"VALUES ({', '.join('?' * len(lote[0]))})", [tuple(f.values()) for f in lote])
+                denuncias.cargar(lote)
+                lote = []
+        if lote:
+            conexion.executemany(f"INSERT INTO denuncias ({', '.join(lote[0])}) "
+                                 f"VALUES ({', '.join('?' * len(lote[0]))})", [tuple(f.values()) for f in lote])
+            denuncias.cargar(lote)
+        conexion.commit()
+        conexion.execute("ANALYZE")
+        print(f"📌 {args.filas} denuncias generadas en {time.perf_counter() - inicio:.1f}s")
+
+        casos = [("un mes, una oficina", "2024-03-01", "2024-03-31", "Asunción"),
+                 ("un año, una oficina", "2024-01-01", "2024-12-31", "Ciudad del Este"),
+                 ("todo, una oficina", "2022-01-01", "2025-12-31", "Encarnación")]
+        for nombre, desde, hasta, oficina in casos:
+            sql = consultas_sql(conexion, desde, hasta, oficina)
+            columnar = consultas_columnares(denuncias, desde, hasta, oficina)
+            por_mes_sql = dict(sql["por_mes"])
+            assert sql["total"] == columnar["total"], (sql["total"], columnar["total"])
+            assert sql["por_tipo"] == columnar["por_tipo"], nombre
+            assert sql["monto"] == columnar["monto"], nombre
+            assert sql["con_monto"] == columnar["con_monto"], nombre
+            assert all(por_mes_sql[mes] == n for mes, n in columnar["por_mes"].items()), nombre  # últimos 12
+            t_sql = medir(lambda: consultas_sql(conexion, desde, hasta, oficina), args.repeticiones)
+            t_col = medir(lambda: consultas_columnares(denuncias, desde, hasta, oficina), args.repeticiones)
+            print(f"{nombre:22} {sql['total']:8d} filas  SQL {t_sql * 1000:8.1f} ms  "
+                  f"columnas {t_col * 1000:7.1f} ms  ×{t_sql / t_col:.0f}")
+
+        # 🔹 Actualización incremental: 1000 denuncias cambiadas
+        cambiadas = [dict(f, hash=f["hash"] + "x", tipo_denuncia="Amenaza") for f in generar(1000, semilla=8)]
+        t_carga = medir(lambda: denuncias.cargar(cambiadas), 1)
+        print(f"cargar 1000 cambiadas  {t_carga * 1000:.1f} ms ({len(denuncias)} denuncias vigentes)")
+        conexion.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+"""Servidor persistente de actas en PDF (sin interfaz gráfica).
+
+Mantiene cargados reportlab, los estilos, las fuentes y los logos, y atiende
+pedidos de renderizado sin pagar el arranque del intérprete en cada acta.
+
+    python servidor_pdf.py --socket /run/denuncias/pdf.sock --procesos 4
+    python servidor_pdf.py --stdio      # un pedido tras otro por stdin/stdout
+
+Protocolo: cada mensaje es un entero de 4 bytes big-endian con el largo,
+seguido del contenido. El pedido es un objeto JSON:
+
+    {"id": 1, "accion": "renderizar", "numero_orden": 508,
+     "denunciante": {...}, "datos_denuncia": {...}, "vista_previa": false}
+    {"id": 2, "accion": "salud"}
+
+La respuesta es un objeto JSON (`{"id": 1, "ok": true, "tamano": 12345,
+"lineas_firma": {...}}` o `{"id": 1, "ok": false, "error": "..."}`); si la
+acción fue `renderizar` y salió bien, le sigue un segundo mensaje con los bytes
+del PDF. `lineas_firma` es lo que necesita `firmas_pdf` para estampar las firmas
+más adelante (conviene guardarlo junto al PDF).
+"""
+import argparse
+import json
+import os
+import socketserver
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+# 📌 Límite de tamaño de un pedido (un acta con relato muy largo ronda los 100 KB de JSON)
+TAMANO_MAXIMO_PEDIDO = 8 * 1024 * 1024
+
+_CABECERA = struct.Struct(">I")
+
+# 📌 Datos de ejemplo para calentar el renderizador al arrancar
+_DENUNCIANTE_CALENTAMIENTO = {
+    "Nombres y Apellidos": "Calentamiento", "Cédula de Identidad": "0", "Domicilio": "-",
+    "Nacionalidad": "-", "Estado Civil": "-", "Edad": "0", "Fecha de Nacimiento": "2000-01-01",
+    "Lugar de Nacimiento": "-", "Número de Teléfono": "-", "Profesión": "-",
+}
+_DENUNCIA_CALENTAMIENTO = {
+    "oficina": "Asunción", "fecha_denuncia": "2000-01-01", "hora_denuncia": "00:00",
+    "grado_operador": "-", "nombre_operador": "-", "tipo_denuncia": "-", "fecha_hecho": "2000-01-01",
+    "hora_hecho": "00:00", "lugar_hecho": "-", "relato": "Calentamiento del renderizador.",
+}
+
+
+class ErrorProtocolo(Exception):
+    """El mensaje recibido no respeta el formato esperado."""
+
+
+def leer_mensaje(archivo):
+    """Lee un mensaje con prefijo de largo. Devuelve None si la conexión se cerró."""
+    cabecera = archivo.read(_CABECERA.size)
+    if not cabecera:
+        return None
+    if len(cabecera) < _CABECERA.size:
+        raise ErrorProtocolo("Cabecera incompleta")
+    (largo,) = _CABECERA.unpack(cabecera)
+    if largo > TAMANO_MAXIMO_PEDIDO:
+        raise ErrorProtocolo(f"Mensaje demasiado grande ({largo} bytes)")
+    contenido = archivo.read(largo)
+    if len(contenido) < largo:
+        raise ErrorProtocolo("Mensaje incompleto")
+    return contenido
+
+
+def escribir_mensaje(archivo, contenido):
+    """Escribe un mensaje con prefijo de largo (acepta bytes o un objeto JSON)."""
+    if not isinstance(contenido, (bytes, bytearray, memoryview)):
+        contenido = json.dumps(contenido, ensure_ascii=False).encode("utf-8")
+    archivo.write(_CABECERA.pack(len(contenido)))
+    archivo.write(contenido)
+
+
+# 🔹 Estado de cada proceso renderizador
+_generar_pdf = None
+
+
+def _inicializar_renderizador():
+    """Precarga reportlab, qrcode, estilos y logos, y hace un renderizado de prueba."""
+    global _generar_pdf
+    import generar_pdf as modulo
+
+    modulo.precargar_recursos()
+    modulo.generar_pdf(0, _DENUNCIANTE_CALENTAMIENTO, _DENUNCIA_CALENTAMIENTO, vista_previa=True)
+    _generar_pdf = modulo.generar_pdf
+
+
+def _listo():
+    return os.getpid()
+
+
+def _renderizar(numero_orden, denunciante, datos_denuncia, vista_previa):
+    if _generar_pdf is None:
+        _inicializar_renderizador()
+    lineas_firma = {}
+    pdf_bytes = _generar_pdf(numero_orden, denunciante, datos_denuncia, vista_previa=vista_previa, lineas_firma=lineas_firma)
+    return pdf_bytes, lineas_firma
+
+
+class ServicioPDF:
+    """
+    Reparte los pedidos entre un pool de procesos ya calentados y limita cuántos
+    pueden estar en curso; por encima del límite responde "ocupado" en lugar de
+    encolar sin fin.
+    """
+
+    def __init__(self, procesos=None, cola_maxima=None, tiempo_maximo=60):
+        self.procesos = procesos or os.cpu_count() or 1
+        self.cola_maxima = self.procesos * 2 if cola_maxima is None else cola_maxima
+        self.tiempo_maximo = tiempo_maximo
+        self._cupos = threading.BoundedSemaphore(self.procesos + self.cola_maxima)
+        self._lock = threading.Lock()
+        self._en_curso = 0
+        self._atendidas = 0
+        self._fallidas = 0
+        self._rechazadas = 0
+        self._reinicios = 0
+        self._estado = "listo"
+        self._inicio = time.time()
+        self._pool = self._nuevo_pool()
+        # 🔹 Arrancar y calentar todos los procesos antes de aceptar pedidos
+        for futuro in [self._pool.submit(_listo) for _ in range(self.procesos)]:
+            futuro.result()
+
+    def _nuevo_pool(self):
+        return ProcessPoolExecutor(max_workers=self.procesos, initializer=_inicializar_renderizador)
+
+    def _reconstruir(self, pool_roto):
+        """
+        Un proceso renderizador murió: el pool queda inservible (BrokenProcessPool
+        en todo pedido posterior). Se arma uno nuevo; los procesos se calientan
+        con el primer pedido. Si varios hilos lo detectan a la vez, reconstruye uno.
+        """
+        with self._lock:
+            if self._pool is not pool_roto:
+                return
+            self._reinicios += 1
+            try:
+                self._pool = self._nuevo_pool()
+                self._estado = "listo"
+            except Exception as e:
+                self._estado = f"sin procesos: {type(e).__name__}: {e}"
+        pool_roto.shutdown(wait=False, cancel_futures=True)
+
+    def cerrar(self):
+        with self._lock:
+            pool = self._pool
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    def salud(self):
+        with self._lock:
+            return {
+                "ok": self._estado == "listo",
+                "estado": self._estado,
+                "procesos": self.procesos,
+                "reinicios": self._reinicios,
+                "cola_maxima": self.cola_maxima,
+                "en_curso": self._en_curso,
+                "atendidas": self._atendidas,
+                "fallidas": self._fallidas,
+                "rechazadas": self._rechazadas,
+                "segundos_activo": round(time.time() - self._inicio, 1),
+            }
+
+    def renderizar(self, pedido):
+        """Devuelve `(respuesta, pdf_bytes)`; `pdf_bytes` es None si hubo error."""
+        if not self._cupos.acquire(blocking=False):
+            with self._lock:
+                self._rechazadas += 1
+            return {"ok": False, "error": "ocupado"}, None
+
+        with self._lock:
+            self._en_curso += 1
+            pool = self._pool
+        try:
+            futuro = pool.submit(
+                _renderizar,
+                pedido.get("numero_orden"),
+                pedido["denunciante"],
+                pedido["datos_denuncia"],
+                bool(pedido.get("vista_previa", False)),
+            )
+        except Exception as e:
+            self._liberar_cupo()
+            if isinstance(e, BrokenProcessPool):
+                self._reconstruir(pool)
+            respuesta, pdf_bytes = {"ok": False, "error": f"{type(e).__name__}: {e}"}, None
+        else:
+            # 🔹 El cupo se libera cuando el proceso termina de verdad, no cuando se deja de esperar:
+            #    un acta con tiempo agotado sigue ocupando su proceso y cuenta para el límite.
+            futuro.add_done_callback(self._liberar_cupo)
+            try:
+                pdf_bytes, lineas_firma = futuro.result(timeout=self.tiempo_maximo)
+            except FuturesTimeoutError:
+                respuesta, pdf_bytes = {"ok": False, "error": "tiempo agotado"}, None
+            except BrokenProcessPool as e:
+                # ⚠ No se reintenta: el acta pudo ser la que tiró abajo el proceso
+                self._reconstruir(pool)
+                respuesta, pdf_bytes = {"ok": False, "error": f"Proceso renderizador caído: {e}"}, None
+            except Exception as e:
+                respuesta, pdf_bytes = {"ok": False, "error": f"{type(e).__name__}: {e}"}, None
+            else:
+                respuesta = {"ok": True, "tamano": len(pdf_bytes), "lineas_firma": lineas_firma}
+
+        with self._lock:
+            if pdf_bytes is None:
+                self._fallidas += 1
+            else:
+                self._atendidas += 1
+        return respuesta, pdf_bytes
+
+    def _liberar_cupo(self, futuro=None):
+        with self._lock:
+            self._en_curso -= 1
+        self._cupos.release()
+
+    def atender(self, entrada, salida):
+        """Atiende pedidos de un flujo hasta que el otro extremo cierre."""
+        while True:
+            try:
+                contenido = leer_mensaje(entrada)
+                if contenido is None:
+                    return
+                pedido = json.loads(contenido)
+            except (ErrorProtocolo, ValueError) as e:
+                escribir_mensaje(salida, {"ok": False, "error": f"Pedido inválido: {e}"})
+                salida.flush()
+                return
+            if not isinstance(pedido, dict):
+                # 🔹 JSON válido pero no es un objeto: el encuadre sigue intacto, se responde y se sigue
+                escribir_mensaje(salida, {"ok": False, "error": "Pedido inválido: se esperaba un objeto JSON"})
+                salida.flush()
+                continue
+
+            accion = pedido.get("accion", "renderizar")
+            pdf_bytes = None
+            if accion == "salud":
+                respuesta = self.salud()
+            elif accion == "renderizar":
+                respuesta, pdf_bytes = self.renderizar(pedido)
+            else:
+                respuesta = {"ok": False, "error": f"Acción desconocida: {accion}"}
+
+            if "id" in pedido:
+                respuesta["id"] = pedido["id"]
+            escribir_mensaje(salida, respuesta)
+            if pdf_bytes is not None:
+                escribir_mensaje(salida, pdf_bytes)
+            salida.flush()
+
+
+class _ManejadorConexion(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.servicio.atender(self.rfile, self.wfile)
+
+
+class _ServidorUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def servir_socket(servicio, ruta_socket):
+    """Escucha en un socket Unix; cada conexión puede enviar varios pedidos."""
+    if os.path.exists(ruta_socket):
+        os.unlink(ruta_socket)
+    with _ServidorUnix(ruta_socket, _ManejadorConexion) as servidor:
+        servidor.servicio = servicio
+        os.chmod(ruta_socket, 0o660)
+        print(f"✅ Servidor de PDF escuchando en {ruta_socket} ({servicio.procesos} procesos)", file=sys.stderr)
+        try:
+            servidor.serve_forever()
+        finally:
+            os.unlink(ruta_socket)
+
+
+def solicitar(ruta_socket, pedido):
+    """Cliente mínimo: envía un pedido al socket y devuelve `(respuesta, pdf_bytes)`."""
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conexion:
+        conexion.connect(ruta_socket)
+        with conexion.makefile("rwb") as flujo:
+            escribir_mensaje(flujo, pedido)
+            flujo.flush()
+            respuesta = json.loads(leer_mensaje(flujo))
+            pdf_bytes = leer_mensaje(flujo) if respuesta.get("ok") and pedido.get("accion", "renderizar") == "renderizar" else None
+    return respuesta, pdf_bytes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor persistente de actas en PDF.")
+    modo = parser.add_mutually_exclusive_group(required=True)
+    modo.add_argument("--socket", help="Ruta del socket Unix donde escuchar")
+    modo.add_argument("--stdio", action="store_true", help="Atender pedidos por stdin/stdout")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos renderizadores (por defecto, todos los núcleos)")
+    parser.add_argument("--cola", type=int, default=None, help="Pedidos que pueden esperar además de los que están en curso")
+    parser.add_argument("--tiempo-maximo", type=float, default=60, help="Segundos máximos por acta")
+    args = parser.parse_args(argv)
+
+    procesos = 1 if args.stdio and args.procesos is None else args.procesos
+    servicio = ServicioPDF(procesos=procesos, cola_maxima=args.cola, tiempo_maximo=args.tiempo_maximo)
+    try:
+        if args.stdio:
+            servicio.atender(sys.stdin.buffer, sys.stdout.buffer)
+        else:
+            servir_socket(servicio, args.socket)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servicio.cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,419 @@
+"""Relatos casi duplicados y casos vinculados (MinHash + LSH).
+
+Los mismos guiones de estafa y los mismos números aparecen en muchas denuncias.
+Este módulo calcula una firma MinHash de los shingles (grupos de 3 palabras) de
+cada relato y la reparte en bandas (LSH): dos relatos parecidos caen en el mismo
+balde de al menos una banda con alta probabilidad, así que los candidatos se
+encuentran sin comparar todos contra todos. Además vincula las denuncias que
+comparten un teléfono o una cuenta (ver `entidades_relatos`).
+
+    python similitud_relatos.py agregar similitud/ "excels/json_para_analisis/*.json"
+    python similitud_relatos.py similares similitud/ 755
+    python similitud_relatos.py agrupar similitud/ --umbral 0.5 --salida grupos.json
+
+El índice es un directorio con archivos que sólo crecen: `agregar` anexa las
+firmas nuevas sin reescribir las anteriores. Si una denuncia se vuelve a
+agregar, vale la versión más reciente.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from entidades_relatos import extraer_entidades
+from texto_relatos import denuncias_desde_cursor, leer_exportaciones, tokenizar
+
+VERSION = 1
+
+# 📌 128 permutaciones en 32 bandas de 4 filas: dos relatos con similitud de
+# Jaccard 0.5 comparten alguna banda con probabilidad ~0.87 (0.3 → ~0.23)
+PERMUTACIONES = 128
+BANDAS = 32
+LARGO_SHINGLE = 3
+UMBRAL = 0.5
+
+# 📌 Un número o cuenta compartido por más denuncias que esto es una línea
+# institucional (el 4828 del banco, una cuenta recaudadora), no un vínculo
+MAXIMO_POR_ENTIDAD = 50
+
+_PRIMO = np.uint64(4294967311)  # primo mayor que 2**32
+_VACIA = np.uint32(0xFFFFFFFF)
+
+CONSULTA_DENUNCIAS = """
+    SELECT id, hash AS hash_denuncia, relato
+    FROM denuncias
+    WHERE estado = 'completada' AND id = ANY(%s)
+"""
+
+
+def _coeficientes(permutaciones):
+    # 🔹 Semilla fija: las firmas tienen que ser comparables entre corridas
+    generador = np.random.default_rng(20260218)
+    a = generador.integers(1, 2**31, size=permutaciones, dtype=np.uint64)
+    b = generador.integers(0, 2**31, size=permutaciones, dtype=np.uint64)
+    return a[:, None], b[:, None]
+
+
+def shingles(relato, largo=LARGO_SHINGLE):
+    """Hashes (crc32) de los grupos de `largo` palabras consecutivas del relato plegado."""
+    tokens = tokenizar(relato)
+    if len(tokens) < largo:
+        return {zlib.crc32(" ".join(tokens).encode())} if tokens else set()
+    return {zlib.crc32(" ".join(tokens[i:i + largo]).encode()) for i in range(len(tokens) - largo + 1)}
+
+
+def entidades_vinculantes(relato):
+    """Teléfonos (salvo números cortos) y cuentas del relato, como claves "tel:..." / "cta:..."."""
+    entidades = extraer_entidades(relato)
+    claves = {f"tel:{numero}" for numero, tipo, _, _ in entidades["telefonos"] if tipo != "corto"}
+    claves.update(f"cta:{numero}" for numero, _, _, _ in entidades["cuentas"])
+    return sorted(claves)
+
+
+class IndiceSimilitud:
+    """
+    Firmas MinHash de los relatos y baldes LSH por banda.
+
+    En disco: ``firmas.bin`` (uint32, una fila por denuncia), ``ids.bin``
+    (int64) y ``entidades.jsonl`` (`[id, hash, claves]`, o `[id, null, null]`
+    para una denuncia quitada). En memoria, cada banda se guarda como un arreglo
+    ordenado de claves para buscar con `searchsorted`; lo agregado después de
+    abrir queda en una cola que se ordena cuando crece.
+    """
+
+    def __init__(self, ruta, permutaciones=PERMUTACIONES, bandas=BANDAS):
+        if permutaciones % bandas:
+            raise ValueError("permutaciones debe ser múltiplo de bandas")
+        self.ruta = ruta
+        os.makedirs(ruta, exist_ok=True)
+        manifiesto = os.path.join(ruta, "manifiesto.json")
+        if os.path.exists(manifiesto):
+            with open(manifiesto, encoding="utf-8") as f:
+                datos = json.load(f)
+            permutaciones, bandas = datos["permutaciones"], datos["bandas"]
+        else:
+            with open(manifiesto, "w", encoding="utf-8") as f:
+                json.dump({"version": VERSION, "permutaciones": permutaciones, "bandas": bandas}, f)
+        self.permutaciones, self.bandas = permutaciones, bandas
+        self._a, self._b = _coeficientes(permutaciones)
+        self._abrir()
+
+    def _archivo(self, nombre):
+        return os.path.join(self.ruta, nombre)
+
+    def _leer_binario(self, nombre, tipo):
+        ruta = self._archivo(nombre)
+        return np.fromfile(ruta, dtype=tipo) if os.path.exists(ruta) else np.empty(0, tipo)
+
+    def _abrir(self):
+        firmas = self._leer_binario("firmas.bin", np.uint32)
+        ids = self._leer_binario("ids.bin", np.int64)
+        # 🔹 Si una escritura quedó cortada, se descartan las filas incompletas
+        filas = min(len(ids), len(firmas) // self.permutaciones)
+        self._firmas = firmas[:filas * self.permutaciones].reshape(filas, self.permutaciones).copy()
+        self._ids = ids[:filas].copy()
+        self._filas = filas
+
+        ultima_fila = {}
+        for fila, id_denuncia in enumerate(self._ids.tolist()):
+            ultima_fila[id_denuncia] = fila
+        # 🔹 Se reproduce entidades.jsonl en orden: cada línea no nula (re)activa la última fila
+        #    de ese id (un id eliminado y vuelto a agregar queda vivo) y cada lápida lo desactiva.
+        #    Una firma escrita sin su línea no se activa; si era un reemplazo, queda el hash viejo
+        #    y `sincronizar` la vuelve a agregar.
+        self._posicion = {}
+        self._hashes, self._entidades, self._por_entidad = {}, {}, {}
+        if os.path.exists(self._archivo("entidades.jsonl")):
+            with open(self._archivo("entidades.jsonl"), encoding="utf-8") as f:
+                for linea in f:
+                    try:
+                        id_denuncia, hash_denuncia, claves = json.loads(linea)
+                    except ValueError:
+                        continue  # 🔹 última línea cortada
+                    if claves is None:
+                        self._posicion.pop(id_denuncia, None)
+                        self._hashes.pop(id_denuncia, None)
+                        self._entidades.pop(id_denuncia, None)
+                    elif id_denuncia in ultima_fila:
+                        self._posicion[id_denuncia] = ultima_fila[id_denuncia]
+                        self._hashes[id_denuncia] = hash_denuncia
+                        self._entidades[id_denuncia] = claves
+        for id_denuncia, claves in self._entidades.items():
+            for clave in claves:
+                self._por_entidad.setdefault(clave, set()).add(id_denuncia)
+
+        self._activas = np.zeros(filas, dtype=bool)
+        self._activas[list(self._posicion.values())] = True
+        self._claves = self._claves_de_bandas(self._firmas)
+        self._ordenar()
+
+    def _claves_de_bandas(self, firmas):
+        """Una clave uint64 por banda y fila (las filas de la banda mezcladas)."""
+        filas = self.permutaciones // self.bandas
+        partes = firmas.reshape(len(firmas), self.bandas, filas).astype(np.uint64)
+        clave = np.zeros((len(firmas), self.bandas), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for i in range(filas):
+                clave = clave * np.uint64(0x9E3779B97F4A7C15) + partes[:, :, i]
+        return clave
+
+    def _ordenar(self):
+        """Ordena las claves de cada banda para buscarlas con `searchsorted`."""
+        utiles = np.nonzero(self._activas & (self._firmas[:, 0] != _VACIA))[0]
+        claves = self._claves[utiles]
+        orden = np.argsort(claves, axis=0, kind="stable")
+        self._ordenadas = np.take_along_axis(claves, orden, axis=0)
+        self._filas_ordenadas = utiles[orden]
+        self._ordenado_hasta = self._filas
+
+    def __len__(self):
+        return len(self._posicion)
+
+    def __contains__(self, id_denuncia):
+        return id_denuncia in self._posicion
+
+    def firma(self, relato):
+        """Firma MinHash (uint32) del relato; un relato sin palabras da una firma "vacía"."""
+        valores = shingles(relato)
+        if not valores:
+            return np.full(self.permutaciones, _VACIA, dtype=np.uint32)
+        x = np.fromiter(valores, dtype=np.uint64, count=len(valores))
+        return ((self._a * x + self._b) % _PRIMO).min(axis=1).astype(np.uint32)
+
+    def agregar(self, denuncias):
+        """
+        Agrega (o reemplaza) denuncias: dicts con ``id``, ``relato`` y
+        opcionalmente ``hash_denuncia``. Devuelve la cantidad agregada.
+        """
+        nuevas = []
+        for denuncia in denuncias:
+            relato = denuncia.get("relato")
+            nuevas.append(
+                (int(denuncia["id"]), denuncia.get("hash_denuncia"), self.firma(relato), entidades_vinculantes(relato))
+            )
+        if not nuevas:
+            return 0
+
+        firmas = np.stack([firma for _, _, firma, _ in nuevas])
+        ids = np.array([id_denuncia for id_denuncia, _, _, _ in nuevas], dtype=np.int64)
+        # 🔹 Primero las firmas y después las entidades: una firma sin su línea se ignora al abrir
+        with open(self._archivo("firmas.bin"), "ab") as f:
+            f.write(firmas.tobytes())
+        with open(self._archivo("ids.bin"), "ab") as f:
+            f.write(ids.tobytes())
+        with open(self._archivo("entidades.jsonl"), "a", encoding="utf-8") as f:
+            for id_denuncia, hash_denuncia, _, claves in nuevas:
+                f.write(json.dumps([id_denuncia, hash_denuncia, claves]) + "\n")
+
+        primera = self._filas
+        self._firmas = np.concatenate([self._firmas, firmas])
+        self._ids = np.concatenate([self._ids, ids])
+        self._claves = np.concatenate([self._claves, self._claves_de_bandas(firmas)])
+        self._activas = np.concatenate([self._activas, np.ones(len(nuevas), dtype=bool)])
+        self._filas += len(nuevas)
+        for desplazamiento, (id_denuncia, hash_denuncia, _, claves) in enumerate(nuevas):
+            self._quitar_de_memoria(id_denuncia)
+            self._posicion[id_denuncia] = primera + desplazamiento
+            self._hashes[id_denuncia] = hash_denuncia
+            self._entidades[id_denuncia] = claves
+            for clave in claves:
+                self._por_entidad.setdefault(clave, set()).add(id_denuncia)
+        # 🔹 La cola sin ordenar se recorre entera en cada consulta: se reordena cuando crece
+        if self._filas - self._ordenado_hasta > max(1024, self._filas // 20):
+            self._ordenar()
+        return len(nuevas)
+
+    def _quitar_de_memoria(self, id_denuncia):
+        fila = self._posicion.pop(id_denuncia, None)
+        if fila is not None:
+            self._activas[fila] = False
+        for clave in self._entidades.pop(id_denuncia, ()):
+            self._por_entidad[clave].discard(id_denuncia)
+        self._hashes.pop(id_denuncia, None)
+
+    def eliminar(self, ids):
+        """Quita denuncias del índice."""
+        ids = [int(i) for i in ids if i in self._posicion]
+        with open(self._archivo("entidades.jsonl"), "a", encoding="utf-8") as f:
+            for id_denuncia in ids:
+                f.write(json.dumps([id_denuncia, None, None]) + "\n")
+                self._quitar_de_memoria(id_denuncia)
+        return len(ids)
+
+    def sincronizar(self, conexion, tamano_lote=500):
+        """
+        Pone el índice al día con la base (PostgreSQL, estilo psycopg2): agrega
+        las denuncias completadas nuevas o con otro hash y quita las que ya no
+        lo están. Devuelve `(agregadas, quitadas)`.
+        """
+        with conexion.cursor() as cursor:
+            cursor.execute("SELECT id, hash FROM denuncias WHERE estado = 'completada'")
+            actuales = dict(cursor.fetchall())
+        quitadas = self.eliminar(sorted(set(self._posicion) - set(actuales)))
+        cambiadas = sorted(i for i, h in actuales.items() if i not in self._posicion or self._hashes.get(i) != h)
+        agregadas = 0
+        for inicio in range(0, len(cambiadas), tamano_lote):
+            with conexion.cursor() as cursor:
+                cursor.execute(CONSULTA_DENUNCIAS, (cambiadas[inicio:inicio + tamano_lote],))
+                agregadas += self.agregar(denuncias_desde_cursor(cursor))
+        return agregadas, quitadas
+
+    def _candidatos(self, claves):
+        """Filas que comparten algún balde con las claves de banda dadas."""
+        encontradas = []
+        for banda in range(self.bandas):
+            columna = self._ordenadas[:, banda]
+            desde = np.searchsorted(columna, claves[banda], side="left")
+            hasta = np.searchsorted(columna, claves[banda], side="right")
+            if hasta > desde:
+                encontradas.append(self._filas_ordenadas[desde:hasta, banda])
+        if self._filas > self._ordenado_hasta:
+            cola = self._claves[self._ordenado_hasta:]
+            encontradas.append(np.nonzero((cola == claves).any(axis=1))[0] + self._ordenado_hasta)
+        if not encontradas:
+            return np.empty(0, np.int64)
+        filas = np.unique(np.concatenate(encontradas))
+        return filas[self._activas[filas]]
+
+    def _similares(self, firma, entidades, excluir=None, umbral=UMBRAL, limite=20):
+        resultados = {}
+        if firma[0] != _VACIA:
+            filas = self._candidatos(self._claves_de_bandas(firma[None, :])[0])
+            if len(filas):
+                similitudes = (self._firmas[filas] == firma).mean(axis=1)
+                parecidas = similitudes >= umbral
+                for fila, similitud in zip(filas[parecidas].tolist(), similitudes[parecidas].tolist()):
+                    resultados[int(self._ids[fila])] = {"similitud": round(similitud, 3), "entidades": []}
+        for clave in entidades:
+            vinculadas = self._por_entidad.get(clave, ())
+            if len(vinculadas) > MAXIMO_POR_ENTIDAD:
+                continue
+            for id_denuncia in vinculadas:
+                if id_denuncia not in resultados:
+                    fila = self._posicion[id_denuncia]
+                    similitud = float((self._firmas[fila] == firma).mean()) if firma[0] != _VACIA else 0.0
+                    resultados[id_denuncia] = {"similitud": round(similitud, 3), "entidades": []}
+                resultados[id_denuncia]["entidades"].append(clave)
+        resultados.pop(excluir, None)
+        ordenados = sorted(
+            resultados.items(), key=lambda par: (bool(par[1]["entidades"]), par[1]["similitud"]), reverse=True
+        )
+        return [dict(id=id_denuncia, **datos) for id_denuncia, datos in ordenados[:limite]]
+
+    def similares(self, id_denuncia, umbral=UMBRAL, limite=20):
+        """
+        Casos parecidos a una denuncia del índice: lista de `{"id", "similitud",
+        "entidades"}`. `similitud` es la estimación MinHash de Jaccard entre los
+        relatos; `entidades` son los teléfonos y cuentas compartidos. Primero van
+        los casos con entidades compartidas.
+        """
+        fila = self._posicion.get(int(id_denuncia))
+        if fila is None:
+            raise KeyError(f"La denuncia {id_denuncia} no está en el índice")
+        return self._similares(self._firmas[fila], self._entidades[int(id_denuncia)], int(id_denuncia), umbral, limite)
+
+    def similares_a_relato(self, relato, umbral=UMBRAL, limite=20):
+        """Como `similares`, para un relato que todavía no está en el índice."""
+        return self._similares(self.firma(relato), entidades_vinculantes(relato), None, umbral, limite)
+
+    def agrupar(self, umbral=UMBRAL, con_entidades=True):
+        """
+        Agrupa todas las denuncias del índice: dos quedan en el mismo grupo si
+        sus relatos superan el umbral de similitud (o comparten teléfono o
+        cuenta, con `con_entidades`), directa o indirectamente. Devuelve los
+        grupos de dos o más ids, del más grande al más chico.
+        """
+        self._ordenar()
+        padre = list(range(self._filas))
+
+        def raiz(x):
+            while padre[x] != x:
+                padre[x] = padre[padre[x]]
+                x = padre[x]
+            return x
+
+        def unir(x, y):
+            rx, ry = raiz(x), raiz(y)
+            if rx != ry:
+                padre[max(rx, ry)] = min(rx, ry)
+
+        for banda in range(self.bandas):
+            columna, filas = self._ordenadas[:, banda], self._filas_ordenadas[:, banda]
+            if len(columna) < 2:
+                continue
+            # 🔹 Baldes con más de una fila: cada miembro se compara con el primero del balde
+            nuevo = np.concatenate([[True], columna[1:] != columna[:-1]])
+            miembros = np.nonzero(~nuevo)[0]
+            if not len(miembros):
+                continue
+            inicio_de = np.maximum.accumulate(np.where(nuevo, np.arange(len(columna)), 0))
+            primeras, otras = filas[inicio_de[miembros]], filas[miembros]
+            parecidas = (self._firmas[otras] == self._firmas[primeras]).mean(axis=1) >= umbral
+            for x, y in zip(primeras[parecidas].tolist(), otras[parecidas].tolist()):
+                unir(x, y)
+
+        if con_entidades:
+            for vinculadas in self._por_entidad.values():
+                if 2 <= len(vinculadas) <= MAXIMO_POR_ENTIDAD:
+                    filas = [self._posicion[i] for i in vinculadas]
+                    for fila in filas[1:]:
+                        unir(filas[0], fila)
+
+        grupos = {}
+        for id_denuncia, fila in self._posicion.items():
+            grupos.setdefault(raiz(fila), []).append(id_denuncia)
+        return sorted((sorted(g) for g in grupos.values() if len(g) > 1), key=len, reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Relatos casi duplicados y casos vinculados.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("agregar", help="Agregar denuncias desde exportaciones JSON")
+    p.add_argument("indice")
+    p.add_argument("archivos", nargs="+")
+    p = sub.add_parser("similares", help="Casos parecidos a una denuncia")
+    p.add_argument("indice")
+    p.add_argument("id", type=int)
+    p.add_argument("--umbral", type=float, default=UMBRAL)
+    p.add_argument("--limite", type=int, default=20)
+    p = sub.add_parser("agrupar", help="Agrupar todas las denuncias del índice")
+    p.add_argument("indice")
+    p.add_argument("--umbral", type=float, default=UMBRAL)
+    p.add_argument("--sin-entidades", action="store_true", help="Agrupar sólo por similitud del relato")
+    p.add_argument("--salida", help="Archivo JSON con los grupos")
+    args = parser.parse_args(argv)
+
+    indice = IndiceSimilitud(args.indice)
+    inicio = time.perf_counter()
+    if args.comando == "agregar":
+        cantidad = indice.agregar(leer_exportaciones(*args.archivos))
+        print(f"✅ {cantidad} denuncias agregadas en {time.perf_counter() - inicio:.2f}s ({len(indice)} en total)")
+    elif args.comando == "similares":
+        try:
+            resultados = indice.similares(args.id, args.umbral, args.limite)
+        except KeyError as e:
+            print(f"❌ {e.args[0]}", file=sys.stderr)
+            return 1
+        duracion = (time.perf_counter() - inicio) * 1000
+        for r in resultados:
+            compartidas = f"  comparte {', '.join(r['entidades'])}" if r["entidades"] else ""
+            print(f"id {r['id']}: similitud {r['similitud']:.2f}{compartidas}")
+        print(f"— {len(resultados)} casos ({duracion:.1f} ms)")
+    else:
+        grupos = indice.agrupar(args.umbral, not args.sin_entidades)
+        print(f"✅ {len(grupos)} grupos en {time.perf_counter() - inicio:.2f}s")
+        for grupo in grupos[:10]:
+            print(f"   {len(grupo)} denuncias: {', '.join(map(str, grupo[:15]))}{' ...' if len(grupo) > 15 else ''}")
+        if args.salida:
+            with open(args.salida, "w", encoding="utf-8") as f:
+                json.dump(grupos, f)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
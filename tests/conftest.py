@@ -0,0 +1,41 @@
+"""Los módulos de Python viven en la raíz del repositorio (sin paquete)."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def acta():
+    """`(numero_orden, denunciante, datos_denuncia)` completos para renderizar un acta."""
+    denunciante = {
+        "Nombres y Apellidos": "María González Benítez",
+        "Cédula de Identidad": "4567890",
+        "Domicilio": "Calle 1234 c/ Mariscal López",
+        "Nacionalidad": "Paraguaya",
+        "Estado Civil": "Soltero/a",
+        "Edad": "34",
+        "Fecha de Nacimiento": "1991-05-12",
+        "Lugar de Nacimiento": "Asunción",
+        "Número de Teléfono": "0981123456",
+        "Profesión": "Docente",
+    }
+    datos_denuncia = {
+        "oficina": "Asunción",
+        "fecha_denuncia": "2026-02-16",
+        "hora_denuncia": "10:30",
+        "grado_operador": "Oficial Inspector",
+        "nombre_operador": "Juan Pérez",
+        "tipo_denuncia": "Estafa",
+        "fecha_hecho": "2026-02-15",
+        "hora_hecho": "09:00",
+        "lugar_hecho": "Asunción",
+        "relato": "Que recibió un mensaje por WhatsApp de un supuesto banco y transfirió 500.000 Gs. " * 20,
+        "latitud": -25.28,
+        "longitud": -57.63,
+        "orden": 123,
+        "hash": "A1B2C3D4",
+    }
+    return 123, denunciante, datos_denuncia
@@ -0,0 +1,153 @@
+import os
+
+import pytest
+
+from archivo_actas import ArchivoActas, BackendLocal, huella_acta
+
+
+class _BackendRegistrado(BackendLocal):
+    """BackendLocal que anota cada subida, para verificar el orden del sellado."""
+
+    def __init__(self, raiz):
+        super().__init__(raiz)
+        self.subidas = []
+
+    def subir_archivo(self, clave, ruta):
+        self.subidas.append(clave)
+        super().subir_archivo(clave, ruta)
+
+    def subir(self, clave, datos):
+        self.subidas.append(clave)
+        super().subir(clave, datos)
+
+
+def _pdf(n, largo=2000):
+    return b"%PDF-1.4\n" + bytes([n % 256]) * largo + b"\n%%EOF"
+
+
+@pytest.fixture
+def rutas(tmp_path):
+    return str(tmp_path / "backend"), str(tmp_path / "trabajo")
+
+
+def test_guardar_y_obtener_deduplica_por_contenido(rutas):
+    raiz, trabajo = rutas
+    with ArchivoActas(BackendLocal(raiz), trabajo) as archivo:
+        digesto_a = archivo.guardar("aa" * 32, _pdf(1))
+        digesto_b = archivo.guardar("bb" * 32, _pdf(1))
+        archivo.guardar("cc" * 32, _pdf(2))
+        assert digesto_a == digesto_b
+        assert archivo.estadisticas()["pdf_distintos"] == 2
+        assert archivo.obtener("bb" * 32) == _pdf(1)
+        assert archivo.obtener("dd" * 32) is None
+
+
+def test_recupera_el_segmento_activo_truncado(rutas):
+    raiz, trabajo = rutas
+    with ArchivoActas(BackendLocal(raiz), trabajo) as archivo:
+        archivo.guardar("aa" * 32, _pdf(1))
+        archivo.guardar("bb" * 32, _pdf(2))
+    activo = os.path.join(trabajo, "activo_000001.seg")
+    tamano = os.path.getsize(activo)
+    # ⚠ Corte a mitad de la última escritura (el registro de la clave "bb")
+    with open(activo, "r+b") as f:
+        f.truncate(tamano - 10)
+
+    with ArchivoActas(BackendLocal(raiz), trabajo) as archivo:
+        assert archivo.obtener("aa" * 32) == _pdf(1)
+        assert "bb" * 32 not in archivo
+        archivo.guardar("bb" * 32, _pdf(2))
+
+    with ArchivoActas(BackendLocal(raiz), trabajo) as archivo:
+        assert archivo.obtener("bb" * 32) == _pdf(2)
+        assert len(archivo) == 2
+
+
+def test_descarta_basura_al_final_del_segmento_activo(rutas):
+    raiz, trabajo = rutas
+    with ArchivoActas(BackendLocal(raiz), trabajo) as archivo:
+        archivo.guardar("aa" * 32, _pdf(1))
+    activo = os.path.join(trabajo, "activo_000001.seg")
+    tamano = os.path.getsize(activo)
+    with open(activo, "ab") as f:
+        f.write(b"ACT1\x00basura")
+
+    with ArchivoActas(BackendLocal(raiz), trabajo) as archivo:
+        assert archivo.obtener("aa" * 32) == _pdf(1)
+    assert os.path.getsize(activo) == tamano
+
+
+def test_sella_el_segmento_antes_que_su_indice(rutas):
+    raiz, trabajo = rutas
+    backend = _BackendRegistrado(raiz)
+    with ArchivoActas(backend, trabajo, tamano_segmento=3000) as archivo:
+        archivo.guardar("aa" * 32, os.urandom(4000))  # 🔹 No comprime: llena el segmento y lo sella
+        archivo.guardar("bb" * 32, _pdf(2))
+
+    assert backend.subidas == ["segmentos/000001.seg", "indices/000001.json"]
+    assert not os.path.exists(os.path.join(trabajo, "activo_000001.seg"))
+    with ArchivoActas(BackendLocal(raiz), trabajo) as archivo:
+        assert len(archivo) == 2
+        assert archivo.estadisticas()["segmento_activo"] == 2
+        assert archivo.obtener("bb" * 32) == _pdf(2)
+
+
+def test_segmento_subido_sin_indice_se_recupera_del_activo(rutas):
+    raiz, trabajo = rutas
+
+    class _FallaAlSubirIndice(BackendLocal):
+        def subir(self, clave, datos):
+            if clave.startswith("indices/"):
+                raise OSError("corte de red")
+            super().subir(clave, datos)
+
+    archivo = ArchivoActas(_FallaAlSubirIndice(raiz), trabajo)
+    archivo.guardar("aa" * 32, _pdf(1))
+    with pytest.raises(OSError):
+        archivo.sellar()
+    archivo.cerrar()
+
+    # 🔹 Sin índice el segmento no cuenta como sellado: el activo local sigue siendo la fuente
+    with ArchivoActas(BackendLocal(raiz), trabajo) as archivo:
+        assert archivo.estadisticas()["segmento_activo"] == 1
+        assert archivo.obtener("aa" * 32) == _pdf(1)
+
+
+def test_activo_ya_sellado_se_descarta_al_abrir(rutas):
+    raiz, trabajo = rutas
+    with ArchivoActas(BackendLocal(raiz), trabajo) as archivo:
+        archivo.guardar("aa" * 32, _pdf(1))
+        copia = open(os.path.join(trabajo, "activo_000001.seg"), "rb").read()
+        archivo.sellar()
+    # ⚠ Cierre interrumpido entre subir el índice y borrar el activo
+    with open(os.path.join(trabajo, "activo_000001.seg"), "wb") as f:
+        f.write(copia)
+
+    with ArchivoActas(BackendLocal(raiz), trabajo) as archivo:
+        assert not os.path.exists(os.path.join(trabajo, "activo_000001.seg"))
+        assert archivo.obtener("aa" * 32) == _pdf(1)
+        assert archivo.estadisticas()["segmento_activo"] == 2
+
+
+def test_pdf_grande_va_como_objeto_propio(rutas):
+    raiz, trabajo = rutas
+    grande = os.urandom(5000)
+    with ArchivoActas(BackendLocal(raiz), trabajo, umbral_externo=4096) as archivo:
+        digesto = archivo.guardar("aa" * 32, grande)
+    assert os.path.exists(os.path.join(raiz, "objetos", f"{digesto}.pdf"))
+    with ArchivoActas(BackendLocal(raiz), trabajo) as archivo:
+        assert archivo.obtener("aa" * 32) == grande
+
+
+def test_un_solo_escritor(rutas):
+    raiz, trabajo = rutas
+    with ArchivoActas(BackendLocal(raiz), trabajo):
+        with pytest.raises(RuntimeError):
+            ArchivoActas(BackendLocal(raiz), trabajo)
+
+
+def test_huella_cambia_con_la_version_de_plantilla():
+    datos = ({"Nombres y Apellidos": "JUAN"}, {"hash": "ABC"})
+    assert huella_acta(1, *datos) == huella_acta(1, *datos)
+    assert huella_acta(1, *datos) != huella_acta(1, *datos, version="2")
+    assert huella_acta(1, *datos) != huella_acta(2, *datos)
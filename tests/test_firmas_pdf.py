@@ -0,0 +1,71 @@
+import re
+from io import BytesIO
+
+import pytest
+from PIL import Image, ImageDraw
+
+from firmas_pdf import _PDF, actualizacion_firmas, firmar_acta
+from generar_pdf import RenderizadorActas
+
+
+def _firma_png(transparente=True):
+    imagen = Image.new("RGBA" if transparente else "RGB", (300, 120), (0, 0, 0, 0) if transparente else "white")
+    ImageDraw.Draw(imagen).line([(20, 90), (120, 30), (200, 80), (280, 20)], fill="black", width=6)
+    salida = BytesIO()
+    imagen.save(salida, "PNG")
+    return salida.getvalue()
+
+
+@pytest.fixture
+def acta_renderizada(acta):
+    lineas = {}
+    pdf_bytes = RenderizadorActas().renderizar(*acta, lineas_firma=lineas)
+    return pdf_bytes, lineas
+
+
+def test_los_bytes_originales_quedan_como_prefijo(acta_renderizada):
+    pdf_bytes, lineas = acta_renderizada
+    firmado = firmar_acta(pdf_bytes, {"denunciante": _firma_png(), "operador": _firma_png(False)}, lineas)
+
+    assert firmado.startswith(pdf_bytes)
+    assert firmado.endswith(b"%%EOF\n")
+
+
+def test_la_actualizacion_encadena_la_xref_original(acta_renderizada):
+    pdf_bytes, lineas = acta_renderizada
+    original = _PDF(pdf_bytes)
+    firmado = firmar_acta(pdf_bytes, {"denunciante": _firma_png()}, lineas)
+
+    nuevo = _PDF(firmado)
+    assert re.search(rb"/Prev %d\b" % original.startxref, nuevo.trailer)
+    assert nuevo.raiz == original.raiz
+    assert nuevo.tamano > original.tamano
+    assert list(nuevo.paginas()) == list(original.paginas())
+    # 🔹 La página de firmas se reescribe con el contenido original entre q/Q y la imagen en sus recursos
+    pagina = nuevo.objeto(list(nuevo.paginas())[lineas["denunciante"]["pagina"] - 1])
+    assert re.search(rb"/Contents \[ \d+ 0 R( \d+ 0 R)+ \]", pagina)
+    assert b"/FirmaDenunciante" in firmado[len(pdf_bytes):]
+
+
+def test_se_puede_firmar_en_dos_pasos(acta_renderizada):
+    pdf_bytes, lineas = acta_renderizada
+    con_operador = firmar_acta(pdf_bytes, {"operador": _firma_png()}, lineas)
+    con_ambas = firmar_acta(con_operador, {"denunciante": _firma_png()}, lineas)
+
+    assert con_ambas.startswith(con_operador)
+    assert re.search(rb"/Prev %d\b" % _PDF(con_operador).startxref, _PDF(con_ambas).trailer)
+    assert b"/FirmaOperador" in con_ambas and b"/FirmaDenunciante" in con_ambas
+
+
+def test_errores_de_entrada(acta_renderizada):
+    pdf_bytes, lineas = acta_renderizada
+    with pytest.raises(ValueError):
+        actualizacion_firmas(pdf_bytes, {"testigo": _firma_png()}, lineas)
+    with pytest.raises(ValueError):
+        actualizacion_firmas(pdf_bytes, {"operador": _firma_png()}, {"operador": dict(lineas["operador"], pagina=99)})
+    with pytest.raises(ValueError):
+        vacia = BytesIO()
+        Image.new("RGBA", (10, 10), (0, 0, 0, 0)).save(vacia, "PNG")
+        actualizacion_firmas(pdf_bytes, {"operador": vacia.getvalue()}, lineas)
+    with pytest.raises(ValueError):
+        actualizacion_firmas(pdf_bytes[:-200], {"operador": _firma_png()}, lineas)
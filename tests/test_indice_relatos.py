@@ -0,0 +1,147 @@
+import pytest
+
+from indice_relatos import MAXIMO_EXPANSIONES, IndiceRelatos
+
+
+def _denuncia(id_, relato, fecha="2026-01-15", **extra):
+    return dict({"id": id_, "numero_orden": id_, "fecha_denuncia": fecha, "tipo_hecho": "Estafa",
+                 "estado": "completada", "relato": relato}, **extra)
+
+
+def _ids(respuesta):
+    return sorted(r["id"] for r in respuesta["resultados"])
+
+
+@pytest.fixture
+def indice(tmp_path):
+    with IndiceRelatos(str(tmp_path / "indice")) as indice:
+        yield indice
+
+
+def test_total_exacto_con_mas_expansiones_que_el_maximo(indice):
+    cantidad = MAXIMO_EXPANSIONES + 144
+    indice.agregar([_denuncia(i, f"transferencia a la cuenta cbu{i:04d}xyz") for i in range(cantidad)])
+
+    assert indice.buscar("cbu")["total"] == cantidad
+    assert indice.buscar("cbu0")["total"] == cantidad
+    assert indice.buscar("cbu03")["total"] == 100
+    assert indice.buscar("transferencia cbu", limite=cantidad)["total"] == cantidad
+
+
+def test_prefijo_corto_tambien_coincide(indice):
+    indice.agregar([_denuncia(1, "me llamaron por whatsapp"), _denuncia(2, "compra en marketplace")])
+
+    assert _ids(indice.buscar("wh")) == [1]
+    assert _ids(indice.buscar("ll ma")) == []
+    assert _ids(indice.buscar("w")) == [1]
+
+
+def test_agregar_reemplaza_la_version_anterior(indice):
+    indice.agregar([_denuncia(1, "estafa por marketplace"), _denuncia(2, "hackeo de whatsapp")])
+    indice.agregar([_denuncia(1, "hackeo de instagram")])
+
+    assert len(indice) == 2
+    assert indice.buscar("marketplace")["total"] == 0
+    assert _ids(indice.buscar("hackeo")) == [1, 2]
+
+
+def test_eliminar_y_volver_a_agregar(indice):
+    indice.agregar([_denuncia(1, "hackeo de whatsapp"), _denuncia(2, "hackeo de instagram")])
+    indice.eliminar([1])
+    assert 1 not in indice
+    assert _ids(indice.buscar("hackeo")) == [2]
+
+    indice.agregar([_denuncia(1, "hackeo de facebook")])
+    assert _ids(indice.buscar("hackeo")) == [1, 2]
+
+
+def test_agregar_una_no_completada_la_quita(indice):
+    indice.agregar([_denuncia(1, "hackeo de whatsapp")])
+    indice.agregar([_denuncia(1, "hackeo de whatsapp", estado="borrador")])
+
+    assert len(indice) == 0
+    assert indice.buscar("hackeo")["total"] == 0
+
+
+def test_compactar_conserva_solo_lo_vivo(indice, tmp_path):
+    indice.agregar([_denuncia(i, f"relato numero {i}") for i in range(1, 6)])
+    indice.agregar([_denuncia(2, "relato corregido")])
+    indice.eliminar([3])
+    antes = _ids(indice.buscar("relato", limite=50))
+
+    indice.compactar()
+
+    assert len(indice._segmentos) == 1
+    assert _ids(indice.buscar("relato", limite=50)) == antes == [1, 2, 4, 5]
+    assert _ids(indice.buscar("corregido")) == [2]
+    with IndiceRelatos(indice.ruta) as reabierto:
+        assert _ids(reabierto.buscar("relato", limite=50)) == antes
+
+
+def test_reindexar_no_deja_el_idf_negativo(indice):
+    # 🔹 "relato" está en todas las vivas; las versiones viejas hacen que df supere el total
+    denuncias = [_denuncia(i, "relato de una estafa") for i in range(1, 4)]
+    for _ in range(3):
+        indice.agregar(denuncias)
+
+    respuesta = indice.buscar("relato")
+    assert respuesta["total"] == 3
+    assert all(r["puntaje"] > 0 for r in respuesta["resultados"])
+
+
+def test_consulta_de_palabras_vacias_no_devuelve_todo(indice):
+    indice.agregar([_denuncia(1, "sinestro con la tarjeta"), _denuncia(2, "compra en marketplace")])
+
+    assert _ids(indice.buscar("sin")) == [1]
+    assert indice.buscar("")["total"] == 2
+
+
+class _Cursor:
+    def __init__(self, base):
+        self.base = base
+        self.description = None
+        self._filas = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def execute(self, consulta, parametros=None):
+        if parametros is None:
+            self._filas = [(d["id"], d["hash"]) for d in self.base if d["estado"] == "completada"]
+            return
+        ids = set(parametros[0])
+        filas = [dict(d, hash_denuncia=d["hash"]) for d in self.base if d["id"] in ids]
+        columnas = list(filas[0]) if filas else ["id"]
+        self.description = [(columna,) for columna in columnas]
+        self._filas = [tuple(fila[c] for c in columnas) for fila in filas]
+
+    def fetchall(self):
+        return self._filas
+
+    def fetchmany(self, cantidad):
+        filas, self._filas = self._filas[:cantidad], self._filas[cantidad:]
+        return filas
+
+
+class _Conexion:
+    def __init__(self, base):
+        self.base = base
+
+    def cursor(self):
+        return _Cursor(self.base)
+
+
+def test_sincronizar_reindexa_por_hash(indice):
+    base = [_denuncia(1, "hackeo de whatsapp", hash="a1"), _denuncia(2, "estafa por marketplace", hash="b1")]
+    assert indice.sincronizar(_Conexion(base)) == (2, 0)
+    assert indice.sincronizar(_Conexion(base)) == (0, 0)
+
+    base[0] = _denuncia(1, "hackeo de instagram", hash="a2")
+    base[1] = dict(base[1], estado="borrador")
+    assert indice.sincronizar(_Conexion(base)) == (1, 1)
+    assert _ids(indice.buscar("instagram")) == [1]
+    assert indice.buscar("whatsapp")["total"] == 0
+    assert 2 not in indice
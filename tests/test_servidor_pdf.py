@@ -0,0 +1,150 @@
+import json
+import os
+import struct
+import threading
+import time
+from io import BytesIO
+
+import pytest
+
+from servidor_pdf import (TAMANO_MAXIMO_PEDIDO, ErrorProtocolo, ServicioPDF, escribir_mensaje, leer_mensaje,
+                          servir_socket, solicitar)
+
+
+def _flujo(*mensajes):
+    entrada = BytesIO()
+    for mensaje in mensajes:
+        escribir_mensaje(entrada, mensaje)
+    entrada.seek(0)
+    return entrada
+
+
+def _respuestas(salida):
+    salida.seek(0)
+    mensajes = []
+    while (mensaje := leer_mensaje(salida)) is not None:
+        mensajes.append(mensaje)
+    return mensajes
+
+
+@pytest.fixture(scope="module")
+def servicio():
+    servicio = ServicioPDF(procesos=1, tiempo_maximo=60)
+    yield servicio
+    servicio.cerrar()
+
+
+def _pedido(acta, **extra):
+    numero_orden, denunciante, datos_denuncia = acta
+    return dict({"accion": "renderizar", "numero_orden": numero_orden, "denunciante": denunciante,
+                 "datos_denuncia": datos_denuncia, "vista_previa": True}, **extra)
+
+
+# 🔹 Encuadre
+
+def test_encuadre_ida_y_vuelta():
+    flujo = _flujo(b"", b"hola", {"id": 1, "accion": "salud"})
+    assert leer_mensaje(flujo) == b""
+    assert leer_mensaje(flujo) == b"hola"
+    assert json.loads(leer_mensaje(flujo)) == {"id": 1, "accion": "salud"}
+    assert leer_mensaje(flujo) is None
+
+
+@pytest.mark.parametrize("datos", [
+    b"\x00\x00",                                       # cabecera incompleta
+    struct.pack(">I", 10) + b"corto",                  # contenido incompleto
+    struct.pack(">I", TAMANO_MAXIMO_PEDIDO + 1),       # demasiado grande
+])
+def test_encuadre_invalido(datos):
+    with pytest.raises(ErrorProtocolo):
+        leer_mensaje(BytesIO(datos))
+
+
+# 🔹 Atención de pedidos
+
+def test_renderiza_y_manda_el_pdf_en_un_segundo_mensaje(servicio, acta):
+    salida = BytesIO()
+    servicio.atender(_flujo(_pedido(acta, id=7)), salida)
+
+    cabecera, pdf_bytes = _respuestas(salida)
+    respuesta = json.loads(cabecera)
+    assert respuesta["ok"] and respuesta["id"] == 7
+    assert respuesta["tamano"] == len(pdf_bytes)
+    assert pdf_bytes.startswith(b"%PDF")
+    assert set(respuesta["lineas_firma"]) == {"operador", "denunciante"}
+
+
+def test_varios_pedidos_por_conexion_y_errores_que_no_cortan(servicio, acta):
+    salida = BytesIO()
+    servicio.atender(_flujo(
+        {"id": 1, "accion": "salud"},
+        [1, 2, 3],
+        {"id": 2, "accion": "borrar"},
+        {"id": 3, "accion": "renderizar", "numero_orden": 1},
+        _pedido(acta, id=4),
+    ), salida)
+
+    mensajes = _respuestas(salida)
+    respuestas = [json.loads(m) for m in mensajes[:-1]]
+    assert respuestas[0]["id"] == 1 and respuestas[0]["ok"] and respuestas[0]["estado"] == "listo"
+    assert not respuestas[1]["ok"] and "objeto JSON" in respuestas[1]["error"]
+    assert respuestas[2] == {"ok": False, "error": "Acción desconocida: borrar", "id": 2}
+    assert not respuestas[3]["ok"] and "KeyError" in respuestas[3]["error"]
+    assert respuestas[4]["ok"] and respuestas[4]["id"] == 4
+    assert mensajes[-1].startswith(b"%PDF")
+    assert servicio.salud()["en_curso"] == 0
+
+
+def test_json_invalido_responde_y_cierra(servicio):
+    entrada = BytesIO()
+    escribir_mensaje(entrada, b"{no es json")
+    escribir_mensaje(entrada, {"accion": "salud"})
+    entrada.seek(0)
+    salida = BytesIO()
+    servicio.atender(entrada, salida)
+
+    (respuesta,) = _respuestas(salida)
+    assert json.loads(respuesta)["error"].startswith("Pedido inválido")
+
+
+def test_sin_cupo_responde_ocupado(acta):
+    servicio = ServicioPDF(procesos=1, cola_maxima=0)
+    try:
+        assert servicio._cupos.acquire(blocking=False)  # 🔹 Ocupar el único cupo
+        respuesta, pdf_bytes = servicio.renderizar(_pedido(acta))
+        assert respuesta == {"ok": False, "error": "ocupado"} and pdf_bytes is None
+        assert servicio.salud()["rechazadas"] == 1
+        servicio._cupos.release()
+        assert servicio.renderizar(_pedido(acta))[0]["ok"]
+    finally:
+        servicio.cerrar()
+
+
+def test_se_recupera_si_muere_un_proceso(acta):
+    servicio = ServicioPDF(procesos=1)
+    try:
+        servicio._pool.submit(os._exit, 1)  # ⚠ Matar al renderizador: el pool queda roto
+        time.sleep(0.5)
+        respuesta, _ = servicio.renderizar(_pedido(acta))
+        assert not respuesta["ok"]
+
+        salud = servicio.salud()
+        assert salud["ok"] and salud["reinicios"] == 1 and salud["en_curso"] == 0
+        respuesta, pdf_bytes = servicio.renderizar(_pedido(acta))
+        assert respuesta["ok"] and pdf_bytes.startswith(b"%PDF")
+    finally:
+        servicio.cerrar()
+
+
+def test_socket_unix(servicio, acta, tmp_path):
+    ruta = str(tmp_path / "pdf.sock")
+    threading.Thread(target=servir_socket, args=(servicio, ruta), daemon=True).start()
+    for _ in range(100):
+        if os.path.exists(ruta):
+            break
+        time.sleep(0.05)
+
+    respuesta, pdf_bytes = solicitar(ruta, _pedido(acta, id=9))
+    assert respuesta["ok"] and respuesta["id"] == 9 and len(pdf_bytes) == respuesta["tamano"]
+    respuesta, pdf_bytes = solicitar(ruta, {"accion": "salud"})
+    assert respuesta["ok"] and pdf_bytes is None
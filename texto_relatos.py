@@ -0,0 +1,94 @@
+"""Utilidades compartidas para analizar relatos de denuncias.
+
+- `plegar`: minúsculas y sin tildes (búsquedas insensibles a acentos y mayúsculas).
+- `tokenizar`: palabras y números del texto plegado, sin palabras vacías del español.
+- `distancia_edicion`: errores de tipeo entre dos palabras (con transposiciones).
+- `leer_exportaciones`: denuncias de los JSON exportados por la búsqueda por
+  relato (``excels/json_para_analisis/*.json``, o `.jsonl` con una denuncia
+  por línea), sin repetir ids.
+- `denuncias_desde_cursor`: las mismas filas leídas desde un cursor DB-API.
+"""
+import glob
+import json
+import re
+import unicodedata
+
+
+def _tabla_sin_acentos():
+    tabla = {}
+    for codigo in range(0xC0, 0x250):
+        caracter = chr(codigo)
+        base = "".join(c for c in unicodedata.normalize("NFKD", caracter) if not unicodedata.combining(c))
+        if base and base != caracter:
+            tabla[codigo] = base
+    return tabla
+
+
+# 🔹 Tabla precalculada: `translate` es mucho más rápido que normalizar todo el texto
+_SIN_ACENTOS = _tabla_sin_acentos()
+
+_TOKEN = re.compile(r"[0-9a-z]+")
+
+# 📌 Palabras vacías frecuentes en los relatos (ya plegadas)
+PALABRAS_VACIAS = frozenset("""
+a al algo algun alguna algunas alguno algunos ante antes aqui asi aun cada como con contra cual cuales cuando
+de del desde donde dos durante e el ella ellas ello ellos en entre era eran es esa esas ese eso esos esta estaba
+estaban estan estar este esto estos fue fueron ha habia habian han hasta hay la las le les lo los mas me mi mis
+misma mismo muy ni no nos o otra otro para pero poco por porque que quien se segun sea ser si sin sobre solo su
+sus tambien tan te tenia tiene todo todos tu u un una unas uno unos y ya yo
+""".split())
+
+
+def plegar(texto):
+    """Minúsculas y sin tildes ni diéresis ("Itaú" → "itau", "Peña" → "pena")."""
+    return (texto or "").casefold().translate(_SIN_ACENTOS)
+
+
+def tokenizar(texto, quitar_vacias=True):
+    """Lista de palabras y números del texto plegado."""
+    tokens = _TOKEN.findall(plegar(texto))
+    if quitar_vacias:
+        return [t for t in tokens if t not in PALABRAS_VACIAS]
+    return tokens
+
+
+def distancia_edicion(a, b):
+    """Distancia de edición con transposiciones (Damerau-Levenshtein restringida)."""
+    anterior, fila = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        anterior, previa, fila = fila, anterior, [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            fila[j] = min(anterior[j] + 1, fila[j - 1] + 1, anterior[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                fila[j] = min(fila[j], previa[j - 2] + 1)
+    return fila[-1]
+
+
+def leer_exportaciones(*patrones):
+    """
+    Recorre las denuncias de uno o más archivos JSON exportados (acepta
+    comodines). Una misma denuncia aparece en varios archivos: se devuelve una
+    sola vez por id.
+    """
+    vistos = set()
+    rutas = sorted({ruta for patron in patrones for ruta in (glob.glob(patron) or [patron])})
+    for ruta in rutas:
+        with open(ruta, encoding="utf-8") as f:
+            # 🔹 Los .jsonl se leen de a una línea: no se carga el archivo entero
+            filas = (json.loads(linea) for linea in f if linea.strip()) if ruta.endswith(".jsonl") else json.load(f)
+            for denuncia in filas:
+                if denuncia["id"] in vistos:
+                    continue
+                vistos.add(denuncia["id"])
+                yield denuncia
+
+
+def denuncias_desde_cursor(cursor, tamano_lote=500):
+    """Convierte las filas de un cursor DB-API (ya ejecutado) en dicts, de a lotes."""
+    columnas = [descripcion[0] for descripcion in cursor.description]
+    while True:
+        filas = cursor.fetchmany(tamano_lote)
+        if not filas:
+            return
+        for fila in filas:
+            yield dict(zip(columnas, fila))